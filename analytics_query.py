@@ -0,0 +1,336 @@
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from compact_dtypes import restore_holdings_dtypes
+
+
+# Cached query results per published run
+QUERY_CACHE_SIZE = 256
+# Query methods served by the HTTP endpoint
+QUERY_METHODS = ["aum_history", "revenue_by_month", "flows", "holdings_history"]
+
+
+def _month_numbers(dates) -> np.ndarray:
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 12 + dates.month).to_numpy(np.int64)
+
+
+def _expand_ranges(lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Positions lower[i]:upper[i] of every range, concatenated.
+    """
+    lengths = np.maximum(upper - lower, 0)
+    total = lengths.sum()
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(lower - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+class SortedMonthlyIndex:
+    """
+    Rows of a monthly (client_id, product_id, month_date) frame kept
+    sorted client-major, with packed integer keys
+    (client, product, month) and, for product lookups, a product-major
+    permutation with keys (product, client, month). Lookups are
+    searchsorted ranges instead of boolean masks over the frame.
+    """
+
+    def __init__(self, input_df: pd.DataFrame):
+        client_codes, client_ids = pd.factorize(
+            input_df["client_id"], sort=True)
+        product_codes, product_ids = pd.factorize(
+            input_df["product_id"].astype(np.int64), sort=True)
+        self.client_ids = pd.Index(client_ids)
+        self.product_ids = pd.Index(product_ids)
+        months = _month_numbers(input_df["month_date"])
+        self.first_month = months.min(initial=0)
+        self.month_span = months.max(initial=0) - self.first_month + 1
+
+        order = np.lexsort((months, product_codes, client_codes))
+        self.frame = input_df.iloc[order].reset_index(drop=True)
+        self.client_codes = client_codes[order]
+        self.product_codes = product_codes[order]
+        self.months = months[order] - self.first_month
+        self.client_keys = self._key(
+            self.client_codes, self.product_codes, len(self.product_ids))
+
+        self.product_order = np.lexsort(
+            (self.months, self.client_codes, self.product_codes))
+        self.product_keys = self._key(
+            self.product_codes[self.product_order],
+            self.client_codes[self.product_order],
+            len(self.client_ids),
+        )
+
+    def _key(self, major_codes, minor_codes, minor_count, months=None):
+        if months is None:
+            months = self.months
+        return (major_codes * minor_count + minor_codes) * self.month_span + months
+
+    def _month_bounds(self, start, end) -> tuple:
+        lower = 0 if start is None else _month_numbers([start])[0] - self.first_month
+        upper = (self.month_span - 1 if end is None
+                 else _month_numbers([end])[0] - self.first_month)
+        return max(lower, 0), min(upper, self.month_span - 1)
+
+    def select(
+            self,
+            client_ids=None,
+            product_ids=None,
+            start=None,
+            end=None) -> pd.DataFrame:
+        """
+        Rows of the given clients and products (None: all) with
+        month_date from start to end (month granularity, inclusive),
+        sorted by client, product and month, or by product, client and
+        month when only products are given.
+        """
+        first_month, last_month = self._month_bounds(start, end)
+        if not len(self.frame) or first_month > last_month:
+            return self.frame.iloc[:0]
+
+        def codes(index, values):
+            if values is None:
+                return np.arange(len(index))
+            codes = index.get_indexer(np.atleast_1d(values))
+            return codes[codes >= 0]
+
+        by_product = client_ids is None and product_ids is not None
+        client_codes = codes(self.client_ids, client_ids)
+        product_codes = codes(
+            self.product_ids,
+            None if product_ids is None
+            else np.atleast_1d(product_ids).astype(np.int64))
+        if by_product:
+            major, minor, minor_count, keys = (
+                product_codes, client_codes, len(self.client_ids),
+                self.product_keys)
+        else:
+            major, minor, minor_count, keys = (
+                client_codes, product_codes, len(self.product_ids),
+                self.client_keys)
+
+        # One searchsorted range per (major, minor) series
+        major, minor = np.repeat(major, len(minor)), np.tile(minor, len(major))
+        lower = np.searchsorted(
+            keys, self._key(major, minor, minor_count, first_month), side="left")
+        upper = np.searchsorted(
+            keys, self._key(major, minor, minor_count, last_month), side="right")
+        positions = _expand_ranges(lower, upper)
+        if by_product:
+            positions = self.product_order[positions]
+        return self.frame.iloc[positions].reset_index(drop=True)
+
+
+class AnalyticsQuery:
+    """
+    In-process query API over the frames of the last published run:
+    monthly analytics (transform_monthly_analytics()) and the latest
+    holdings (process_client_holdings() rows with end_date NULL).
+    Frames are indexed once per run by SortedMonthlyIndex and results
+    are kept in an LRU cache of cache_size entries, cleared by publish().
+    """
+
+    def __init__(self, cache_size: int = QUERY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.version = 0
+        self.analytics_index = None
+        self.holdings_index = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(
+            self,
+            analytics_df: pd.DataFrame,
+            holdings_df: pd.DataFrame = None) -> int:
+        """
+        Indexes the frames of a new run and invalidates cached results.
+        Returns the published version.
+        """
+        analytics_index = SortedMonthlyIndex(analytics_df)
+        holdings_index = None
+        if holdings_df is not None:
+            holdings_df = restore_holdings_dtypes(holdings_df)
+            holdings_index = SortedMonthlyIndex(
+                holdings_df[holdings_df["end_date"].isna()])
+        with self._lock:
+            self.analytics_index = analytics_index
+            self.holdings_index = holdings_index
+            self._cache.clear()
+            self.version += 1
+            return self.version
+
+    def _cached(self, query_name: str, compute, *args) -> pd.DataFrame:
+        """
+        Result of compute() from the LRU cache, keyed by query and
+        arguments. A copy is returned so callers cannot alter the cache.
+        """
+        cache_key = (query_name,) + tuple(
+            tuple(np.atleast_1d(arg).tolist()) if isinstance(
+                arg, (list, tuple, np.ndarray)) else arg
+            for arg in args
+        )
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return self._cache[cache_key].copy()
+            version = self.version
+
+        result_df = compute()
+        with self._lock:
+            self.cache_misses += 1
+            # A result computed on an older run is not cached
+            if version == self.version and self.cache_size > 0:
+                self._cache[cache_key] = result_df
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result_df.copy()
+
+    def _index(self, index_name: str) -> SortedMonthlyIndex:
+        index = getattr(self, index_name)
+        if index is None:
+            raise ValueError(f"No {index_name} published")
+        return index
+
+    def aum_history(
+            self,
+            client_id,
+            start=None,
+            end=None,
+            product_id=None) -> pd.DataFrame:
+        """
+        Monthly holdings, NAV and AUM of a client, per product.
+        """
+        return self._cached(
+            "aum_history",
+            lambda: self._index("analytics_index").select(
+                client_id, product_id, start, end
+            )[["client_id", "product_id", "month_date", "holdings",
+               "net_asset_value", "assets_under_management"]],
+            client_id, start, end, product_id,
+        )
+
+    def revenue_by_month(
+            self,
+            client_id=None,
+            product_id=None,
+            start=None,
+            end=None) -> pd.DataFrame:
+        """
+        Monthly daily_revenue and accrued_revenue summed over the
+        selected clients and products (None: all).
+        """
+        def compute():
+            revenue_df = self._index("analytics_index").select(
+                client_id, product_id, start, end)
+            return revenue_df.groupby("month_date", as_index=False)[
+                ["assets_under_management", "daily_revenue",
+                 "accrued_revenue"]
+            ].sum(min_count=1)
+
+        return self._cached(
+            "revenue_by_month", compute, client_id, product_id, start, end)
+
+    def flows(
+            self,
+            product_id,
+            start=None,
+            end=None,
+            client_id=None) -> pd.DataFrame:
+        """
+        Monthly share change, net flow and market movement of a product,
+        per client.
+        """
+        return self._cached(
+            "flows",
+            lambda: self._index("analytics_index").select(
+                client_id, product_id, start, end
+            )[["client_id", "product_id", "month_date", "share_change",
+               "net_flow", "market_movement"]],
+            product_id, start, end, client_id,
+        )
+
+    def holdings_history(
+            self,
+            client_id,
+            product_id=None,
+            start=None,
+            end=None) -> pd.DataFrame:
+        """
+        Latest reported holdings of a client per product and month,
+        with the quarter that reported them.
+        """
+        return self._cached(
+            "holdings_history",
+            lambda: self._index("holdings_index").select(
+                client_id, product_id, start, end
+            )[["client_id", "product_id", "month_date", "quarter_date",
+               "holdings", "is_holdings_backfilled"]],
+            client_id, product_id, start, end,
+        )
+
+
+class _QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /<query method>?<argument>=<value>... -> JSON records.
+    """
+
+    query = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query_name = url.path.strip("/")
+        if query_name not in QUERY_METHODS:
+            self._send(404, {"error": f"Unknown query: {query_name}"})
+            return
+        arguments = {
+            name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if "product_id" in arguments:
+                try:
+                    arguments["product_id"] = int(arguments["product_id"])
+                except ValueError:
+                    raise ValueError(
+                        "product_id must be an integer, got "
+                        f"{arguments['product_id']!r}") from None
+            result_df = getattr(self.query, query_name)(**arguments)
+        except (TypeError, ValueError, KeyError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, json.loads(
+            result_df.to_json(orient="records", date_format="iso")))
+
+    def _send(self, status: int, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_query_server(
+        query: AnalyticsQuery,
+        host: str = "127.0.0.1",
+        port: int = 8765) -> ThreadingHTTPServer:
+    """
+    Local HTTP endpoint over an AnalyticsQuery, e.g.
+    GET /aum_history?client_id=client1&start=2024-01-31.
+    Call serve_forever() (or run it in a thread) to start serving.
+    """
+    handler = type(
+        "QueryRequestHandler", (_QueryRequestHandler,), {"query": query})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of analytics lookups: boolean masks over the whole
+monthly analytics frame against the sorted index of AnalyticsQuery
+(cache disabled, so every lookup is a searchsorted range).
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics_query
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics_query import AnalyticsQuery
+
+SEED = 42
+# (clients, products, months)
+CASES = [(50, 20, 24), (500, 50, 60), (2000, 50, 60)]
+LOOKUPS = 200
+
+
+def generate_analytics(clients: int, products: int, months: int) -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    month_dates = pd.date_range(end="2024-12-31", periods=months, freq="ME")
+    rows = clients * products * months
+    return pd.DataFrame(
+        {
+            "client_id": np.repeat(
+                [f"client{i}" for i in range(clients)], products * months),
+            "product_id": np.tile(
+                np.repeat(np.arange(products) + 1000000, months), clients),
+            "month_date": np.tile(month_dates, clients * products),
+            "holdings": rng.lognormal(15, 1, rows),
+            "net_asset_value": rng.lognormal(3, 0.5, rows),
+            "assets_under_management": rng.lognormal(18, 1, rows),
+        }
+    )
+
+
+def run_benchmark() -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    columns = ["client_id", "product_id", "month_date", "holdings",
+               "net_asset_value", "assets_under_management"]
+    results = []
+    for clients, products, months in CASES:
+        analytics_df = generate_analytics(clients, products, months)
+        month_dates = analytics_df["month_date"].unique()
+        start, end = month_dates[months // 4], month_dates[3 * months // 4]
+        lookup_clients = [
+            f"client{i}" for i in rng.integers(0, clients, LOOKUPS)]
+
+        start_time = time.perf_counter()
+        mask_results = [
+            analytics_df[
+                (analytics_df["client_id"] == client_id)
+                & analytics_df["month_date"].between(start, end)
+            ][columns]
+            for client_id in lookup_clients
+        ]
+        mask_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        query = AnalyticsQuery(cache_size=0)
+        query.publish(analytics_df)
+        index_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        index_results = [
+            query.aum_history(client_id, start, end)
+            for client_id in lookup_clients
+        ]
+        lookup_seconds = time.perf_counter() - start_time
+
+        for mask_df, index_df in zip(mask_results, index_results):
+            pd.testing.assert_frame_equal(
+                mask_df.reset_index(drop=True), index_df)
+        results.append(
+            {
+                "rows": len(analytics_df),
+                "lookups": LOOKUPS,
+                "mask_seconds": mask_seconds,
+                "index_build_seconds": index_seconds,
+                "index_lookup_seconds": lookup_seconds,
+            }
+        )
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print(run_benchmark().to_string(index=False))
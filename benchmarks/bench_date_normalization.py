@@ -0,0 +1,141 @@
+"""
+Micro-benchmark of the per-row date parsers the pipeline used before
+the columnar date normalization functions, against those functions.
+
+Run from the repository root:
+    python -m benchmarks.bench_date_normalization
+"""
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from date_normalization import normalize_holdings_dates, normalize_nav_dates
+
+ROWS = 100_000
+SEED = 42
+
+
+def nav_format_and_convert_date(date_string: str):
+    """
+    Check if the first part of the date is >= 12,
+    then reformat and convert to datetime to y-m-d.
+    """
+    try:
+        if "/" in date_string:
+            date_part = date_string.split("/")
+        else:
+            date_part = date_string.split("-")
+
+        if len(date_part) == 3 and int(date_part[0]) > 12:
+            formatted_date = f"{date_part[2]}-{date_part[1]}-{date_part[0]}"
+        else:
+            formatted_date = f"{date_part[2]}-{date_part[0]}-{date_part[1]}"
+
+        return pd.to_datetime(formatted_date, format="%Y-%m-%d", errors="coerce")
+    except Exception as e:
+        print(f"Error, nav_format_and_convert_date() failed: {str(e)}")
+        return None
+
+
+def holdings_format_and_convert_date(date_string: str):
+    """
+    Check if the middle part of the date is >= 12,
+    then reformat and convert to datetime to y-m-d.
+    """
+    try:
+        if "/" in date_string:
+            date_part = date_string.split("/")
+        else:
+            date_part = date_string.split("-")
+
+        if len(date_part) == 3 and int(date_part[1]) > 12:
+            formatted_date = f"{date_part[0]}-{date_part[2]}-{date_part[1]}"
+        else:
+            # Keep original format if condition is not met
+            formatted_date = date_string
+
+        return pd.to_datetime(formatted_date, format="%Y-%m-%d", errors="coerce")
+    except Exception as e:
+        print(f"Error, holdings_format_and_convert_date() failed: {str(e)}")
+        return None
+
+
+def generate_nav_dates(rows: int) -> pd.Series:
+    """
+    Month-first and day-first dates with "/" and "-" separators
+    plus a few unparseable values.
+    """
+    rng = np.random.default_rng(SEED)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 5, rows), unit="D"
+    )
+    month_first = dates.strftime("%m/%d/%Y")
+    day_first = dates.strftime("%d-%m-%Y")
+    nav_dates = np.where(rng.random(rows) < 0.8, month_first, day_first)
+    nav_dates[rng.random(rows) < 0.01] = "not a date"
+    return pd.Series(nav_dates, dtype=object)
+
+
+def generate_holdings_dates(rows: int) -> pd.Series:
+    """
+    Year-month-day and year-day-month month-end dates.
+    """
+    rng = np.random.default_rng(SEED)
+    dates = pd.date_range("2020-01-31", periods=60, freq="ME")
+    picked = dates[rng.integers(0, len(dates), rows)]
+    holdings_dates = np.where(
+        rng.random(rows) < 0.9,
+        picked.strftime("%Y-%m-%d"),
+        picked.strftime("%Y-%d-%m"),
+    )
+    return pd.Series(holdings_dates, dtype=object)
+
+
+def time_call(function, *args) -> tuple:
+    """
+    Returns the result and the elapsed seconds of a single call.
+    """
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def run_benchmark(rows: int = ROWS) -> pd.DataFrame:
+    """
+    Times both implementations on the same column and checks
+    they return the same dates.
+    """
+    cases = [
+        ("nav", generate_nav_dates(rows),
+         nav_format_and_convert_date, normalize_nav_dates),
+        ("holdings", generate_holdings_dates(rows),
+         holdings_format_and_convert_date, normalize_holdings_dates),
+    ]
+
+    results = []
+    for name, dates, row_parser, column_parser in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            row_dates, row_seconds = time_call(dates.apply, row_parser)
+        column_dates, column_seconds = time_call(column_parser, dates)
+
+        pd.testing.assert_series_equal(
+            pd.to_datetime(row_dates), column_dates, check_dtype=False
+        )
+        results.append(
+            {
+                "case": name,
+                "rows": rows,
+                "apply_seconds": row_seconds,
+                "vectorized_seconds": column_seconds,
+                "speedup": row_seconds / column_seconds,
+            }
+        )
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print(run_benchmark().to_string(index=False))
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark of month-end NAV resolution: dense daily calendar
+(fill_missing_nav_dates() and merge) against the sparse as-of lookup.
+
+Run from the repository root:
+    python -m benchmarks.bench_nav_lookup
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from nav_lookup import NavAsOfTable
+from transformations import WisdomTreeDataPipeline
+
+SEED = 42
+# (products, years of business day prices)
+CASES = [(20, 5), (200, 5), (200, 20)]
+
+
+def generate_observed_nav(products: int, years: int) -> pd.DataFrame:
+    """
+    Business day prices with ~5% missing days.
+    """
+    rng = np.random.default_rng(SEED)
+    dates = pd.bdate_range(end="2024-12-31", periods=252 * years)
+    nav_df = pd.DataFrame(
+        {
+            "product_id": np.repeat(np.arange(products) + 1000000, len(dates)),
+            "market_date": np.tile(dates, products),
+            "net_asset_value": rng.lognormal(3, 0.5, products * len(dates)),
+        }
+    )
+    return nav_df[rng.random(len(nav_df)) > 0.05].reset_index(drop=True)
+
+
+def month_end_requests(nav_df: pd.DataFrame) -> pd.DataFrame:
+    month_dates = pd.date_range(
+        nav_df["market_date"].min(), "2024-12-31", freq="ME")
+    return pd.DataFrame(
+        {
+            "product_id": np.repeat(
+                nav_df["product_id"].unique(), len(month_dates)),
+            "month_date": np.tile(
+                month_dates, nav_df["product_id"].nunique()),
+        }
+    )
+
+
+def measure(function, *args) -> tuple:
+    """
+    Returns the result, elapsed seconds and peak traced bytes of one call.
+    """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start_time
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak_bytes
+
+
+def run_benchmark() -> pd.DataFrame:
+    # Only fill_missing_nav_dates() is needed, the workbook is not opened
+    pipeline = WisdomTreeDataPipeline.__new__(WisdomTreeDataPipeline)
+
+    def dense_lookup(nav_df, requests_df):
+        return requests_df.merge(
+            pipeline.fill_missing_nav_dates(nav_df),
+            left_on=["product_id", "month_date"],
+            right_on=["product_id", "market_date"],
+            how="left",
+        )
+
+    def sparse_lookup(nav_df, requests_df):
+        return requests_df.merge(
+            NavAsOfTable(nav_df).as_of(
+                requests_df["product_id"], requests_df["month_date"]),
+            left_on=["product_id", "month_date"],
+            right_on=["product_id", "market_date"],
+            how="left",
+        )
+
+    results = []
+    for products, years in CASES:
+        nav_df = generate_observed_nav(products, years)
+        requests_df = month_end_requests(nav_df)
+        dense_df, dense_seconds, dense_bytes = measure(
+            dense_lookup, nav_df, requests_df)
+        sparse_df, sparse_seconds, sparse_bytes = measure(
+            sparse_lookup, nav_df, requests_df)
+
+        pd.testing.assert_frame_equal(
+            dense_df[["net_asset_value", "is_nav_backfilled"]],
+            sparse_df[["net_asset_value", "is_nav_backfilled"]],
+        )
+        results.append(
+            {
+                "products": products,
+                "years": years,
+                "observations": len(nav_df),
+                "dense_seconds": dense_seconds,
+                "sparse_seconds": sparse_seconds,
+                "dense_peak_mb": dense_bytes / 1e6,
+                "sparse_peak_mb": sparse_bytes / 1e6,
+            }
+        )
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print(run_benchmark().to_string(index=False))
@@ -0,0 +1,254 @@
+"""
+Scaling benchmark of the WisdomTreeDataPipeline stages on synthetic
+workbooks, with stored baselines to catch per-stage regressions.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline                  # compare to baseline
+    python -m benchmarks.bench_pipeline --update-baseline
+    python -m benchmarks.bench_pipeline --scales small,medium
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Measure parsing and transformations, not the sheet cache
+os.environ.setdefault("SHEET_CACHE_ENABLED", "0")
+# Parse client sheets in the traced process: with a process pool (the
+# default uses every core) parsing memory is not traced, so peak memory
+# would depend on the machine's core count
+os.environ.setdefault("HOLDINGS_LOAD_WORKERS", "1")
+
+from benchmarks.synthetic_workbook import generate_workbook  # noqa: E402
+from config import HOLDINGS_LOAD_WORKERS  # noqa: E402
+from transformations import WisdomTreeDataPipeline  # noqa: E402
+
+BASELINE_FILE_PATH = os.path.join(
+    os.path.dirname(__file__), "baselines.json")
+
+# Scale name -> generate_workbook() parameters
+SCALES = {
+    "small": {"products": 4, "clients": 5, "quarters": 5, "years": 2},
+    "medium": {"products": 20, "clients": 20, "quarters": 8, "years": 3},
+    "large": {"products": 50, "clients": 50, "quarters": 12, "years": 5},
+}
+
+# A stage regresses when slower than baseline * (1 + tolerance),
+# ignoring differences below MIN_TIME_DELTA seconds (timer noise)
+TIME_TOLERANCE = 0.5
+MIN_TIME_DELTA = 0.05
+MEMORY_TOLERANCE = 0.25
+
+
+def _with_products(pipeline: WisdomTreeDataPipeline) -> WisdomTreeDataPipeline:
+    pipeline.products_table
+    return pipeline
+
+
+def run_stages(file_path: str, trace_memory: bool = False) -> dict:
+    """
+    Runs every pipeline stage once and returns
+    {stage: {"seconds", "rows", "peak_memory_bytes"}}.
+    Peak memory is only traced when trace_memory is set, as tracing
+    slows allocations down and would skew the timings.
+    """
+    stage_results = {}
+
+    def run_stage(name, function, *args):
+        if trace_memory:
+            # Garbage of earlier stages would be freed at arbitrary points
+            gc.collect()
+            tracemalloc.reset_peak()
+        start_time = time.perf_counter()
+        output = function(*args)
+        seconds = time.perf_counter() - start_time
+        if output is None:
+            raise RuntimeError(f"stage {name} failed")
+
+        # The constructor stage returns the pipeline, count its products
+        output_df = getattr(output, "products_table", output)
+        stage_results[name] = {
+            "seconds": seconds,
+            "rows": len(output_df),
+            "peak_memory_bytes": (
+                tracemalloc.get_traced_memory()[1] if trace_memory else None
+            ),
+        }
+        return output
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # The products table is read lazily, on first access
+            pipeline = run_stage(
+                "extract_products",
+                lambda: _with_products(WisdomTreeDataPipeline(file_path)))
+
+            # Raw rows are read by the transform stages and checked, as
+            # main.py does, by the quality stages before being released
+            raw_frames = {}
+
+            def extract_nav():
+                raw_frames["nav"] = pipeline.read_observed_nav()
+                return pipeline.extract_nav(raw_frames["nav"])
+
+            def process_client_holdings():
+                raw_frames["holdings"] = pipeline.read_reported_holdings()
+                return pipeline.process_client_holdings(
+                    raw_frames["holdings"])
+
+            nav_df = run_stage("extract_nav", extract_nav)
+            run_stage(
+                "check_observed_nav", pipeline.check_observed_nav,
+                raw_frames.pop("nav"))
+            run_stage("check_nav_quality", pipeline.check_nav_quality, nav_df)
+            expense_df = run_stage(
+                "extract_expense_ratios", pipeline.extract_expense_ratios, nav_df)
+            holdings_df = run_stage(
+                "process_client_holdings", process_client_holdings)
+            run_stage(
+                "check_reported_holdings", pipeline.check_reported_holdings,
+                raw_frames.pop("holdings"))
+            run_stage(
+                "check_holdings_quality", pipeline.check_holdings_quality,
+                holdings_df)
+            run_stage(
+                "transform_monthly_analytics",
+                pipeline.transform_monthly_analytics,
+                expense_df,
+                holdings_df,
+                nav_df,
+            )
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return stage_results
+
+
+def benchmark_config() -> dict:
+    """
+    Settings that change the measured stages, stored with the baselines.
+    """
+    return {"holdings_load_workers": HOLDINGS_LOAD_WORKERS}
+
+
+def run_benchmark(scale_names: list, repeats: int = 3) -> dict:
+    """
+    Generates one workbook per scale and records, per stage, the best
+    wall time of `repeats` runs, output rows and peak memory.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for scale_name in scale_names:
+            file_path = os.path.join(temp_dir, f"{scale_name}.xlsx")
+            workbook_info = generate_workbook(file_path, **SCALES[scale_name])
+
+            runs = [run_stages(file_path) for _ in range(repeats)]
+            memory_run = run_stages(file_path, trace_memory=True)
+
+            results[scale_name] = {
+                "workbook": workbook_info,
+                "config": benchmark_config(),
+                "stages": {
+                    stage: {
+                        "seconds": min(run[stage]["seconds"] for run in runs),
+                        "rows": memory_run[stage]["rows"],
+                        "peak_memory_bytes": memory_run[stage]["peak_memory_bytes"],
+                    }
+                    for stage in memory_run
+                },
+            }
+            print(f"benchmark scale {scale_name} completed")
+
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict) -> list:
+    """
+    Returns a list of regression messages, one per stage and metric
+    above the baseline tolerance. Scales whose baseline was recorded with
+    another benchmark_config() are not compared.
+    """
+    regressions = []
+    for scale_name, scale_results in results.items():
+        scale_baseline = baseline.get(scale_name, {})
+        if scale_baseline.get("config") != scale_results["config"]:
+            print(
+                f"Benchmark Warning: {scale_name} baseline recorded with "
+                f"{scale_baseline.get('config')}, run with "
+                f"{scale_results['config']}: not compared")
+            continue
+        baseline_stages = scale_baseline.get("stages", {})
+        for stage, stage_results in scale_results["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            base = baseline_stages[stage]
+            if stage_results["seconds"] > max(
+                base["seconds"] * (1 + TIME_TOLERANCE),
+                base["seconds"] + MIN_TIME_DELTA,
+            ):
+                regressions.append(
+                    f"{scale_name} | {stage} | seconds "
+                    f"{stage_results['seconds']:.3f} > baseline {base['seconds']:.3f}"
+                )
+            if stage_results["peak_memory_bytes"] > base["peak_memory_bytes"] * (
+                1 + MEMORY_TOLERANCE
+            ):
+                regressions.append(
+                    f"{scale_name} | {stage} | peak_memory_bytes "
+                    f"{stage_results['peak_memory_bytes']} > baseline "
+                    f"{base['peak_memory_bytes']}"
+                )
+    return regressions
+
+
+def print_results(results: dict):
+    for scale_name, scale_results in results.items():
+        print(f"\n{scale_name}: {scale_results['workbook']}")
+        for stage, stage_results in scale_results["stages"].items():
+            print(
+                f"  {stage:<30} {stage_results['seconds']:>9.3f} s"
+                f" {stage_results['rows']:>10} rows"
+                f" {stage_results['peak_memory_bytes'] / 1e6:>9.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="small,medium")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    benchmark_results = run_benchmark(args.scales.split(","), args.repeats)
+    print_results(benchmark_results)
+
+    if args.update_baseline:
+        stored_baseline = {}
+        if os.path.exists(BASELINE_FILE_PATH):
+            with open(BASELINE_FILE_PATH) as baseline_file:
+                stored_baseline = json.load(baseline_file)
+        stored_baseline.update(benchmark_results)
+        with open(BASELINE_FILE_PATH, "w") as baseline_file:
+            json.dump(stored_baseline, baseline_file, indent=2)
+        print(f"\nbaseline updated: {BASELINE_FILE_PATH}")
+        sys.exit(0)
+
+    if not os.path.exists(BASELINE_FILE_PATH):
+        print("\nno baseline stored, run with --update-baseline")
+        sys.exit(0)
+
+    with open(BASELINE_FILE_PATH) as baseline_file:
+        found_regressions = compare_to_baseline(
+            benchmark_results, json.load(baseline_file))
+    for message in found_regressions:
+        print(f"Benchmark Regression: {message}")
+    sys.exit(1 if found_regressions else 0)
@@ -0,0 +1,140 @@
+"""
+Parity check of the transform backends: runs the pipeline stages with
+the pandas and the DuckDB backend on the case study workbook and on
+synthetic workbooks, compares every output and prints the stage times.
+Other settings (NAV_ACCESS_MODE, COMPACT_DTYPES_ENABLED, ...) are read
+from the environment as in a normal run.
+
+Run from the repository root:
+    python -m benchmarks.check_backend_parity
+    python -m benchmarks.check_backend_parity --scales small,medium,large
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Time the stages without the sheet cache
+os.environ.setdefault("SHEET_CACHE_ENABLED", "0")
+
+from benchmarks.bench_pipeline import SCALES  # noqa: E402
+from benchmarks.synthetic_workbook import generate_workbook  # noqa: E402
+from config import (  # noqa: E402
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIRECTORY,
+    DUCKDB_THREADS,
+    EXCEL_FILE_PATH,
+)
+from duckdb_backend import DuckDBBackend, duckdb_available  # noqa: E402
+from transformations import WisdomTreeDataPipeline  # noqa: E402
+
+# Sums over days, months and windows are added in a different order:
+# window sums near 0 may differ by rounding of the large terms
+# (absolute tolerance of a tenth of a currency cent)
+RELATIVE_TOLERANCE = 1e-9
+ABSOLUTE_TOLERANCE = 1e-3
+# Output -> sort keys; rows of the same date have no defined order in
+# the pandas NAV and expense ratio stages
+SORT_KEYS = {
+    "nav": ["market_date", "product_id"],
+    "expense_ratios": ["last_modified_date", "product_id"],
+    "holdings": None,
+    "analytics": None,
+}
+
+
+def run_backend(file_path: str, sql_backend) -> tuple:
+    """
+    Runs the stages with the given backend (None: pandas) and returns
+    ({output: frame}, {stage: seconds}).
+    """
+    outputs, seconds = {}, {}
+
+    def run_stage(name, function, *args):
+        start_time = time.perf_counter()
+        outputs[name] = function(*args)
+        seconds[name] = time.perf_counter() - start_time
+        if outputs[name] is None:
+            raise RuntimeError(f"stage {name} failed")
+        return outputs[name]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = WisdomTreeDataPipeline(file_path)
+        pipeline.sql_backend = sql_backend
+        nav_df = run_stage("nav", pipeline.extract_nav)
+        expense_df = run_stage(
+            "expense_ratios", pipeline.extract_expense_ratios, nav_df)
+        holdings_df = run_stage(
+            "holdings", pipeline.process_client_holdings)
+        run_stage(
+            "analytics", pipeline.transform_monthly_analytics,
+            expense_df, holdings_df, nav_df)
+    return outputs, seconds
+
+
+def compare_outputs(pandas_outputs: dict, sql_outputs: dict) -> list:
+    """
+    Returns one message per output that differs between the backends.
+    """
+    differences = []
+    for name, sort_keys in SORT_KEYS.items():
+        pandas_df, sql_df = pandas_outputs[name], sql_outputs[name]
+        if sort_keys:
+            pandas_df = pandas_df.sort_values(sort_keys, kind="stable")
+            sql_df = sql_df.sort_values(sort_keys, kind="stable")
+        try:
+            pd.testing.assert_frame_equal(
+                sql_df.reset_index(drop=True),
+                pandas_df.reset_index(drop=True),
+                check_dtype=False,
+                check_categorical=False,
+                rtol=RELATIVE_TOLERANCE,
+                atol=ABSOLUTE_TOLERANCE,
+            )
+        except AssertionError as e:
+            differences.append(f"{name}: {str(e).splitlines()[0]}")
+    return differences
+
+
+def check_workbook(label: str, file_path: str, sql_backend) -> list:
+    pandas_outputs, pandas_seconds = run_backend(file_path, None)
+    sql_outputs, sql_seconds = run_backend(file_path, sql_backend)
+    differences = compare_outputs(pandas_outputs, sql_outputs)
+
+    print(f"\n{label}: {'OK' if not differences else 'DIFFERENT'}")
+    for name in SORT_KEYS:
+        print(
+            f"  {name:<16} {len(pandas_outputs[name]):>9} rows"
+            f"  pandas {pandas_seconds[name]:>8.3f} s"
+            f"  duckdb {sql_seconds[name]:>8.3f} s"
+        )
+    return [f"{label} | {message}" for message in differences]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="small,medium")
+    args = parser.parse_args()
+
+    if not duckdb_available():
+        print("duckdb and pyarrow are required for the parity check")
+        sys.exit(1)
+    backend = DuckDBBackend(
+        DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIRECTORY)
+
+    found_differences = check_workbook(EXCEL_FILE_PATH, EXCEL_FILE_PATH, backend)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for scale_name in args.scales.split(","):
+            workbook_path = os.path.join(temp_dir, f"{scale_name}.xlsx")
+            generate_workbook(workbook_path, **SCALES[scale_name])
+            found_differences += check_workbook(
+                scale_name, workbook_path, backend)
+
+    for message in found_differences:
+        print(f"Backend Parity Difference: {message}")
+    sys.exit(1 if found_differences else 0)
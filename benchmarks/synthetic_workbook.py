@@ -0,0 +1,168 @@
+"""
+Synthetic workbook generator with the same layout and data quality
+defects as HistoricalClientHoldings.xlsx, sized by products, clients,
+quarters and years of NAV history.
+"""
+import numpy as np
+import pandas as pd
+
+# Products of the case study, so the WCLD split and GGRA fee change apply
+BASE_PRODUCTS = [
+    (1001310, "CRUD", "WisdomTree WTI Crude Oil"),
+    (1001513, "BRNT", "WisdomTree Brent Crude Oil"),
+    (1001656, "GGRA", "WisdomTree Global Quality Dividend Growth UCITS ETF"),
+    (3105371, "WCLD", "WisdomTree Cloud Computing UCITS ETF"),
+]
+SPLIT_PRODUCT_ID = 3105371
+SPLIT_DATE = pd.Timestamp("2024-03-31")
+SPLIT_RATIO = 3
+
+
+def generate_products(products: int) -> pd.DataFrame:
+    """
+    WT Products sheet: the case study products plus synthetic ones.
+    """
+    rows = list(BASE_PRODUCTS[:products])
+    for index in range(len(rows), products):
+        rows.append((2000000 + index, f"SYN{index:04d}",
+                    f"WisdomTree Synthetic Product {index}"))
+    return pd.DataFrame(rows, columns=["WT ID", "Ticker", "Product Name"])
+
+
+def generate_expense_ratios(
+        products_df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    WT Expense Ratios sheet with one fee change on GGRA.
+    """
+    expense_df = pd.DataFrame(
+        {
+            "Expense Ratio": rng.choice([0.0038, 0.0040, 0.0049], len(products_df)),
+            "WT ID": products_df["WT ID"],
+            "last_modified_date": "2024-06-30",
+        }
+    )
+    if (products_df["WT ID"] == 1001656).any():
+        fee_change_df = pd.DataFrame(
+            {"Expense Ratio": [0.0028], "WT ID": [1001656],
+             "last_modified_date": ["2024-05-31"]}
+        )
+        expense_df = pd.concat([expense_df, fee_change_df], ignore_index=True)
+    return expense_df
+
+
+def generate_nav(
+        products_df: pd.DataFrame,
+        end_date: pd.Timestamp,
+        years: int,
+        rng: np.random.Generator) -> pd.DataFrame:
+    """
+    NAV Data sheet: business day prices as text dates.
+    Defects: ~5% missing days, ~2% day-first dates and the WCLD split.
+    """
+    dates = pd.bdate_range(
+        start=end_date - pd.DateOffset(years=years) + pd.Timedelta(days=1),
+        end=end_date,
+    )
+    nav_frames = []
+    for product_id in products_df["WT ID"]:
+        returns = rng.normal(0, 0.01, len(dates))
+        nav = 20 * np.exp(np.cumsum(returns))
+        if product_id == SPLIT_PRODUCT_ID:
+            nav = np.where(dates >= SPLIT_DATE, nav / SPLIT_RATIO, nav)
+        keep = rng.random(len(dates)) > 0.05
+        nav_frames.append(
+            pd.DataFrame(
+                {"WT ID": product_id, "Date": dates[keep], "NAV": nav[keep]})
+        )
+    nav_df = pd.concat(nav_frames, ignore_index=True)
+
+    # Mostly month-first dates, some day-first where the day is > 12
+    day_first = (rng.random(len(nav_df)) < 0.02) & (nav_df["Date"].dt.day > 12)
+    nav_df["Date"] = np.where(
+        day_first,
+        nav_df["Date"].dt.strftime("%d/%m/%Y"),
+        nav_df["Date"].dt.strftime("%m/%d/%Y"),
+    )
+    return nav_df.sample(frac=1, random_state=int(rng.integers(1 << 31)))
+
+
+def generate_client_sheet(
+        tickers: list,
+        quarter_date: pd.Timestamp,
+        is_latest: bool,
+        base_holdings: np.ndarray,
+        rng: np.random.Generator) -> pd.DataFrame:
+    """
+    One ClientN_YYYY-MM-DD sheet: 12 trailing months of holdings per ticker.
+    Defects: blank and zero holdings, year-day-month headers on some
+    sheets and the latest month missing on the latest quarter.
+    """
+    months = pd.date_range(end=quarter_date, periods=12, freq="ME")
+    if is_latest:
+        months = months[:-1]
+
+    drift = np.exp(rng.normal(0, 0.03, (len(tickers), len(months))).cumsum(1))
+    holdings = (base_holdings[:, None] * drift).astype(object)
+    holdings[rng.random(holdings.shape) < 0.02] = 0
+    holdings[rng.random(holdings.shape) < 0.01] = None
+
+    header_format = "%Y-%d-%m" if rng.random() < 0.1 else "%Y-%m-%d"
+    sheet_df = pd.DataFrame(holdings, columns=months.strftime(header_format))
+    # Some tickers reported in lower case
+    sheet_df.insert(
+        0,
+        "ticker",
+        [ticker.lower() if rng.random() < 0.05 else ticker for ticker in tickers],
+    )
+    return sheet_df
+
+
+def generate_workbook(
+        file_path: str,
+        products: int = 4,
+        clients: int = 5,
+        quarters: int = 5,
+        years: int = 2,
+        seed: int = 42) -> dict:
+    """
+    Writes a synthetic workbook and returns its size parameters
+    and row counts.
+    """
+    rng = np.random.default_rng(seed)
+    end_date = pd.Timestamp("2024-12-31")
+    quarter_dates = pd.date_range(end=end_date, periods=quarters, freq="QE")
+
+    products_df = generate_products(products)
+    expense_df = generate_expense_ratios(products_df, rng)
+    nav_df = generate_nav(products_df, end_date, years, rng)
+
+    tickers = products_df["Ticker"].tolist()
+    with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
+        products_df.to_excel(writer, sheet_name="WT Products", index=False)
+        expense_df.to_excel(
+            writer, sheet_name="WT Expense Ratios", index=False)
+        nav_df.to_excel(writer, sheet_name="NAV Data", index=False)
+        for client in range(1, clients + 1):
+            base_holdings = rng.lognormal(17, 1, len(tickers))
+            for quarter_date in quarter_dates:
+                sheet_df = generate_client_sheet(
+                    tickers,
+                    quarter_date,
+                    quarter_date == quarter_dates[-1],
+                    base_holdings,
+                    rng,
+                )
+                sheet_df.to_excel(
+                    writer,
+                    sheet_name=f"Client{client}_{quarter_date:%Y-%m-%d}",
+                    index=False,
+                )
+
+    return {
+        "products": products,
+        "clients": clients,
+        "quarters": quarters,
+        "years": years,
+        "nav_rows": len(nav_df),
+        "holdings_cells": clients * quarters * products * 12,
+    }
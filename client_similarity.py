@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+
+# Monthly analytics measure describing client trading activity
+ACTIVITY_MEASURE = "net_flow"
+# Clients per block of similarity rows: memory of a block is
+# SIMILARITY_BLOCK_ROWS x clients
+SIMILARITY_BLOCK_ROWS = 1024
+
+
+def build_activity_matrix(
+        analytics_df: pd.DataFrame,
+        measure: str = ACTIVITY_MEASURE) -> pd.DataFrame:
+    """
+    Product-agnostic client x month activity: the measure summed over
+    products per client and month, months without activity as 0.
+    """
+    activity_df = analytics_df.groupby(
+        ["client_id", "month_date"], observed=True
+    )[measure].sum()
+    return activity_df.unstack("month_date", fill_value=0.0).fillna(0.0)
+
+
+def _unit_rows(activity_matrix: np.ndarray) -> np.ndarray:
+    """
+    Rows scaled to unit length; rows without activity stay 0,
+    so their similarity with every client is 0.
+    """
+    norms = np.linalg.norm(activity_matrix, axis=1, keepdims=True)
+    return np.divide(
+        activity_matrix, norms,
+        out=np.zeros_like(activity_matrix), where=norms > 0)
+
+
+class ClientSimilarity:
+    """
+    Cosine similarity of every pair of clients by monthly trading
+    activity. The similarity matrix is computed as products of unit
+    length activity rows, block_rows clients at a time, and cached;
+    refresh() recomputes only the rows and columns of clients whose
+    activity changed.
+    """
+
+    def __init__(
+            self,
+            measure: str = ACTIVITY_MEASURE,
+            block_rows: int = SIMILARITY_BLOCK_ROWS):
+        self.measure = measure
+        self.block_rows = block_rows
+        self.client_ids = pd.Index([])
+        self.activity_df = pd.DataFrame()
+        self.unit_rows = np.zeros((0, 0))
+        self.similarity = np.zeros((0, 0), dtype=np.float32)
+
+    def _compute_rows(self, rows: np.ndarray):
+        """
+        Similarity rows (and the symmetric columns) of the given clients,
+        one block of rows at a time.
+        """
+        for start in range(0, len(rows), self.block_rows):
+            block = rows[start:start + self.block_rows]
+            block_similarity = self.unit_rows[block] @ self.unit_rows.T
+            self.similarity[block, :] = block_similarity
+            self.similarity[:, block] = block_similarity.T
+
+    def fit(self, analytics_df: pd.DataFrame) -> "ClientSimilarity":
+        """
+        Builds the activity matrix and the full similarity matrix.
+        """
+        self.activity_df = build_activity_matrix(analytics_df, self.measure)
+        self.client_ids = self.activity_df.index
+        self.unit_rows = _unit_rows(self.activity_df.to_numpy(np.float64))
+        client_count = len(self.client_ids)
+        self.similarity = np.zeros(
+            (client_count, client_count), dtype=np.float32)
+        self._compute_rows(np.arange(client_count))
+        return self
+
+    def refresh(self, analytics_df: pd.DataFrame) -> list:
+        """
+        Updates the cached matrix from new monthly analytics, e.g. after
+        a quarterly drop. Only clients whose activity changed, or new
+        clients, are recomputed. Returns the recomputed client ids.
+        """
+        if not len(self.client_ids):
+            self.fit(analytics_df)
+            return list(self.client_ids)
+
+        activity_df = build_activity_matrix(analytics_df, self.measure)
+        # Previous and new activity of the new clients over the months of
+        # both, 0 where unknown: activity in a month that dropped out also
+        # changes the client's unit row
+        months = activity_df.columns.union(self.activity_df.columns)
+        previous_df = self.activity_df.reindex(
+            index=activity_df.index, columns=months, fill_value=0.0)
+        is_new_client = ~activity_df.index.isin(self.client_ids)
+        is_changed = is_new_client | (
+            activity_df.reindex(columns=months, fill_value=0.0).to_numpy(
+                np.float64)
+            != previous_df.to_numpy(np.float64)
+        ).any(axis=1)
+
+        # Keep cached similarities of unchanged clients
+        previous_positions = self.client_ids.get_indexer(activity_df.index)
+        kept = np.flatnonzero(~is_new_client)
+        similarity = np.zeros(
+            (len(activity_df), len(activity_df)), dtype=np.float32)
+        similarity[np.ix_(kept, kept)] = self.similarity[
+            np.ix_(previous_positions[kept], previous_positions[kept])]
+
+        self.activity_df = activity_df
+        self.client_ids = activity_df.index
+        self.unit_rows = _unit_rows(activity_df.to_numpy(np.float64))
+        self.similarity = similarity
+        changed_rows = np.flatnonzero(is_changed)
+        self._compute_rows(changed_rows)
+        return list(self.client_ids[changed_rows])
+
+    def similarity_df(self) -> pd.DataFrame:
+        """
+        Full client x client similarity matrix as a DataFrame.
+        """
+        return pd.DataFrame(
+            self.similarity, index=self.client_ids, columns=self.client_ids)
+
+    def top_k_similar(self, client_id: str, k: int = 5) -> pd.DataFrame:
+        """
+        The k clients most similar to client_id, most similar first.
+        """
+        position = self.client_ids.get_loc(client_id)
+        scores = self.similarity[position].astype(np.float64)
+        scores[position] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return pd.DataFrame(columns=["client_id", "similarity"])
+
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return pd.DataFrame(
+            {
+                "client_id": self.client_ids[candidates],
+                "similarity": scores[candidates],
+            }
+        )
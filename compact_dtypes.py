@@ -0,0 +1,111 @@
+import pandas as pd
+
+
+# float32 keeps ~7 significant digits: NAV, AUM and daily revenue computed
+# from float32 NAV match the float64 results within this relative
+# tolerance, net_flow and market_movement within it times the row's AUM
+# (they are differences of AUM sized values). Holdings stay float64:
+# share counts exceed the float32 exact integer range (2**24).
+COMPACT_FLOAT_RTOL = 1e-6
+
+VINTAGE_COLUMNS = ["quarter_date", "start_date", "end_date"]
+# Analytics columns of share counts, kept float64
+SHARE_COUNT_COLUMNS = ["holdings", "share_change"]
+
+
+def frame_memory_bytes(input_df: pd.DataFrame) -> int:
+    return int(input_df.memory_usage(index=True, deep=True).sum())
+
+
+def report_memory_saved(
+        frame_name: str,
+        input_df: pd.DataFrame,
+        compact_df: pd.DataFrame) -> dict:
+    """
+    Prints and returns the memory used by a frame before
+    and after compaction.
+    """
+    before_bytes = frame_memory_bytes(input_df)
+    after_bytes = frame_memory_bytes(compact_df)
+    saved_ratio = 1 - after_bytes / before_bytes if before_bytes else 0.0
+    print(
+        f"compact dtypes | {frame_name} | {before_bytes / 1024:.1f} KB -> "
+        f"{after_bytes / 1024:.1f} KB ({saved_ratio:.0%} saved)"
+    )
+    return {
+        "frame": frame_name,
+        "before_bytes": before_bytes,
+        "after_bytes": after_bytes,
+    }
+
+
+def compact_holdings(input_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact representation of the holdings table:
+    1. client_id as categorical, product_id as int32
+    2. quarter_date, start_date and end_date as categoricals sharing one
+    table of quarter vintages: each row stores a 1 byte vintage id
+    instead of three 8 byte timestamps (end_date NULL stays missing).
+    """
+    holdings_df = input_df.copy()
+    holdings_df["client_id"] = holdings_df["client_id"].astype("category")
+    holdings_df["product_id"] = holdings_df["product_id"].astype("int32")
+
+    vintages = pd.DatetimeIndex(
+        pd.concat([holdings_df[column] for column in VINTAGE_COLUMNS])
+        .dropna()
+        .unique()
+    ).sort_values()
+    vintage_dtype = pd.CategoricalDtype(vintages, ordered=True)
+    for column in VINTAGE_COLUMNS:
+        holdings_df[column] = holdings_df[column].astype(vintage_dtype)
+
+    return holdings_df
+
+
+def restore_holdings_dtypes(input_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts a compact holdings table back to the standard dtypes.
+    Standard tables are returned unchanged.
+    """
+    if not isinstance(input_df["quarter_date"].dtype, pd.CategoricalDtype):
+        return input_df
+
+    holdings_df = input_df.copy()
+    holdings_df["client_id"] = holdings_df["client_id"].astype(str)
+    holdings_df["product_id"] = holdings_df["product_id"].astype("int64")
+    for column in VINTAGE_COLUMNS:
+        holdings_df[column] = holdings_df[column].astype(
+            holdings_df[column].cat.categories.dtype)
+    return holdings_df
+
+
+def compact_nav(input_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact NAV table: product_id as int32, net_asset_value as float32.
+    """
+    nav_df = input_df.copy()
+    nav_df["product_id"] = nav_df["product_id"].astype("int32")
+    nav_df["net_asset_value"] = nav_df["net_asset_value"].astype("float32")
+    nav_df["is_nav_backfilled"] = nav_df["is_nav_backfilled"].astype(bool)
+    return nav_df
+
+
+def compact_analytics(input_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact monthly analytics table:
+    1. client_id as categorical and product_id as int32
+    2. NAV, AUM, revenue, flow and rolling window values as float32,
+    within COMPACT_FLOAT_RTOL of the float64 results. Share counts
+    (SHARE_COUNT_COLUMNS) stay float64.
+    """
+    analytics_df = input_df.copy()
+    analytics_df["client_id"] = analytics_df["client_id"].astype("category")
+    analytics_df["product_id"] = analytics_df["product_id"].astype("int32")
+    value_columns = [
+        column for column in analytics_df.columns
+        if analytics_df[column].dtype == "float64"
+        and column not in SHARE_COUNT_COLUMNS
+    ]
+    analytics_df[value_columns] = analytics_df[value_columns].astype("float32")
+    return analytics_df
@@ -14,3 +14,98 @@ HOLDINGS_OUTPUT_FILE_PATH = os.getenv(
     "HOLDINGS_OUTPUT_FILE_PATH", "./outputs/holdings_output.xlsx")
 NAV_OUTPUT_FILE_PATH = os.getenv(
     "NAV_OUTPUT_FILE_PATH", "./outputs/nav_output.xlsx")
+
+# Number of processes used to parse client holdings sheets
+HOLDINGS_LOAD_WORKERS = int(os.getenv(
+    "HOLDINGS_LOAD_WORKERS", os.cpu_count() or 1))
+
+# Directory or glob of quarterly client workbooks (one per distributor
+# report); empty reads the client sheets of EXCEL_FILE_PATH
+HOLDINGS_WORKBOOKS_PATH = os.getenv("HOLDINGS_WORKBOOKS_PATH", "")
+
+# On-disk Parquet cache of parsed workbook sheets (requires pyarrow)
+SHEET_CACHE_ENABLED = os.getenv("SHEET_CACHE_ENABLED", "1") == "1"
+SHEET_CACHE_DIR = os.getenv("SHEET_CACHE_DIR", "./.cache/sheets")
+SHEET_CACHE_MAX_MB = int(os.getenv("SHEET_CACHE_MAX_MB", "512"))
+
+# SQLite store of the rolling (versioned) holdings table
+HOLDINGS_STORE_PATH = os.getenv(
+    "HOLDINGS_STORE_PATH", "./outputs/holdings_store.sqlite")
+
+# Streaming extraction: read NAV and client sheets in chunks of rows
+# with openpyxl read-only mode to bound peak memory
+STREAMING_READ_ENABLED = os.getenv("STREAMING_READ_ENABLED", "0") == "1"
+STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "50000"))
+
+# Output formats written for each output path (comma separated):
+# excel, parquet, arrow (uncompressed Arrow IPC) and csv
+OUTPUT_FORMATS = [
+    output_format.strip()
+    for output_format in os.getenv("OUTPUT_FORMATS", "excel").split(",")
+    if output_format.strip()
+]
+OUTPUT_WRITE_WORKERS = int(os.getenv("OUTPUT_WRITE_WORKERS", "4"))
+
+# Per-stage instrumentation: wall/CPU time, rows, peak memory and
+# sheet load times written as a JSON run report
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "0") == "1"
+INSTRUMENTATION_TRACE_MEMORY = os.getenv(
+    "INSTRUMENTATION_TRACE_MEMORY", "1") == "1"
+INSTRUMENTATION_PROFILE = os.getenv("INSTRUMENTATION_PROFILE", "0") == "1"
+INSTRUMENTATION_REPORT_PATH = os.getenv(
+    "INSTRUMENTATION_REPORT_PATH", "./outputs/run_report.json")
+INSTRUMENTATION_PROFILE_PATH = os.getenv(
+    "INSTRUMENTATION_PROFILE_PATH", "./outputs/slowest_stage.prof")
+
+# Threads used to run independent pipeline stages concurrently
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+
+# Store holdings, NAV and analytics with compact dtypes (categoricals,
+# int32 ids, float32 NAV and analytics values; holdings stay float64)
+# to cut memory
+COMPACT_DTYPES_ENABLED = os.getenv("COMPACT_DTYPES_ENABLED", "0") == "1"
+
+# NAV table returned by extract_nav(): "dense" (every calendar day per
+# product, backfilled) or "sparse" (observed prices only)
+NAV_ACCESS_MODE = os.getenv("NAV_ACCESS_MODE", "dense")
+
+# Corporate actions table (splits, reverse splits, fee changes)
+CORPORATE_ACTIONS_FILE_PATH = os.getenv(
+    "CORPORATE_ACTIONS_FILE_PATH", "./corporate_actions.csv")
+# Share units of holdings and NAV after split adjustments:
+# "current" (holdings restated to the units in effect at each month,
+# NAV as published) or "original" (NAV restated to the units clients
+# report in, holdings as reported)
+CORPORATE_ACTIONS_SHARE_BASIS = os.getenv(
+    "CORPORATE_ACTIONS_SHARE_BASIS", "current")
+
+# In-process query layer over the published run (analytics_query.py)
+# and its optional local HTTP endpoint, started by main.py after a run
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+QUERY_SERVER_ENABLED = os.getenv("QUERY_SERVER_ENABLED", "0") == "1"
+QUERY_SERVER_HOST = os.getenv("QUERY_SERVER_HOST", "127.0.0.1")
+QUERY_SERVER_PORT = int(os.getenv("QUERY_SERVER_PORT", "8765"))
+
+# Data quality rules (quality_rules.py) run as pipeline stages and
+# written as a JSON report with counts and sample keys per rule
+QUALITY_CHECKS_ENABLED = os.getenv("QUALITY_CHECKS_ENABLED", "1") == "1"
+QUALITY_REPORT_PATH = os.getenv(
+    "QUALITY_REPORT_PATH", "./outputs/data_quality_report.json")
+
+# Execution backend of the fill and analytics transform stages:
+# "pandas" or "duckdb" (SQL in embedded DuckDB, requires duckdb and
+# pyarrow; spills to DUCKDB_TEMP_DIRECTORY above DUCKDB_MEMORY_LIMIT)
+TRANSFORM_BACKEND = os.getenv("TRANSFORM_BACKEND", "pandas")
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", os.cpu_count() or 1))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")
+DUCKDB_TEMP_DIRECTORY = os.getenv(
+    "DUCKDB_TEMP_DIRECTORY", "./.cache/duckdb")
+
+# Checkpoints of stage results (stage_checkpoints.py, requires pyarrow),
+# keyed by the fingerprint of each stage's inputs and the code version:
+# a rerun restores unchanged stages and resumes from the first stale or
+# failed one; least recently used checkpoints are removed above
+# CHECKPOINT_MAX_MB
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "1") == "1"
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "./.cache/checkpoints")
+CHECKPOINT_MAX_MB = int(os.getenv("CHECKPOINT_MAX_MB", "1024"))
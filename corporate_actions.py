@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+ACTION_COLUMNS = [
+    "product_id",
+    "action_type",
+    "effective_date",
+    "ratio",
+    "expense_ratio",
+]
+# Action type -> share factor from the action's ratio:
+# split "3" means 3 new shares per old share, reverse split "10" means
+# 1 new share per 10 old shares
+SHARE_ACTIONS = {
+    "split": lambda ratio: ratio,
+    "reverse_split": lambda ratio: 1 / ratio,
+}
+FEE_ACTIONS = ["fee_change"]
+
+
+def read_corporate_actions(file_path: str) -> pd.DataFrame:
+    """
+    Reads the corporate actions table (CSV with ACTION_COLUMNS).
+    A missing file is an empty table.
+    """
+    if not os.path.exists(file_path):
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+    return pd.read_csv(file_path, parse_dates=["effective_date"])
+
+
+class CorporateActions:
+    """
+    Splits, reverse splits and fee changes per product, effective from
+    their effective_date.
+    Share actions become one cumulative share factor per product and
+    effective date (product of the factors of all actions effective on
+    or before it). The factor of any (product_id, date) is found with
+    one searchsorted over (product, day) keys, so adjusting a table is
+    a single vectorized as-of join whatever the number of actions.
+    """
+
+    def __init__(self, actions_df: pd.DataFrame):
+        actions_df = actions_df.reindex(columns=ACTION_COLUMNS)
+        actions_df["action_type"] = actions_df["action_type"].str.strip(
+        ).str.lower()
+        actions_df["effective_date"] = pd.to_datetime(
+            actions_df["effective_date"])
+        unknown_types = set(actions_df["action_type"].dropna()) - (
+            set(SHARE_ACTIONS) | set(FEE_ACTIONS))
+        if unknown_types:
+            raise ValueError(
+                f"Unknown corporate action types: {sorted(unknown_types)}")
+
+        self.fee_changes_df = actions_df[
+            actions_df["action_type"].isin(FEE_ACTIONS)
+        ][["product_id", "effective_date", "expense_ratio"]].dropna()
+
+        share_df = actions_df[
+            actions_df["action_type"].isin(list(SHARE_ACTIONS))
+        ].dropna(subset=["product_id", "effective_date", "ratio"])
+        share_df = share_df.assign(
+            share_factor=[
+                SHARE_ACTIONS[action_type](ratio)
+                for action_type, ratio in zip(
+                    share_df["action_type"], share_df["ratio"].astype(float))
+            ]
+        )
+        # Actions of the same day combine into one factor
+        share_df = share_df.groupby(
+            ["product_id", "effective_date"], as_index=False
+        )["share_factor"].prod()
+
+        self.product_ids = pd.Index(share_df["product_id"].unique())
+        self.codes = self.product_ids.get_indexer(share_df["product_id"])
+        self.days = _day_numbers(share_df["effective_date"])
+        # share_df is sorted by product and date: cumulative factors
+        self.cumulative_factors = share_df.groupby(
+            "product_id")["share_factor"].cumprod().to_numpy(np.float64)
+
+    def __len__(self) -> int:
+        return len(self.days) + len(self.fee_changes_df)
+
+    def share_factors(self, product_ids, dates) -> np.ndarray:
+        """
+        Cumulative share factor of each (product_id, date): 1 before
+        the product's first share action and for products without one.
+        """
+        row_codes = self.product_ids.get_indexer(np.asarray(product_ids))
+        row_days = _day_numbers(dates)
+        factors = np.ones(len(row_codes), dtype=np.float64)
+        if not len(self.days) or not len(row_codes):
+            return factors
+
+        first_day = min(self.days.min(), row_days.min())
+        key_span = max(self.days.max(), row_days.max()) - first_day + 1
+        action_keys = self.codes * key_span + (self.days - first_day)
+        row_keys = row_codes * key_span + (row_days - first_day)
+        # Last action of the product effective on or before the date
+        positions = np.searchsorted(action_keys, row_keys, side="right") - 1
+        is_adjusted = (row_codes >= 0) & (positions >= 0)
+        is_adjusted[is_adjusted] &= (
+            self.codes[positions[is_adjusted]] == row_codes[is_adjusted])
+        factors[is_adjusted] = self.cumulative_factors[positions[is_adjusted]]
+        return factors
+
+    def adjust_shares(
+            self,
+            input_df: pd.DataFrame,
+            date_column: str,
+            value_column: str,
+            inverse: bool = False) -> pd.DataFrame:
+        """
+        Multiplies value_column by the share factor as of date_column
+        (divides with inverse=True, to undo the adjustment).
+        """
+        output_df = input_df.copy()
+        if not len(self.days):
+            return output_df
+        factors = self.share_factors(
+            output_df["product_id"], output_df[date_column])
+        if inverse:
+            factors = 1 / factors
+        output_df[value_column] = (
+            output_df[value_column].astype("float64") * factors)
+        return output_df
+
+    def fee_changes(self) -> pd.DataFrame:
+        """
+        Fee changes as expense ratio rows (product_id, expense_ratio,
+        last_modified_date), like the WT Expense Ratios sheet.
+        """
+        return self.fee_changes_df.rename(
+            columns={"effective_date": "last_modified_date"}
+        ).astype({"product_id": int})[
+            ["product_id", "expense_ratio", "last_modified_date"]]
+
+
+def _day_numbers(dates) -> np.ndarray:
+    return pd.DatetimeIndex(dates).to_numpy("datetime64[D]").astype(np.int64)
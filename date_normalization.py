@@ -0,0 +1,111 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Three numeric parts split by one consistent separator ("/" or "-")
+DATE_PARTS_PATTERN = r"^(\d{1,4})([/-])(\d{1,2})\2(\d{1,4})$"
+
+
+def _split_date_parts(input_series: pd.Series) -> pd.DataFrame:
+    """
+    Splits a column of date strings into three numeric parts
+    and the separator used.
+    Values without three numeric parts and a single separator
+    are returned as NaN.
+    """
+    parts_df = input_series.astype("string").str.extract(DATE_PARTS_PATTERN)
+    parts_df.columns = ["first", "separator", "middle", "last"]
+
+    for column in ["first", "middle", "last"]:
+        parts_df[column] = pd.to_numeric(
+            parts_df[column], errors="coerce").astype("float64")
+
+    return parts_df
+
+
+def _assemble_dates(
+    years: pd.Series, months: pd.Series, days: pd.Series
+) -> pd.Series:
+    """
+    Builds datetimes from year, month and day columns.
+    Missing parts and invalid combinations (e.g. month 13,
+    31st of February) become NaT.
+    """
+    # Out of range parts would otherwise overflow into the next field
+    months = months.where(months.between(1, 12))
+    days = days.where(days.between(1, 31))
+
+    return pd.to_datetime(
+        pd.DataFrame({"year": years, "month": months, "day": days}),
+        errors="coerce",
+    )
+
+
+def _keep_datetime_values(
+    input_series: pd.Series, output_dates: pd.Series
+) -> pd.Series:
+    """
+    Values that are already datetimes (e.g. Excel date cells)
+    are kept as they are instead of being re-parsed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(input_series):
+        return input_series
+
+    if input_series.dtype == object:
+        is_datetime = input_series.map(
+            lambda value: isinstance(value, (datetime.date, np.datetime64))
+        )
+        if is_datetime.any():
+            output_dates = output_dates.where(
+                ~is_datetime,
+                pd.to_datetime(input_series.where(is_datetime),
+                               errors="coerce"),
+            )
+
+    return output_dates
+
+
+def normalize_nav_dates(input_series: pd.Series) -> pd.Series:
+    """
+    Columnar version of the per-row nav_format_and_convert_date()
+    (benchmarks/bench_date_normalization.py).
+    1. Splits day-month-year / month-day-year strings on "/" or "-"
+    2. Rows where the first part is > 12 are read as day-first,
+    every other row as month-first
+    3. Unparseable values are returned as NaT.
+    """
+    parts_df = _split_date_parts(input_series)
+
+    is_day_first = parts_df["first"] > 12
+    months = parts_df["first"].where(~is_day_first, parts_df["middle"])
+    days = parts_df["middle"].where(~is_day_first, parts_df["first"])
+
+    output_dates = _assemble_dates(parts_df["last"], months, days)
+    return _keep_datetime_values(input_series, output_dates)
+
+
+def normalize_holdings_dates(input_series: pd.Series) -> pd.Series:
+    """
+    Columnar version of the per-row holdings_format_and_convert_date()
+    (benchmarks/bench_date_normalization.py).
+    1. Splits year-month-day / year-day-month strings on "/" or "-"
+    2. Rows where the middle part is > 12 are read as year-day-month,
+    every other row as year-month-day
+    3. Unparseable values are returned as NaT.
+    """
+    parts_df = _split_date_parts(input_series)
+
+    is_day_middle = parts_df["middle"] > 12
+    months = parts_df["middle"].where(~is_day_middle, parts_df["last"])
+    days = parts_df["last"].where(~is_day_middle, parts_df["middle"])
+
+    # Year-month-day values keep their original format,
+    # which only parses with the "-" separator
+    is_dash_separated = parts_df["separator"].eq("-").fillna(False)
+    months = months.where(is_day_middle | is_dash_separated.astype(bool))
+
+    output_dates = _assemble_dates(parts_df["first"], months, days)
+    return _keep_datetime_values(input_series, output_dates)
+
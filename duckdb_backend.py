@@ -0,0 +1,493 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from revenue_accrual import ACCRUAL_DAYS_PER_YEAR
+from window_engine import ROLLING_WINDOWS, WINDOW_MEASURES, window_columns
+
+
+# Input order of rows, used to break ties as the pandas stages do
+POSITION_COLUMN = "_row_position"
+
+ANALYTICS_COLUMNS = [
+    "client_id",
+    "product_id",
+    "month_date",
+    "is_holdings_backfilled",
+    "holdings",
+    "is_nav_backfilled",
+    "net_asset_value",
+    "assets_under_management",
+    "is_expense_ratios_backfilled",
+    "daily_revenue",
+    "accrued_revenue",
+    "share_change",
+    "net_flow",
+    "market_movement",
+] + window_columns(WINDOW_MEASURES)
+
+
+def duckdb_available() -> bool:
+    """
+    The SQL backend needs the optional duckdb and pyarrow dependencies.
+    """
+    return all(
+        importlib.util.find_spec(module) is not None
+        for module in ["duckdb", "pyarrow"])
+
+
+def _with_positions(input_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame with its row positions, registered as is: DuckDB scans the
+    NumPy columns of a pandas frame in place. Under copy-on-write only
+    the position column is new, the other columns are shared with
+    input_df.
+    """
+    return input_df.assign(**{POSITION_COLUMN: np.arange(len(input_df))})
+
+
+def _nav_as_of_sql(requests: str, date_column: str) -> str:
+    """
+    SELECT resolving the NAV of each (product_id, <date_column>) row of
+    the requests relation like NavAsOfTable.as_of(): next observed price
+    (backfill), else the product's last price (forward fill), only for
+    dates of the NAV calendar and known products.
+    Needs the nav_observed, nav_last and nav_calendar relations.
+    """
+    return f"""
+        SELECT
+            requests.*,
+            COALESCE(next_nav.net_asset_value, nav_last.net_asset_value)
+                AS net_asset_value,
+            CASE WHEN next_nav.market_date = requests.{date_column}
+                THEN next_nav.is_nav_backfilled ELSE TRUE END
+                AS is_nav_backfilled
+        FROM {requests} AS requests
+        ASOF LEFT JOIN nav_observed AS next_nav
+            ON requests.product_id = next_nav.product_id
+            AND requests.{date_column} <= next_nav.market_date
+        LEFT JOIN nav_last ON requests.product_id = nav_last.product_id
+        WHERE requests.{date_column} BETWEEN
+            (SELECT calendar_start FROM nav_calendar)
+            AND (SELECT calendar_end FROM nav_calendar)
+        AND requests.product_id IN (SELECT product_id FROM nav_products)
+    """
+
+
+class DuckDBBackend:
+    """
+    SQL execution backend of the transform stages in embedded DuckDB,
+    selected with TRANSFORM_BACKEND=duckdb:
+    1. Input frames are registered as pandas frames (scanned in place)
+    2. Fills and flows are window functions, NAV and expense ratios
+    are resolved with as-of joins
+    3. Queries run on threads cores and spill to temp_directory above
+    memory_limit, so inputs larger than memory can be processed.
+    Each call runs on its own cursor, so stages can run concurrently.
+    Results match the pandas stages; sums over months and windows may
+    differ in the last bits (different summation order).
+    """
+
+    def __init__(
+            self,
+            threads: int = None,
+            memory_limit: str = None,
+            temp_directory: str = None):
+        import duckdb
+
+        # Frame scans have no row estimates: always use the sort-merge
+        # as-of join, never the nested loop planned for small inputs
+        config = {"asof_loop_join_threshold": 0}
+        if threads:
+            config["threads"] = threads
+        if memory_limit:
+            config["memory_limit"] = memory_limit
+        if temp_directory:
+            os.makedirs(temp_directory, exist_ok=True)
+            config["temp_directory"] = temp_directory
+        self.connection = duckdb.connect(config=config)
+
+    def _query(self, sql: str, tables: dict) -> pd.DataFrame:
+        cursor = self.connection.cursor()
+        try:
+            for table_name, table_df in tables.items():
+                cursor.register(table_name, _with_positions(table_df))
+            return cursor.execute(sql).df()
+        finally:
+            cursor.close()
+
+    def fill_missing_nav_dates(self, nav_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Dense daily NAV calendar, same as
+        WisdomTreeDataPipeline.fill_missing_nav_dates(): every product x
+        day from January 1 of the first year to December 31 of the last
+        year, backward then forward filled within each product.
+        """
+        return self._query(
+            """
+            WITH nav_dated AS (
+                SELECT * FROM nav WHERE market_date IS NOT NULL
+            ),
+            products AS (
+                SELECT product_id, MIN(_row_position) AS product_position
+                FROM nav_dated GROUP BY product_id
+            ),
+            calendar AS (
+                SELECT UNNEST(generate_series(
+                    make_date(year(MIN(market_date)), 1, 1),
+                    make_date(year(MAX(market_date)), 12, 31),
+                    INTERVAL 1 DAY))::TIMESTAMP AS market_date
+                FROM nav_dated
+            ),
+            observed AS (
+                SELECT product_id, market_date, net_asset_value
+                FROM nav_dated
+                QUALIFY row_number() OVER (
+                    PARTITION BY product_id, market_date
+                    ORDER BY _row_position DESC) = 1
+            ),
+            dense AS (
+                SELECT
+                    products.product_id,
+                    products.product_position,
+                    calendar.market_date,
+                    observed.net_asset_value
+                FROM products CROSS JOIN calendar
+                LEFT JOIN observed
+                    ON observed.product_id = products.product_id
+                    AND observed.market_date = calendar.market_date
+            )
+            SELECT
+                product_id,
+                market_date,
+                COALESCE(
+                    net_asset_value,
+                    first_value(net_asset_value IGNORE NULLS) OVER (
+                        PARTITION BY product_id ORDER BY market_date
+                        ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING),
+                    last_value(net_asset_value IGNORE NULLS) OVER (
+                        PARTITION BY product_id ORDER BY market_date
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                ) AS net_asset_value,
+                net_asset_value IS NULL AS is_nav_backfilled
+            FROM dense
+            ORDER BY market_date, product_position
+            """,
+            {"nav": nav_df[["product_id", "market_date", "net_asset_value"]]},
+        )
+
+    def adjust_expense_ratio(
+            self,
+            expense_df: pd.DataFrame,
+            nav_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Monthly expense ratios, same as
+        WisdomTreeDataPipeline.adjust_expense_ratio(): every product x
+        month end of the NAV years, backward then forward filled within
+        each product.
+        """
+        return self._query(
+            """
+            WITH products AS (
+                SELECT product_id, MIN(_row_position) AS product_position
+                FROM expense GROUP BY product_id
+            ),
+            calendar AS (
+                SELECT last_day(UNNEST(generate_series(
+                    make_date(year(MIN(market_date)), 1, 1),
+                    make_date(year(MAX(market_date)), 12, 1),
+                    INTERVAL 1 MONTH)))::TIMESTAMP AS last_modified_date
+                FROM nav
+            ),
+            monthly AS (
+                SELECT
+                    products.product_id,
+                    products.product_position,
+                    calendar.last_modified_date,
+                    expense.expense_ratio
+                FROM products CROSS JOIN calendar
+                LEFT JOIN expense
+                    ON expense.product_id = products.product_id
+                    AND expense.last_modified_date
+                        = calendar.last_modified_date
+            )
+            SELECT
+                product_id,
+                last_modified_date,
+                COALESCE(
+                    expense_ratio,
+                    first_value(expense_ratio IGNORE NULLS) OVER (
+                        PARTITION BY product_id ORDER BY last_modified_date
+                        ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING),
+                    last_value(expense_ratio IGNORE NULLS) OVER (
+                        PARTITION BY product_id ORDER BY last_modified_date
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                ) AS expense_ratio,
+                expense_ratio IS NULL AS is_expense_ratios_backfilled
+            FROM monthly
+            ORDER BY last_modified_date, product_position
+            """,
+            {
+                "expense": expense_df[
+                    ["product_id", "expense_ratio", "last_modified_date"]],
+                "nav": nav_df[["market_date"]],
+            },
+        )
+
+    def fill_zero_holdings(self, holdings_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same as WisdomTreeDataPipeline.fill_zero_holdings(): holdings == 0
+        take the previous quarter's reported value of the same month,
+        then the last value of the (client, product) in quarter order.
+        """
+        holdings_df = holdings_df.drop(
+            columns=["is_holdings_backfilled"], errors="ignore")
+        # Scanned columns are typed: blank and non-numeric cells become 0
+        # before registering
+        holdings_df["holdings"] = (
+            pd.to_numeric(holdings_df["holdings"], errors="coerce")
+            .astype("float64")
+            .fillna(0)
+        )
+        other_columns = ", ".join(
+            f'"{column}"' for column in holdings_df.columns
+            if column != "holdings")
+        return self._query(
+            f"""
+            WITH ordered AS (
+                SELECT
+                    *,
+                    holdings = 0 AS is_holdings_backfilled,
+                    CASE WHEN month_date IS NOT NULL THEN lag(holdings) OVER (
+                        PARTITION BY client_id, product_id, month_date
+                        ORDER BY quarter_date, _row_position)
+                    END AS previous_quarter_holdings
+                FROM holdings
+            ),
+            substituted AS (
+                SELECT
+                    *,
+                    CASE WHEN NOT is_holdings_backfilled THEN holdings
+                        ELSE previous_quarter_holdings END AS filled_holdings
+                FROM ordered
+            )
+            SELECT
+                {other_columns},
+                COALESCE(
+                    filled_holdings,
+                    last_value(filled_holdings IGNORE NULLS) OVER (
+                        PARTITION BY client_id, product_id
+                        ORDER BY quarter_date, _row_position
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                ) AS holdings,
+                is_holdings_backfilled
+            FROM substituted
+            ORDER BY client_id, product_id, quarter_date, _row_position
+            """,
+            {"holdings": holdings_df},
+        )[list(holdings_df.columns) + ["is_holdings_backfilled"]]
+
+    def transform_monthly_analytics(
+            self,
+            expense_df: pd.DataFrame,
+            holdings_df: pd.DataFrame,
+            nav_df: pd.DataFrame,
+            expense_ratios_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same as WisdomTreeDataPipeline.transform_monthly_analytics() on
+        the latest holdings (end_date NULL):
+        1. Month end NAV as of the date, expense ratio of the month
+        2. AUM, daily revenue and revenue accrued over the business days
+        of the month with the effective expense ratios
+        (expense_ratios_df, see ExpenseRatioIntervals.expense_df)
+        3. Share change, net flow and market movement from the previous
+        month of each (client, product) series, trailing windows.
+        """
+        window_sql = []
+        for measure in WINDOW_MEASURES:
+            for window in ROLLING_WINDOWS:
+                frame = (
+                    f"series_months RANGE BETWEEN {window - 1} PRECEDING "
+                    "AND CURRENT ROW")
+                window_sql.append(
+                    f"CASE WHEN COUNT({measure}) OVER ({frame}) >= {window} "
+                    f"THEN SUM({measure}) OVER ({frame}) END "
+                    f"AS {measure}_{window}m")
+            window_sql.append(
+                f"CASE WHEN COUNT({measure}) OVER year_to_date >= 1 "
+                f"THEN SUM({measure}) OVER year_to_date END "
+                f"AS {measure}_ytd")
+
+        analytics_df = self._query(
+            f"""
+            WITH latest AS (
+                SELECT
+                    client_id, product_id, month_date, is_holdings_backfilled,
+                    holdings::DOUBLE AS holdings, _row_position
+                FROM holdings WHERE end_date IS NULL
+            ),
+            nav_dated AS (
+                SELECT * FROM nav WHERE market_date IS NOT NULL
+            ),
+            nav_calendar AS (
+                SELECT
+                    make_date(year(MIN(market_date)), 1, 1)::TIMESTAMP
+                        AS calendar_start,
+                    make_date(year(MAX(market_date)), 12, 31)::TIMESTAMP
+                        AS calendar_end
+                FROM nav_dated
+            ),
+            nav_products AS (
+                SELECT DISTINCT product_id FROM nav_dated
+            ),
+            nav_observed AS (
+                SELECT
+                    product_id, market_date,
+                    net_asset_value::DOUBLE AS net_asset_value,
+                    COALESCE(is_nav_backfilled, FALSE) AS is_nav_backfilled
+                FROM nav_dated WHERE net_asset_value IS NOT NULL
+                QUALIFY row_number() OVER (
+                    PARTITION BY product_id, market_date
+                    ORDER BY _row_position DESC) = 1
+            ),
+            nav_last AS (
+                SELECT product_id, arg_max(net_asset_value, market_date)
+                    AS net_asset_value
+                FROM nav_observed GROUP BY product_id
+            ),
+            month_nav AS (
+                {_nav_as_of_sql(
+                    "(SELECT DISTINCT product_id, month_date FROM latest)",
+                    "month_date")}
+            ),
+            days AS (
+                SELECT UNNEST(generate_series(
+                    CASE WHEN day(MIN(month_date)) = 1
+                        THEN MIN(month_date) - INTERVAL 1 MONTH
+                        ELSE date_trunc('month', MIN(month_date)) END,
+                    MAX(month_date),
+                    INTERVAL 1 DAY))::TIMESTAMP AS market_date
+                FROM latest
+            ),
+            day_requests AS (
+                SELECT products.product_id, days.market_date
+                FROM (SELECT DISTINCT product_id FROM latest) AS products
+                CROSS JOIN days
+                WHERE isodow(days.market_date) <= 5
+            ),
+            day_nav AS (
+                {_nav_as_of_sql("day_requests", "market_date")}
+            ),
+            first_ratios AS (
+                SELECT product_id, arg_min(expense_ratio, last_modified_date)
+                    AS expense_ratio
+                FROM expense_ratios GROUP BY product_id
+            ),
+            day_rates AS (
+                SELECT
+                    day_requests.product_id,
+                    day_requests.market_date,
+                    day_nav.net_asset_value
+                        * COALESCE(effective.expense_ratio,
+                                   first_ratios.expense_ratio)
+                        / {ACCRUAL_DAYS_PER_YEAR} AS accrual_per_share
+                FROM day_requests
+                LEFT JOIN day_nav USING (product_id, market_date)
+                ASOF LEFT JOIN expense_ratios AS effective
+                    ON day_requests.product_id = effective.product_id
+                    AND day_requests.market_date >= effective.last_modified_date
+                LEFT JOIN first_ratios
+                    ON first_ratios.product_id = day_requests.product_id
+            ),
+            month_rates AS (
+                SELECT
+                    product_id,
+                    date_trunc('month', market_date) AS month_start,
+                    SUM(accrual_per_share) AS month_accrual,
+                    COUNT(*) = COUNT(accrual_per_share) AS is_complete
+                FROM day_rates GROUP BY ALL
+            ),
+            joined AS (
+                SELECT
+                    latest.client_id,
+                    latest.product_id,
+                    latest.month_date,
+                    latest.is_holdings_backfilled,
+                    latest.holdings,
+                    month_nav.is_nav_backfilled,
+                    month_nav.net_asset_value::DOUBLE AS net_asset_value,
+                    latest.holdings * month_nav.net_asset_value
+                        AS assets_under_management,
+                    expense.is_expense_ratios_backfilled,
+                    latest.holdings * month_nav.net_asset_value
+                        * (expense.expense_ratio / {ACCRUAL_DAYS_PER_YEAR})
+                        AS daily_revenue,
+                    CASE WHEN month_rates.is_complete
+                        THEN latest.holdings * month_rates.month_accrual
+                    END AS accrued_revenue,
+                    year(latest.month_date) * 12 + month(latest.month_date)
+                        AS month_number,
+                    latest._row_position
+                FROM latest
+                LEFT JOIN month_nav USING (product_id, month_date)
+                LEFT JOIN expense
+                    ON expense.product_id = latest.product_id
+                    AND expense.last_modified_date = latest.month_date
+                LEFT JOIN month_rates
+                    ON month_rates.product_id = latest.product_id
+                    AND month_rates.month_start
+                        = date_trunc('month', latest.month_date)
+            ),
+            flows AS (
+                SELECT
+                    *,
+                    CASE WHEN lag(month_number) OVER series = month_number - 1
+                        THEN holdings - lag(holdings) OVER series
+                    END AS share_change,
+                    CASE WHEN lag(month_number) OVER series = month_number - 1
+                        THEN assets_under_management
+                            - lag(assets_under_management) OVER series
+                    END AS aum_change
+                FROM joined
+                WINDOW series AS (
+                    PARTITION BY client_id, product_id
+                    ORDER BY month_date, _row_position)
+            ),
+            measures AS (
+                SELECT
+                    *,
+                    share_change * net_asset_value AS net_flow,
+                    aum_change - share_change * net_asset_value
+                        AS market_movement
+                FROM flows
+            )
+            SELECT
+                *,
+                {", ".join(window_sql)}
+            FROM measures
+            WINDOW
+                series_months AS (
+                    PARTITION BY client_id, product_id ORDER BY month_number),
+                year_to_date AS (
+                    PARTITION BY client_id, product_id, year(month_date)
+                    ORDER BY month_date, _row_position
+                    ROWS UNBOUNDED PRECEDING)
+            ORDER BY client_id, product_id, month_date, _row_position
+            """,
+            {
+                "holdings": holdings_df[
+                    ["client_id", "product_id", "month_date", "holdings",
+                     "end_date", "is_holdings_backfilled"]],
+                "nav": nav_df.reindex(columns=[
+                    "product_id", "market_date", "net_asset_value",
+                    "is_nav_backfilled"]),
+                "expense": expense_df[
+                    ["product_id", "last_modified_date", "expense_ratio",
+                     "is_expense_ratios_backfilled"]],
+                "expense_ratios": expense_ratios_df[
+                    ["product_id", "expense_ratio", "last_modified_date"]],
+            },
+        )
+        return analytics_df[ANALYTICS_COLUMNS]
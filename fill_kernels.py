@@ -0,0 +1,140 @@
+import functools
+import importlib.util
+
+import numpy as np
+
+# Fills of fewer rows run the vectorized NumPy kernel: loading the
+# compiled numba kernel costs more than it saves on small tables
+JIT_MIN_ROWS = 1_000_000
+
+
+def numba_available() -> bool:
+    """
+    JIT compilation of the fill kernel needs the optional numba dependency.
+    """
+    return importlib.util.find_spec("numba") is not None
+
+
+def group_start_mask(*sorted_keys) -> np.ndarray:
+    """
+    True on the first row of each group of rows sorted by sorted_keys
+    (arrays of the same length, one per key column).
+    """
+    row_count = len(sorted_keys[0])
+    starts = np.zeros(row_count, dtype=bool)
+    if row_count:
+        starts[0] = True
+    for key in sorted_keys:
+        key = np.asarray(key)
+        starts[1:] |= key[1:] != key[:-1]
+    return starts
+
+
+def previous_positions(group_codes: np.ndarray) -> np.ndarray:
+    """
+    Position of the previous row of the same group in the current
+    row order, -1 for the first row of a group and for rows without
+    a group (code -1). Same rows as groupby().shift(1).
+    """
+    group_codes = np.asarray(group_codes)
+    order = np.argsort(group_codes, kind="stable")
+    previous = np.full(len(group_codes), -1, dtype=np.int64)
+    same_group = group_codes[order[1:]] == group_codes[order[:-1]]
+    same_group &= group_codes[order[1:]] >= 0
+    previous[order[1:][same_group]] = order[:-1][same_group]
+    return previous
+
+
+def _forward_fill_numpy(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # Position of the last non missing value, reset on each group start
+    positions = np.where(~np.isnan(values) | starts,
+                         np.arange(len(values)), 0)
+    np.maximum.accumulate(positions, out=positions)
+    return values[positions]
+
+
+def _fill_groups_numpy(values, is_missing, starts, previous, backward, forward):
+    filled = np.where(is_missing, np.nan, values)
+    substitute = is_missing & (previous >= 0)
+    filled[substitute] = values[previous[substitute]]
+    if backward and len(filled):
+        # Backward fill is a forward fill of the reversed groups
+        ends = np.roll(starts, -1)
+        ends[-1] = True
+        filled = _forward_fill_numpy(filled[::-1], ends[::-1])[::-1]
+    if forward and len(filled):
+        filled = _forward_fill_numpy(filled, starts)
+    return filled
+
+
+def _fill_groups_loop(values, is_missing, starts, previous, backward, forward):
+    row_count = len(values)
+    filled = np.empty(row_count, dtype=np.float64)
+    for row in range(row_count):
+        if not is_missing[row]:
+            filled[row] = values[row]
+        elif previous[row] >= 0:
+            filled[row] = values[previous[row]]
+        else:
+            filled[row] = np.nan
+
+    if backward:
+        next_value = np.nan
+        for row in range(row_count - 1, -1, -1):
+            if np.isnan(filled[row]):
+                filled[row] = next_value
+            else:
+                next_value = filled[row]
+            if starts[row]:
+                next_value = np.nan
+
+    if forward:
+        last_value = np.nan
+        for row in range(row_count):
+            if starts[row]:
+                last_value = np.nan
+            if np.isnan(filled[row]):
+                filled[row] = last_value
+            else:
+                last_value = filled[row]
+    return filled
+
+
+@functools.lru_cache(maxsize=None)
+def _fill_groups_kernel(jit: bool):
+    # numba is imported on the first large fill, not with the module
+    if jit and numba_available():
+        from numba import njit
+
+        return njit(cache=True)(_fill_groups_loop)
+    return _fill_groups_numpy
+
+
+def fill_groups(
+        values,
+        is_missing,
+        starts,
+        previous=None,
+        backward: bool = True,
+        forward: bool = True) -> tuple:
+    """
+    Fills missing values of one column of rows sorted by group, with
+    group boundaries given by starts (see group_start_mask()):
+    1. Missing rows with a previous vintage (previous >= 0) take the
+    previous vintage's reported value
+    2. Backward fill within each group
+    3. Forward fill within each group
+    Returns the filled float64 values and the "was filled" flags
+    (the is_missing mask). Compiled with numba when available, for
+    tables of JIT_MIN_ROWS rows or more.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    is_missing = np.asarray(is_missing, dtype=bool)
+    starts = np.asarray(starts, dtype=bool)
+    if previous is None:
+        previous = np.full(len(values), -1, dtype=np.int64)
+    previous = np.asarray(previous, dtype=np.int64)
+
+    filled = _fill_groups_kernel(len(values) >= JIT_MIN_ROWS)(
+        values, is_missing, starts, previous, backward, forward)
+    return filled, is_missing.copy()
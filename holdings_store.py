@@ -0,0 +1,189 @@
+import sqlite3
+
+import pandas as pd
+
+from compact_dtypes import restore_holdings_dtypes
+
+
+HOLDINGS_COLUMNS = [
+    "client_id",
+    "quarter_date",
+    "month_date",
+    "product_id",
+    "holdings",
+    "start_date",
+    "end_date",
+    "is_holdings_backfilled",
+]
+
+DATE_COLUMNS = ["quarter_date", "month_date", "start_date", "end_date"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS holdings (
+    client_id TEXT NOT NULL,
+    quarter_date TEXT NOT NULL,
+    month_date TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    holdings REAL,
+    start_date TEXT NOT NULL,
+    end_date TEXT,
+    is_holdings_backfilled INTEGER NOT NULL,
+    PRIMARY KEY (client_id, product_id, month_date, quarter_date)
+);
+-- Current version of each month: end_date IS NULL
+CREATE INDEX IF NOT EXISTS idx_holdings_current
+    ON holdings (client_id, product_id, month_date)
+    WHERE end_date IS NULL;
+-- Versions valid at a given quarter
+CREATE INDEX IF NOT EXISTS idx_holdings_validity
+    ON holdings (start_date, end_date);
+"""
+
+
+class HoldingsStore:
+    """
+    SQLite storage of the rolling holdings table.
+    Every quarterly vintage of a month is kept with its start_date and
+    end_date validity window:
+    - The primary key (client_id, product_id, month_date, quarter_date)
+    serves per client / product / month lookups
+    - A partial index on end_date IS NULL serves the best reported
+    (latest) holdings without scanning older vintages.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA_SQL)
+
+    def close(self):
+        self.connection.close()
+
+    def _to_records(self, input_holdings_df: pd.DataFrame) -> list:
+        """
+        Converts holdings rows to tuples with ISO text dates.
+        """
+        holdings_df = restore_holdings_dtypes(
+            input_holdings_df)[HOLDINGS_COLUMNS].copy()
+        for column in DATE_COLUMNS:
+            holdings_df[column] = (
+                pd.to_datetime(holdings_df[column])
+                .dt.strftime("%Y-%m-%d")
+                .astype(object)
+            )
+        holdings_df["product_id"] = holdings_df["product_id"].astype(int)
+        holdings_df["is_holdings_backfilled"] = holdings_df[
+            "is_holdings_backfilled"].astype(int)
+        holdings_df = holdings_df.astype(object).where(holdings_df.notna(), None)
+        return list(holdings_df.itertuples(index=False, name=None))
+
+    def replace_holdings(
+            self,
+            input_holdings_df: pd.DataFrame,
+            client_ids: list = None):
+        """
+        Replaces the stored table with a full holdings table
+        (output of process_client_holdings()), or only the rows of
+        client_ids when the table was processed for these clients.
+        """
+        with self.connection:
+            if client_ids is None:
+                self.connection.execute("DELETE FROM holdings")
+            else:
+                self.connection.executemany(
+                    "DELETE FROM holdings WHERE client_id = ?",
+                    [(client_id,) for client_id in client_ids],
+                )
+            self.connection.executemany(
+                f"INSERT INTO holdings VALUES ({', '.join('?' * len(HOLDINGS_COLUMNS))})",
+                self._to_records(input_holdings_df),
+            )
+
+    def upsert_holdings(self, input_holdings_df: pd.DataFrame):
+        """
+        Inserts or replaces holdings rows by primary key, e.g. the rows
+        of a quarterly drop and the rows it closed out.
+        """
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO holdings VALUES ({', '.join('?' * len(HOLDINGS_COLUMNS))})",
+                self._to_records(input_holdings_df),
+            )
+
+    def _query(self, sql: str, params: list) -> pd.DataFrame:
+        holdings_df = pd.read_sql_query(sql, self.connection, params=params)
+        for column in DATE_COLUMNS:
+            holdings_df[column] = pd.to_datetime(
+                holdings_df[column], format="%Y-%m-%d")
+        holdings_df["is_holdings_backfilled"] = holdings_df[
+            "is_holdings_backfilled"].astype(bool)
+        return holdings_df
+
+    def _filters(
+            self,
+            client_id: str = None,
+            product_id: int = None,
+            start_month: str = None,
+            end_month: str = None) -> tuple:
+        """
+        Builds the WHERE conditions shared by the lookups.
+        """
+        conditions = []
+        params = []
+        if client_id is not None:
+            conditions.append("client_id = ?")
+            params.append(client_id)
+        if product_id is not None:
+            conditions.append("product_id = ?")
+            params.append(int(product_id))
+        if start_month is not None:
+            conditions.append("month_date >= ?")
+            params.append(pd.Timestamp(start_month).strftime("%Y-%m-%d"))
+        if end_month is not None:
+            conditions.append("month_date <= ?")
+            params.append(pd.Timestamp(end_month).strftime("%Y-%m-%d"))
+        return conditions, params
+
+    def best_reported_holdings(
+            self,
+            client_id: str = None,
+            product_id: int = None,
+            start_month: str = None,
+            end_month: str = None) -> pd.DataFrame:
+        """
+        Latest reported holdings per client, product and month
+        (end_date IS NULL), served by the partial index.
+        """
+        conditions, params = self._filters(
+            client_id, product_id, start_month, end_month)
+        conditions.insert(0, "end_date IS NULL")
+        return self._query(
+            f"SELECT {', '.join(HOLDINGS_COLUMNS)} FROM holdings "
+            f"INDEXED BY idx_holdings_current "
+            f"WHERE {' AND '.join(conditions)} "
+            "ORDER BY client_id, product_id, month_date",
+            params,
+        )
+
+    def holdings_as_reported(
+            self,
+            quarter_date: str,
+            client_id: str = None,
+            product_id: int = None) -> pd.DataFrame:
+        """
+        Holdings as they were known after the quarter_date reporting:
+        versions with start_date <= quarter_date < end_date (or no end_date).
+        """
+        conditions, params = self._filters(client_id, product_id)
+        quarter = pd.Timestamp(quarter_date).strftime("%Y-%m-%d")
+        conditions = [
+            "start_date <= ?",
+            "(end_date IS NULL OR end_date > ?)",
+        ] + conditions
+        params = [quarter, quarter] + params
+        return self._query(
+            f"SELECT {', '.join(HOLDINGS_COLUMNS)} FROM holdings "
+            f"WHERE {' AND '.join(conditions)} "
+            "ORDER BY client_id, product_id, month_date",
+            params,
+        )
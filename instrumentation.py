@@ -0,0 +1,180 @@
+import contextlib
+import cProfile
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+def _count_rows(values) -> int:
+    """
+    Total rows of the DataFrames among values, None if there are none.
+    """
+    rows = [len(value) for value in values if isinstance(value, pd.DataFrame)]
+    return sum(rows) if rows else None
+
+
+class RunInstrumentation:
+    """
+    Records, for each pipeline stage: wall time, CPU time, input and output
+    rows and peak traced memory, plus per-sheet load times.
+    When disabled every hook returns straight away.
+    Optionally profiles top-level stages with cProfile and keeps the
+    profile of the slowest one.
+    """
+
+    def __init__(
+            self,
+            enabled: bool = False,
+            trace_memory: bool = True,
+            profile: bool = False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.profile = enabled and profile
+        self.stages = []
+        self.sheet_loads = []
+        # Stages can run on several threads, each with its own nesting
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._running_stages = 0
+        self._owns_tracing = False
+        self._profiling = False
+        self._slowest_profile = (0.0, None, None)
+
+    @property
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def stage(self, stage_name: str, input_rows: int = None):
+        """
+        Times a block of code as a stage. Yields the stage record so
+        the caller can add output_rows.
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {
+            "stage": stage_name,
+            "depth": len(self._stack),
+            "input_rows": input_rows,
+            "output_rows": None,
+            "peak_memory_bytes": None,
+        }
+
+        with self._lock:
+            self._running_stages += 1
+            if self.trace_memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._owns_tracing = True
+                # Keep the parent's peak before resetting it for this stage
+                # (peaks are process wide when stages run concurrently)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["peak_memory_bytes"] = max(
+                        parent["peak_memory_bytes"] or 0,
+                        tracemalloc.get_traced_memory()[1],
+                    )
+                tracemalloc.reset_peak()
+
+            # cProfile only supports one active profiler, so only
+            # one top-level stage is profiled at a time
+            profiler = None
+            if self.profile and not self._stack and not self._profiling:
+                profiler = cProfile.Profile()
+                self._profiling = True
+
+        self._stack.append(record)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record["wall_seconds"] = time.perf_counter() - start_wall
+            record["cpu_seconds"] = time.process_time() - start_cpu
+            self._stack.pop()
+
+            with self._lock:
+                self._running_stages -= 1
+                if self.trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    record["peak_memory_bytes"] = max(
+                        record["peak_memory_bytes"] or 0, peak)
+                    if self._stack:
+                        parent = self._stack[-1]
+                        parent["peak_memory_bytes"] = max(
+                            parent["peak_memory_bytes"] or 0, peak)
+                    tracemalloc.reset_peak()
+                    if self._running_stages == 0 and self._owns_tracing:
+                        tracemalloc.stop()
+                        self._owns_tracing = False
+
+                if profiler is not None:
+                    self._profiling = False
+                    if record["wall_seconds"] > self._slowest_profile[0]:
+                        self._slowest_profile = (
+                            record["wall_seconds"], stage_name, profiler)
+
+                self.stages.append(record)
+
+    def record_sheet_load(self, sheet_name: str, seconds: float, source: str):
+        if self.enabled:
+            with self._lock:
+                self.sheet_loads.append(
+                    {"sheet": sheet_name, "seconds": seconds, "source": source})
+
+    def report(self) -> dict:
+        """
+        Machine-readable run report, stages in completion order.
+        """
+        return {
+            "stages": self.stages,
+            "sheet_loads": self.sheet_loads,
+            "slowest_profiled_stage": self._slowest_profile[1],
+        }
+
+    def write_report(self, report_path: str, profile_path: str = None):
+        """
+        Writes the run report as JSON and, when profiling,
+        the cProfile stats of the slowest stage.
+        """
+        if not self.enabled:
+            return
+        with open(report_path, "w") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+        _, _, profiler = self._slowest_profile
+        if profile_path and profiler is not None:
+            profiler.dump_stats(profile_path)
+
+
+def instrument_stage(method):
+    """
+    Records a WisdomTreeDataPipeline method as a stage on
+    self.instrumentation. Calls the method directly when disabled.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, "instrumentation", None)
+        if instrumentation is None or not instrumentation.enabled:
+            return method(self, *args, **kwargs)
+
+        with instrumentation.stage(
+            method.__name__,
+            input_rows=_count_rows(list(args) + list(kwargs.values())),
+        ) as record:
+            result = method(self, *args, **kwargs)
+            record["output_rows"] = _count_rows([result])
+        return result
+
+    return wrapper
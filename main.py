@@ -1,41 +1,245 @@
+import argparse
 import time
 
-
 from config import (
     EXCEL_FILE_PATH,
     ANALYTICS_OUTPUT_FILE_PATH,
+    CHECKPOINT_DIR,
+    CHECKPOINT_MAX_MB,
+    CHECKPOINTS_ENABLED,
     EXPENSE_OUTPUT_FILE_PATH,
     HOLDINGS_OUTPUT_FILE_PATH,
-    NAV_OUTPUT_FILE_PATH
+    HOLDINGS_STORE_PATH,
+    HOLDINGS_WORKBOOKS_PATH,
+    INSTRUMENTATION_PROFILE_PATH,
+    INSTRUMENTATION_REPORT_PATH,
+    NAV_OUTPUT_FILE_PATH,
+    OUTPUT_FORMATS,
+    OUTPUT_WRITE_WORKERS,
+    QUALITY_CHECKS_ENABLED,
+    QUALITY_REPORT_PATH,
+    QUERY_CACHE_SIZE,
+    QUERY_SERVER_ENABLED,
+    QUERY_SERVER_HOST,
+    QUERY_SERVER_PORT,
+    SCHEDULER_WORKERS
 )
+from output_writers import client_output_path, write_outputs
+from sheet_cache import parquet_available
+from stage_checkpoints import StageCheckpoints, code_version
+from stage_scheduler import StageScheduler
 from transformations import WisdomTreeDataPipeline
 
-start_time = time.time()
+# CLI stage -> scheduler stages it runs. The stages they take as inputs
+# run as well, without writing their outputs.
+CLI_STAGES = {
+    "nav": ["nav", "write_nav"],
+    "expense": ["expense", "write_expense"],
+    "holdings": ["holdings", "store_holdings", "write_holdings"],
+    "analytics": ["analytics", "write_analytics"],
+    "quality": ["write_quality"],
+}
+
+
+def store_holdings(holdings_df, client_ids=None):
+    from holdings_store import HoldingsStore
+
+    holdings_store = HoldingsStore(HOLDINGS_STORE_PATH)
+    holdings_store.replace_holdings(holdings_df, client_ids)
+    holdings_store.close()
+    return HOLDINGS_STORE_PATH
+
+
+def output_writer(file_path):
+    # Each output is written as soon as its stage completes
+    return lambda output_df: write_outputs(
+        {file_path: output_df}, OUTPUT_FORMATS, max_workers=OUTPUT_WRITE_WORKERS
+    )
+
+
+def build_scheduler(
+        etl_pipeline: WisdomTreeDataPipeline,
+        quality_checks: bool = QUALITY_CHECKS_ENABLED,
+        checkpoints: StageCheckpoints = None) -> StageScheduler:
+    """
+    Declares every pipeline stage and output writer as a dependency graph.
+    Transform and quality stages are checkpointed when checkpoints are
+    given; store and write stages always run.
+    Holdings, analytics and quality outputs of a run over some clients
+    only are written next to the full outputs, see client_output_path().
+    """
+    client_ids = etl_pipeline.client_ids
+    # Holdings do not depend on NAV and run alongside it
+    scheduler = StageScheduler(checkpoints, code_version())
+    # Raw sheet rows, read for the transform and quality stages only when
+    # one of them runs, and released once they finished
+    scheduler.add_stage(
+        "observed_nav", etl_pipeline.read_observed_nav, transient=True,
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key("observed_nav"))
+    scheduler.add_stage(
+        "reported_holdings", etl_pipeline.read_reported_holdings,
+        transient=True,
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key(
+            "reported_holdings"))
+    scheduler.add_stage(
+        "nav", etl_pipeline.extract_nav, inputs=["observed_nav"],
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key("nav"))
+    scheduler.add_stage(
+        "expense", etl_pipeline.extract_expense_ratios, inputs=["nav"],
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key("expense"))
+    scheduler.add_stage(
+        "holdings", etl_pipeline.process_client_holdings,
+        inputs=["reported_holdings"],
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key("holdings"))
+    scheduler.add_stage(
+        "analytics",
+        etl_pipeline.transform_monthly_analytics,
+        inputs=["expense", "holdings", "nav"],
+        checkpoint_key=lambda: etl_pipeline.checkpoint_key("analytics"),
+    )
+    scheduler.add_stage(
+        "store_holdings",
+        lambda holdings_df: store_holdings(
+            holdings_df, etl_pipeline.client_ids),
+        inputs=["holdings"],
+    )
+    if quality_checks:
+        from quality_rules import write_quality_report
+
+        # Raw row checks run alongside the transform stages, on the same
+        # raw rows; the report is written also when a transform stage
+        # failed, without the rules of its output
+        scheduler.add_stage(
+            "quality_observed_nav", etl_pipeline.check_observed_nav,
+            inputs=["observed_nav"], checkpoint_key="quality")
+        scheduler.add_stage(
+            "quality_nav", etl_pipeline.check_nav_quality, inputs=["nav"],
+            checkpoint_key="quality")
+        scheduler.add_stage(
+            "quality_reported_holdings",
+            etl_pipeline.check_reported_holdings,
+            inputs=["reported_holdings"], checkpoint_key="quality")
+        scheduler.add_stage(
+            "quality_holdings", etl_pipeline.check_holdings_quality,
+            inputs=["holdings"], checkpoint_key="quality")
+        scheduler.add_stage(
+            "write_quality",
+            lambda *results: write_quality_report(
+                [result for stage_results in results if stage_results
+                 for result in stage_results],
+                client_output_path(QUALITY_REPORT_PATH, client_ids)),
+            inputs=["quality_observed_nav", "quality_nav",
+                    "quality_reported_holdings", "quality_holdings"],
+            optional_inputs=["quality_nav", "quality_holdings"],
+        )
+    scheduler.add_stage(
+        "write_nav", output_writer(NAV_OUTPUT_FILE_PATH), inputs=["nav"])
+    scheduler.add_stage(
+        "write_expense", output_writer(EXPENSE_OUTPUT_FILE_PATH),
+        inputs=["expense"])
+    scheduler.add_stage(
+        "write_holdings",
+        output_writer(
+            client_output_path(HOLDINGS_OUTPUT_FILE_PATH, client_ids)),
+        inputs=["holdings"])
+    scheduler.add_stage(
+        "write_analytics",
+        output_writer(
+            client_output_path(ANALYTICS_OUTPUT_FILE_PATH, client_ids)),
+        inputs=["analytics"])
+    return scheduler
+
+
+def parse_arguments(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Extracts and transforms NAV, expense ratios and client "
+        "holdings into monthly analytics.")
+    parser.add_argument(
+        "--stages",
+        help="comma separated stages to run with the stages they need: "
+        f"{', '.join(CLI_STAGES)} (default: all, quality only when "
+        "QUALITY_CHECKS_ENABLED)")
+    parser.add_argument(
+        "--clients",
+        help="comma separated client ids whose holdings are processed, "
+        "their holdings, analytics and quality outputs are written with the "
+        "client ids in the file names (default: all clients)")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="run every stage instead of restoring checkpoints")
+    args = parser.parse_args(argv)
+
+    if args.stages is None:
+        args.stages = [
+            stage for stage in CLI_STAGES
+            if stage != "quality" or QUALITY_CHECKS_ENABLED]
+    else:
+        args.stages = [
+            stage.strip() for stage in args.stages.split(",") if stage.strip()]
+        unknown_stages = [
+            stage for stage in args.stages if stage not in CLI_STAGES]
+        if unknown_stages:
+            parser.error(f"unknown stages {unknown_stages}")
+    if args.clients is not None:
+        args.clients = [
+            client_id.strip() for client_id in args.clients.split(",")
+            if client_id.strip()]
+    return args
+
+
+def main(argv: list = None):
+    start_time = time.time()
+    args = parse_arguments(argv)
+
+    # Workbook and reference tables are opened by the stages that use them
+    quality_checks = QUALITY_CHECKS_ENABLED or "quality" in args.stages
+    etl_pipeline = WisdomTreeDataPipeline(
+        EXCEL_FILE_PATH, client_ids=args.clients)
+    unknown_clients = etl_pipeline.unknown_client_ids()
+    if unknown_clients:
+        raise SystemExit(
+            f"Error, --clients {unknown_clients} have no client sheets in "
+            f"{HOLDINGS_WORKBOOKS_PATH or EXCEL_FILE_PATH}")
+    checkpoints = None
+    if CHECKPOINTS_ENABLED and parquet_available():
+        checkpoints = StageCheckpoints(
+            CHECKPOINT_DIR, CHECKPOINT_MAX_MB * 1024 * 1024)
+    scheduler = build_scheduler(etl_pipeline, quality_checks, checkpoints)
+    stage_results = scheduler.run(
+        max_workers=SCHEDULER_WORKERS,
+        stage_names=[
+            stage_name
+            for stage in args.stages
+            for stage_name in CLI_STAGES[stage]
+        ],
+        restore=not args.force,
+    )
+
+    # Run report (only written when instrumentation is enabled)
+    etl_pipeline.instrumentation.write_report(
+        INSTRUMENTATION_REPORT_PATH, INSTRUMENTATION_PROFILE_PATH)
+
+    # Serve the run to reporting tools until interrupted
+    if QUERY_SERVER_ENABLED and stage_results.get("analytics") is not None:
+        from analytics_query import AnalyticsQuery, create_query_server
+
+        analytics_query = AnalyticsQuery(cache_size=QUERY_CACHE_SIZE)
+        analytics_query.publish(
+            stage_results["analytics"], stage_results.get("holdings"))
+        query_server = create_query_server(
+            analytics_query, QUERY_SERVER_HOST, QUERY_SERVER_PORT)
+        print(f"Serving queries on http://{QUERY_SERVER_HOST}:{QUERY_SERVER_PORT}")
+        try:
+            query_server.serve_forever()
+        except KeyboardInterrupt:
+            query_server.server_close()
+
+    end_time = time.time()
+
+    runtime = end_time - start_time
+    print("Runtime:", runtime, "seconds")
 
 
 if __name__ == "__main__":
-
-    etl_pipeline = WisdomTreeDataPipeline(EXCEL_FILE_PATH)
-
-    nav_df = etl_pipeline.extract_nav()
-
-    expense_df = etl_pipeline.extract_expense_ratios(nav_df)
-
-    holdings_df = etl_pipeline.process_client_holdings()
-
-    monthly_analytics_df = etl_pipeline.transform_monthly_analytics(
-        expense_df, holdings_df, nav_df)
-
-    expense_df.to_excel(EXPENSE_OUTPUT_FILE_PATH, index=False)
-
-    holdings_df.to_excel(HOLDINGS_OUTPUT_FILE_PATH, index=False)
-
-    nav_df.to_excel(NAV_OUTPUT_FILE_PATH, index=False)
-
-    monthly_analytics_df.to_excel(ANALYTICS_OUTPUT_FILE_PATH, index=False)
-
-
-end_time = time.time()
-
-runtime = end_time - start_time
-print("Runtime:", runtime, "seconds")
+    main()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+class NavAsOfTable:
+    """
+    Sparse NAV access: keeps only the observed prices, sorted by product
+    and market date, and resolves "NAV at date d" with one searchsorted
+    over (product, date) keys instead of a products x calendar days frame.
+    Same values as fill_missing_nav_dates() on the dense calendar:
+    1. Observed date: observed NAV, is_nav_backfilled from the observation
+    (False for raw prices)
+    2. Missing date: NAV of the next observation (backfill), or the last
+    one after the final observation (forward fill), flagged as backfilled
+    3. Dates outside January 1 of the first year to December 31 of the
+    last year, or unknown products, are not resolved.
+    """
+
+    def __init__(self, nav_df: pd.DataFrame):
+        dated_df = nav_df[nav_df["market_date"].notna()]
+        self.calendar_start = pd.Timestamp(
+            year=dated_df["market_date"].min().year, month=1, day=1)
+        self.calendar_end = pd.Timestamp(
+            year=dated_df["market_date"].max().year, month=12, day=31)
+        self.product_ids = pd.Index(dated_df["product_id"].unique())
+
+        observed_df = dated_df[dated_df["net_asset_value"].notna()]
+        codes = self.product_ids.get_indexer(observed_df["product_id"])
+        dates = observed_df["market_date"].to_numpy("datetime64[ns]").view("i8")
+        values = observed_df["net_asset_value"].to_numpy("float64")
+        if "is_nav_backfilled" in observed_df.columns:
+            flags = observed_df["is_nav_backfilled"].to_numpy(bool)
+        else:
+            flags = np.zeros(len(observed_df), dtype=bool)
+
+        # Sort by product then date, a repeated date keeps its last price
+        order = np.lexsort((dates, codes))
+        codes, dates = codes[order], dates[order]
+        is_last = np.ones(len(order), dtype=bool)
+        is_last[:-1] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+
+        self.codes = codes[is_last]
+        self.dates = dates[is_last]
+        self.values = values[order][is_last]
+        self.flags = flags[order][is_last]
+        # Observations of product code c are self.dates[starts[c]:ends[c]]
+        product_codes = np.arange(len(self.product_ids))
+        self.starts = np.searchsorted(self.codes, product_codes, side="left")
+        self.ends = np.searchsorted(self.codes, product_codes, side="right")
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def as_of(self, product_ids, market_dates) -> pd.DataFrame:
+        """
+        Resolves the NAV of each distinct (product_id, market_date) pair.
+        Returns product_id, market_date, net_asset_value and
+        is_nav_backfilled, one row per resolvable pair, to be merged
+        like the dense NAV table.
+        """
+        requests_df = pd.DataFrame(
+            {
+                "product_id": np.asarray(product_ids),
+                "market_date": pd.to_datetime(np.asarray(market_dates)),
+            }
+        ).drop_duplicates()
+        requests_df = requests_df[
+            requests_df["market_date"].between(
+                self.calendar_start, self.calendar_end)
+            & requests_df["product_id"].isin(self.product_ids)
+        ].reset_index(drop=True)
+
+        request_codes = self.product_ids.get_indexer(requests_df["product_id"])
+        request_dates = requests_df["market_date"].to_numpy(
+            "datetime64[ns]").view("i8")
+
+        # Rank observed and requested dates together so that
+        # (product code, date rank) packs into one sortable integer key
+        _, date_ranks = np.unique(
+            np.concatenate([self.dates, request_dates]), return_inverse=True)
+        date_ranks = date_ranks.ravel()
+        rank_count = len(date_ranks) + 1
+        observed_keys = self.codes * rank_count + date_ranks[:len(self.dates)]
+        request_keys = request_codes * rank_count + date_ranks[len(self.dates):]
+
+        # First observation on or after each date, capped at the last
+        # observation of the product (forward fill)
+        starts = self.starts[request_codes]
+        ends = self.ends[request_codes]
+        has_prices = ends > starts
+        positions = np.searchsorted(observed_keys, request_keys, side="left")
+        positions = np.where(
+            has_prices, np.clip(positions, starts, ends - 1), 0)
+
+        if len(self.dates):
+            values = np.where(has_prices, self.values[positions], np.nan)
+            is_observed = has_prices & (self.dates[positions] == request_dates)
+            flags = np.where(is_observed, self.flags[positions], True)
+        else:
+            # Products without any price are kept, as on the dense calendar
+            values = np.full(len(requests_df), np.nan)
+            flags = np.ones(len(requests_df), dtype=bool)
+
+        requests_df["net_asset_value"] = values
+        requests_df["is_nav_backfilled"] = flags
+        return requests_df
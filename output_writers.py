@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+def write_excel(input_df: pd.DataFrame, file_path: str):
+    input_df.to_excel(file_path, index=False)
+
+
+def write_parquet(input_df: pd.DataFrame, file_path: str):
+    input_df.to_parquet(file_path, index=False)
+
+
+def write_arrow(input_df: pd.DataFrame, file_path: str):
+    # Uncompressed Arrow IPC files can be memory-mapped by readers
+    # (e.g. pyarrow.ipc.open_file(pyarrow.memory_map(path))) without copies
+    input_df.reset_index(drop=True).to_feather(
+        file_path, compression="uncompressed")
+
+
+def write_csv(input_df: pd.DataFrame, file_path: str):
+    input_df.to_csv(file_path, index=False)
+
+
+# Output format -> (file extension, writer)
+OUTPUT_WRITERS = {
+    "excel": (".xlsx", write_excel),
+    "parquet": (".parquet", write_parquet),
+    "arrow": (".arrow", write_arrow),
+    "csv": (".csv", write_csv),
+}
+
+
+def output_file_path(file_path: str, output_format: str) -> str:
+    """
+    Swaps the extension of a configured output path
+    for the extension of the output format.
+    """
+    extension, _ = OUTPUT_WRITERS[output_format]
+    return os.path.splitext(file_path)[0] + extension
+
+
+def client_output_path(file_path: str, client_ids: list = None) -> str:
+    """
+    Output path of a run over some clients only: the client ids are added
+    to the file name, so the outputs of a full run are not overwritten.
+    """
+    if client_ids is None:
+        return file_path
+    root, extension = os.path.splitext(file_path)
+    return f"{root}_{'_'.join(sorted(client_ids))}{extension}"
+
+
+def write_output(input_df: pd.DataFrame, file_path: str, output_format: str) -> str:
+    """
+    Writes one DataFrame in one format and returns the written path.
+    """
+    _, writer = OUTPUT_WRITERS[output_format]
+    output_path = output_file_path(file_path, output_format)
+    writer(input_df, output_path)
+    return output_path
+
+
+def write_outputs(
+        outputs_dict: dict,
+        output_formats: list,
+        max_workers: int = 4) -> dict:
+    """
+    Writes {file_path: DataFrame} outputs in every requested format.
+    1. Each (output, format) pair is written on its own thread
+    2. A failed write is reported and does not stop the others
+    3. Returns {(file_path, format): written path or None}.
+    """
+    unknown_formats = set(output_formats) - set(OUTPUT_WRITERS)
+    if unknown_formats:
+        raise ValueError(
+            f"Unknown output formats {sorted(unknown_formats)}, "
+            f"expected {sorted(OUTPUT_WRITERS)}"
+        )
+
+    written_dict = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures_dict = {
+            (file_path, output_format): executor.submit(
+                write_output, output_df, file_path, output_format)
+            for file_path, output_df in outputs_dict.items()
+            if output_df is not None
+            for output_format in output_formats
+        }
+        for key, future in futures_dict.items():
+            try:
+                written_dict[key] = future.result()
+            except Exception as e:
+                print(f"Error, write_outputs() failed for {key}: {str(e)}")
+                written_dict[key] = None
+
+    return written_dict
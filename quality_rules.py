@@ -0,0 +1,291 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Offending keys kept per rule in the report
+QUALITY_SAMPLE_ROWS = 5
+# Day over day NAV change (after recorded splits) that suggests an
+# unrecorded split: above x1.5 or below /1.5
+NAV_JUMP_RATIO = 1.5
+
+
+class QualityRule:
+    """
+    One declarative data quality check: check(df, context) returns a
+    boolean mask of the offending rows of the table, computed with
+    vectorized column operations. key_columns identify the rows in the
+    report samples.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            table: str,
+            description: str,
+            check,
+            key_columns: list):
+        self.name = name
+        self.table = table
+        self.description = description
+        self.check = check
+        self.key_columns = key_columns
+
+
+def _table_column(context: dict, name: str, compute) -> np.ndarray:
+    """
+    Derived column shared by the rules of one table, computed once
+    per run_quality_rules() call.
+    """
+    columns = context.setdefault("_columns", {})
+    if name not in columns:
+        columns[name] = compute()
+    return columns[name]
+
+
+def _numeric_holdings(holdings_df: pd.DataFrame, context: dict) -> np.ndarray:
+    return _table_column(context, "numeric_holdings", lambda: pd.to_numeric(
+        holdings_df["holdings"], errors="coerce").to_numpy(np.float64))
+
+
+def _is_blank_holdings(holdings_df: pd.DataFrame, context: dict) -> np.ndarray:
+    # Blank cells are replaced by 0 by fill_zero_holdings()
+    def compute():
+        holdings = holdings_df["holdings"]
+        is_blank = holdings.isna().to_numpy().copy()
+        if holdings.dtype == object:
+            is_blank |= holdings.isin(["", " "]).to_numpy()
+        return is_blank
+
+    return _table_column(context, "is_blank_holdings", compute)
+
+
+def _nav_jumps(nav_df: pd.DataFrame, context: dict) -> np.ndarray:
+    """
+    Observed prices whose change from the product's previous observed
+    price, corrected by the recorded share actions between the two
+    dates, is beyond NAV_JUMP_RATIO.
+    """
+    values = pd.to_numeric(nav_df["net_asset_value"], errors="coerce")
+    product_ids = nav_df["product_id"].to_numpy()
+    is_valid = (values.notna() & nav_df["market_date"].notna()).to_numpy()
+    positions = np.flatnonzero(is_valid)
+    order = positions[np.lexsort((
+        nav_df["market_date"].to_numpy()[positions], product_ids[positions]))]
+
+    sorted_values = values.to_numpy(np.float64)[order]
+    sorted_dates = nav_df["market_date"].to_numpy()[order]
+    sorted_products = product_ids[order]
+    factors = np.ones(len(order))
+    corporate_actions = context.get("corporate_actions")
+    if corporate_actions is not None:
+        factors = corporate_actions.share_factors(sorted_products, sorted_dates)
+
+    is_jump = np.zeros(len(nav_df), dtype=bool)
+    if len(order) < 2:
+        return is_jump
+    # Prices in the units of the first date, comparable across splits
+    adjusted_values = sorted_values * factors
+    ratios = adjusted_values[1:] / adjusted_values[:-1]
+    is_jump[order[1:]] = (
+        (sorted_products[1:] == sorted_products[:-1])
+        & ((ratios > NAV_JUMP_RATIO) | (ratios < 1 / NAV_JUMP_RATIO))
+    )
+    return is_jump
+
+
+def missing_quarters(quarters_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quarter ends between each client's first and last delivered quarter
+    that were not delivered.
+    """
+    quarters_df = quarters_df[["client_id", "quarter_date"]].dropna(
+    ).drop_duplicates()
+    quarters = pd.PeriodIndex(quarters_df["quarter_date"], freq="Q").asi8
+    bounds_df = pd.DataFrame(
+        {"client_id": quarters_df["client_id"].to_numpy(), "quarter": quarters}
+    ).groupby("client_id")["quarter"].agg(["min", "max"])
+
+    # Every quarter from the first to the last one of each client
+    quarter_counts = (bounds_df["max"] - bounds_df["min"] + 1).to_numpy()
+    first_rows = np.cumsum(quarter_counts) - quarter_counts
+    expected_quarters = np.repeat(bounds_df["min"].to_numpy(), quarter_counts) + (
+        np.arange(quarter_counts.sum()) - np.repeat(first_rows, quarter_counts))
+    expected_clients = np.repeat(bounds_df.index.to_numpy(), quarter_counts)
+
+    is_missing = ~pd.MultiIndex.from_arrays(
+        [expected_clients, expected_quarters]
+    ).isin(pd.MultiIndex.from_arrays([quarters_df["client_id"], quarters]))
+    return pd.DataFrame(
+        {
+            "client_id": expected_clients[is_missing],
+            "quarter_date": pd.PeriodIndex.from_ordinals(
+                expected_quarters[is_missing], freq="Q"
+            ).to_timestamp(how="end").normalize(),
+        }
+    )
+
+
+NAV_RULES = [
+    QualityRule(
+        "unparseable_market_date", "nav",
+        "NAV dates that could not be parsed (NaT)",
+        lambda df, context: df["market_date"].isna(),
+        ["product_id", "market_date"],
+    ),
+    QualityRule(
+        "missing_or_non_numeric_nav", "nav",
+        "NAV values that are empty or not numeric",
+        lambda df, context: pd.to_numeric(
+            df["net_asset_value"], errors="coerce").isna(),
+        ["product_id", "market_date"],
+    ),
+    QualityRule(
+        "duplicate_product_date", "nav",
+        "Several NAV rows for the same (product_id, market_date)",
+        lambda df, context: df["market_date"].notna() & df.duplicated(
+            ["product_id", "market_date"], keep=False),
+        ["product_id", "market_date"],
+    ),
+    QualityRule(
+        "nav_jump_without_split", "nav",
+        f"Day over day NAV change beyond x{NAV_JUMP_RATIO} not explained "
+        "by a split of the corporate actions table (unrecorded split or "
+        "mis-scaled price)",
+        _nav_jumps,
+        ["product_id", "market_date", "net_asset_value"],
+    ),
+]
+
+HOLDINGS_RULES = [
+    QualityRule(
+        "unparseable_month_date", "holdings",
+        "Month headers of client sheets that could not be parsed (NaT)",
+        lambda df, context: df["month_date"].isna(),
+        ["client_id", "quarter_date", "ticker"],
+    ),
+    QualityRule(
+        "unknown_ticker", "holdings",
+        "Tickers not in the WT Products table (dropped by the products merge)",
+        lambda df, context: ~df["ticker"].isin(context["tickers"]),
+        ["client_id", "quarter_date", "ticker"],
+    ),
+    QualityRule(
+        "blank_holdings", "holdings",
+        "Empty holdings cells (replaced by 0, then backfilled)",
+        _is_blank_holdings,
+        ["client_id", "quarter_date", "month_date", "ticker"],
+    ),
+    QualityRule(
+        "non_numeric_holdings", "holdings",
+        "Holdings cells that are not numbers",
+        lambda df, context: np.isnan(_numeric_holdings(df, context))
+        & ~_is_blank_holdings(df, context),
+        ["client_id", "quarter_date", "month_date", "ticker", "holdings"],
+    ),
+    QualityRule(
+        "negative_holdings", "holdings",
+        "Holdings below 0",
+        lambda df, context: _numeric_holdings(df, context) < 0,
+        ["client_id", "quarter_date", "month_date", "ticker", "holdings"],
+    ),
+]
+
+# Rows filled by the pipeline, checked on the stage outputs
+OUTPUT_NAV_RULES = [
+    QualityRule(
+        "nav_backfilled", "nav",
+        "Calendar days without a price, filled from the next (or last) "
+        "observed price",
+        lambda df, context: df["is_nav_backfilled"].astype(bool),
+        ["product_id", "market_date"],
+    ),
+]
+OUTPUT_HOLDINGS_RULES = [
+    QualityRule(
+        "holdings_backfilled", "holdings",
+        "Zero or empty holdings filled from the previous vintage or month",
+        lambda df, context: df["is_holdings_backfilled"].astype(bool),
+        ["client_id", "product_id", "quarter_date", "month_date"],
+    ),
+]
+
+# Tables whose rows are the issues themselves
+MISSING_MONTHS_RULE = QualityRule(
+    "missing_months", "holdings",
+    "Months missing from a client quarter sheet (added with holdings 0)",
+    None,
+    ["client_id", "quarter_date", "month_date"],
+)
+MISSING_QUARTERS_RULE = QualityRule(
+    "missing_quarters", "holdings",
+    "Quarters missing between a client's first and last delivered quarter",
+    None,
+    ["client_id", "quarter_date"],
+)
+
+
+def _sample_keys(rows_df: pd.DataFrame, key_columns: list) -> list:
+    sample_df = rows_df[key_columns].head(QUALITY_SAMPLE_ROWS)
+    return json.loads(
+        sample_df.to_json(orient="records", date_format="iso", date_unit="s"))
+
+
+def rule_result(
+        rule: QualityRule,
+        rows_checked: int,
+        flagged_df: pd.DataFrame,
+        rows_flagged: int = None) -> dict:
+    """
+    Report entry of a rule: counts and sample offending keys.
+    flagged_df may only hold the sample rows when rows_flagged is given.
+    """
+    if rows_flagged is None:
+        rows_flagged = len(flagged_df)
+    return {
+        "rule": rule.name,
+        "table": rule.table,
+        "description": rule.description,
+        "rows_checked": int(rows_checked),
+        "rows_flagged": int(rows_flagged),
+        "sample_keys": _sample_keys(flagged_df, rule.key_columns),
+    }
+
+
+def run_quality_rules(
+        input_df: pd.DataFrame, rules: list, context: dict = None) -> list:
+    """
+    Runs every rule of one table over the same frame, each as one
+    vectorized mask, and returns their report entries.
+    """
+    context = dict(context or {})
+    results = []
+    for rule in rules:
+        is_flagged = np.asarray(rule.check(input_df, context), dtype=bool)
+        # Only the sample rows are taken from the frame
+        sample_positions = np.flatnonzero(is_flagged)[:QUALITY_SAMPLE_ROWS]
+        results.append(rule_result(
+            rule, len(input_df), input_df.iloc[sample_positions],
+            rows_flagged=is_flagged.sum()))
+    return results
+
+
+def write_quality_report(results: list, file_path: str) -> str:
+    """
+    Writes the run's rule results as a JSON report.
+    """
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "rules_flagged": sum(result["rows_flagged"] > 0 for result in results),
+        "rules": results,
+    }
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"data quality report written to {file_path}")
+    return file_path
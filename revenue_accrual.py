@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+
+# Revenue accrues on business days, MER / 252 per day
+ACCRUAL_DAYS_PER_YEAR = 252
+
+
+# Days of one product's block on the single interval axis of
+# ExpenseRatioIntervals: covers every datetime64 day (1677 to 2262)
+PRODUCT_DAY_SPAN = 1 << 18
+DAY_OFFSET = 1 << 17
+
+
+def _day_numbers(dates) -> np.ndarray:
+    return pd.DatetimeIndex(dates).to_numpy("datetime64[D]").astype(np.int64)
+
+
+class ExpenseRatioIntervals:
+    """
+    Expense ratios as effective-dated intervals in one IntervalIndex: a
+    ratio applies from its last_modified_date until the next change,
+    [last_modified_date, next last_modified_date), by day.
+    Each product has its own block of PRODUCT_DAY_SPAN days on the
+    interval axis, so every (product_id, date) is looked up at once.
+    Dates before the first change take the first ratio (backfilled),
+    the last ratio applies with no end date.
+    The intervals are sorted, non-overlapping and cover every block, so
+    the interval of a key is the last one starting on or before it.
+    """
+
+    def __init__(self, expense_df: pd.DataFrame):
+        expense_df = expense_df.dropna(
+            subset=["product_id", "expense_ratio", "last_modified_date"]
+        ).sort_values(
+            ["product_id", "last_modified_date"], kind="stable"
+        ).drop_duplicates(["product_id", "last_modified_date"], keep="last")
+        # Effective-dated ratios, sorted by product and date
+        self.expense_df = expense_df[
+            ["product_id", "expense_ratio", "last_modified_date"]
+        ].reset_index(drop=True)
+
+        self.product_index = pd.Index(pd.unique(self.expense_df["product_id"]))
+        product_codes = self.product_index.get_indexer(
+            self.expense_df["product_id"])
+        block_starts = product_codes * PRODUCT_DAY_SPAN
+        change_keys = block_starts + DAY_OFFSET + _day_numbers(
+            self.expense_df["last_modified_date"])
+
+        # First ratio of a product from the start of its block, last ratio
+        # to the end of it
+        is_first = np.ones(len(product_codes), dtype=bool)
+        is_first[1:] = product_codes[1:] != product_codes[:-1]
+        is_last = np.roll(is_first, -1)
+        starts = np.where(is_first, block_starts, change_keys)
+        ends = np.where(
+            is_last, block_starts + PRODUCT_DAY_SPAN, np.roll(change_keys, -1))
+
+        self.intervals = pd.IntervalIndex.from_arrays(starts, ends, closed="left")
+        self.ratios = self.expense_df["expense_ratio"].to_numpy(np.float64)
+        self.first_days = (change_keys[is_first] - block_starts[is_first]
+                           - DAY_OFFSET)
+
+    def ratio_at(self, product_ids, dates) -> tuple:
+        """
+        Expense ratio effective on each (product_id, date) and whether it
+        was backfilled (date before the product's first ratio), with one
+        searchsorted over the interval starts for all rows (same positions
+        as IntervalIndex.get_indexer(), without its interval tree).
+        Unknown products and missing dates get NaN.
+        """
+        product_codes = self.product_index.get_indexer(np.asarray(product_ids))
+        dates = pd.DatetimeIndex(dates)
+        days = _day_numbers(dates)
+        is_known = (product_codes >= 0) & ~dates.isna()
+
+        positions = np.full(len(days), -1)
+        positions[is_known] = self.intervals.left.searchsorted(
+            product_codes[is_known] * PRODUCT_DAY_SPAN + DAY_OFFSET
+            + days[is_known], side="right") - 1
+        # Position -1 (not found) takes the appended NaN / first day
+        ratios = np.append(self.ratios, np.nan)[positions]
+        is_backfilled = is_known & (
+            days < np.append(self.first_days, 0)[product_codes])
+        return ratios, is_backfilled
+
+
+def daily_accrual_rates(
+        nav_table,
+        expense_intervals: ExpenseRatioIntervals,
+        product_ids,
+        start_date,
+        end_date) -> pd.DataFrame:
+    """
+    Revenue accrued per share on each business day from start_date to
+    end_date, per product:
+    accrual_per_share = NAV of the day * expense ratio of the day / 252.
+    NAV is resolved as of the day from a NavAsOfTable. Rows are sorted
+    by product and day.
+    """
+    product_ids = pd.Index(pd.unique(np.asarray(product_ids)))
+    # Weekdays of the calendar days (same days as pd.bdate_range(),
+    # without its per-day offset arithmetic)
+    days = pd.date_range(start_date, end_date, freq="D")
+    days = days[days.dayofweek < 5]
+    rates_df = pd.DataFrame(
+        {
+            "product_id": np.repeat(product_ids.to_numpy(), len(days)),
+            "market_date": np.tile(days.to_numpy(), len(product_ids)),
+        }
+    )
+
+    nav_df = nav_table.as_of(rates_df["product_id"], rates_df["market_date"])
+    rates_df = rates_df.merge(
+        nav_df, on=["product_id", "market_date"], how="left")
+    (
+        rates_df["expense_ratio"],
+        rates_df["is_expense_ratios_backfilled"],
+    ) = expense_intervals.ratio_at(
+        rates_df["product_id"], rates_df["market_date"])
+
+    rates_df["accrual_per_share"] = (
+        rates_df["net_asset_value"]
+        * rates_df["expense_ratio"]
+        / ACCRUAL_DAYS_PER_YEAR
+    )
+    return rates_df
+
+
+def accrue_monthly_revenue(
+        holdings_df: pd.DataFrame, rates_df: pd.DataFrame) -> np.ndarray:
+    """
+    Revenue accrued over the month of each holdings row (product_id,
+    month_date, holdings): holdings * sum of the product's daily
+    accrual_per_share from the first to the last day of the month.
+    Month sums are differences of cumulative sums found with a
+    searchsorted over (product, day) keys. NaN when a business day of
+    the month has no NAV or expense ratio.
+    """
+    product_index = pd.Index(pd.unique(rates_df["product_id"]))
+    rate_codes = product_index.get_indexer(rates_df["product_id"])
+    rate_days = _day_numbers(rates_df["market_date"])
+
+    month_ends = pd.DatetimeIndex(holdings_df["month_date"])
+    month_starts = month_ends.to_period("M").to_timestamp(how="start")
+    row_codes = product_index.get_indexer(holdings_df["product_id"])
+    start_days = _day_numbers(month_starts)
+    end_days = _day_numbers(month_ends)
+
+    # (product, day) keys sorted as rates_df
+    first_day = min(rate_days.min(initial=0), start_days.min(initial=0))
+    key_span = max(rate_days.max(initial=0), end_days.max(initial=0)) - first_day + 1
+    rate_keys = rate_codes * key_span + (rate_days - first_day)
+    lower = np.searchsorted(
+        rate_keys, row_codes * key_span + (start_days - first_day), side="left")
+    upper = np.searchsorted(
+        rate_keys, row_codes * key_span + (end_days - first_day), side="right")
+
+    accruals = rates_df["accrual_per_share"].to_numpy(np.float64)
+    is_missing = np.isnan(accruals)
+    accrual_sums = np.concatenate(
+        [[0.0], np.cumsum(np.where(is_missing, 0.0, accruals))])
+    missing_counts = np.concatenate([[0], np.cumsum(is_missing)])
+
+    month_accruals = accrual_sums[upper] - accrual_sums[lower]
+    is_complete = (
+        (row_codes >= 0)
+        & (upper > lower)
+        & (missing_counts[upper] == missing_counts[lower])
+    )
+    return np.where(
+        is_complete,
+        holdings_df["holdings"].to_numpy(np.float64) * month_accruals,
+        np.nan,
+    )
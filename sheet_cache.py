@@ -0,0 +1,311 @@
+import datetime
+import hashlib
+import importlib.util
+import json
+import os
+import posixpath
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+WORKBOOK_NAMESPACES = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "pkg": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+# Workbook parts shared by every sheet: strings and cell formats
+SHARED_PARTS = ["xl/sharedStrings.xml", "xl/styles.xml"]
+# Parquet schema metadata key listing the mixed type columns of an entry
+MIXED_COLUMNS_KEY = b"sheet_cache_mixed_columns"
+
+
+def parquet_available() -> bool:
+    """
+    Parquet needs the optional pyarrow dependency.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _file_digest(file_path: str) -> str:
+    """
+    Content hash of the whole file, used when the workbook
+    is not an xlsx (zip) package.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_workbook_sheets(file_path: str) -> dict:
+    """
+    Returns {sheet_name: fingerprint} for every sheet of a workbook.
+    1. For xlsx files, each sheet is keyed by the CRC32 and size of its
+    own worksheet part plus the shared strings and styles parts, read
+    from the zip directory without decompressing anything. This is a
+    change detector, not a content hash: CRC32 is not collision resistant,
+    but an edited part changes its CRC32 or size in practice
+    2. Other files fall back to one hash of the whole file, so any change
+    invalidates every sheet.
+    """
+    if not zipfile.is_zipfile(file_path):
+        file_digest = _file_digest(file_path)
+        sheet_names = pd.ExcelFile(file_path).sheet_names
+        return {
+            sheet_name: hashlib.blake2b(
+                f"{sheet_name}|{file_digest}".encode(), digest_size=16
+            ).hexdigest()
+            for sheet_name in sheet_names
+        }
+
+    with zipfile.ZipFile(file_path) as workbook_zip:
+        members = {info.filename: info for info in workbook_zip.infolist()}
+        workbook_xml = ET.fromstring(workbook_zip.read("xl/workbook.xml"))
+        rels_xml = ET.fromstring(
+            workbook_zip.read("xl/_rels/workbook.xml.rels"))
+
+    # Relationship id -> worksheet part path
+    targets = {}
+    for relationship in rels_xml.findall("pkg:Relationship", WORKBOOK_NAMESPACES):
+        target = relationship.get("Target")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[relationship.get("Id")] = target
+
+    shared_key = "|".join(
+        f"{members[part].CRC}:{members[part].file_size}"
+        for part in SHARED_PARTS
+        if part in members
+    )
+
+    fingerprints = {}
+    for sheet in workbook_xml.findall("main:sheets/main:sheet", WORKBOOK_NAMESPACES):
+        sheet_name = sheet.get("name")
+        part = members.get(targets.get(
+            sheet.get(f"{{{WORKBOOK_NAMESPACES['rel']}}}id")))
+        sheet_key = f"{part.CRC}:{part.file_size}" if part else "missing"
+        fingerprints[sheet_name] = hashlib.blake2b(
+            f"{sheet_name}|{sheet_key}|{shared_key}".encode(), digest_size=16
+        ).hexdigest()
+
+    return fingerprints
+
+
+def _encode_cell(value) -> str:
+    """
+    Type tagged text of a cell of a mixed type column, None for blanks.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return f"b{int(value)}"
+    if isinstance(value, (int, np.integer)):
+        return f"i{value}"
+    if isinstance(value, (float, np.floating)):
+        return f"f{float(value)!r}"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return f"d{pd.Timestamp(value).isoformat()}"
+    return f"s{value}"
+
+
+def _decode_cell(text: str):
+    if text is None:
+        return np.nan
+    tag, value = text[0], text[1:]
+    if tag == "b":
+        return bool(int(value))
+    if tag == "i":
+        return int(value)
+    if tag == "f":
+        return float(value)
+    if tag == "d":
+        return pd.Timestamp(value).to_pydatetime()
+    return value
+
+
+def _mixed_columns(sheet_df: pd.DataFrame) -> list:
+    """
+    Object columns mixing value types (e.g. a text cell in a column of
+    numbers), which Parquet cannot store as one column type.
+    """
+    return [
+        column for column in sheet_df.columns
+        if sheet_df[column].dtype == object
+        and pd.api.types.infer_dtype(sheet_df[column], skipna=True).startswith(
+            "mixed")
+    ]
+
+
+def _write_entry(sheet_df: pd.DataFrame, entry_path: str):
+    """
+    Writes a sheet as Parquet. Mixed type columns are stored as type
+    tagged text and listed in the schema metadata, so that
+    _read_entry() returns the cells as parsed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    mixed_columns = _mixed_columns(sheet_df)
+    if mixed_columns:
+        sheet_df = sheet_df.assign(**{
+            str(column): [_encode_cell(value) for value in sheet_df[column]]
+            for column in mixed_columns
+        })
+    table = pa.Table.from_pandas(sheet_df, preserve_index=False)
+    if mixed_columns:
+        table = table.replace_schema_metadata({
+            **table.schema.metadata,
+            MIXED_COLUMNS_KEY: json.dumps(
+                [str(column) for column in mixed_columns]).encode(),
+        })
+    pq.write_table(table, entry_path)
+
+
+def _read_entry(entry_path: str) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(entry_path)
+    sheet_df = table.to_pandas()
+    metadata = table.schema.metadata or {}
+    if MIXED_COLUMNS_KEY in metadata:
+        for column in json.loads(metadata[MIXED_COLUMNS_KEY]):
+            sheet_df[column] = pd.Series(
+                [_decode_cell(text) for text in sheet_df[column]],
+                index=sheet_df.index, dtype=object)
+    return sheet_df
+
+
+class SheetCache:
+    """
+    On-disk Parquet cache of parsed workbook sheets.
+    Entries are keyed by the sheet name and its fingerprint, so an
+    unchanged sheet is read back from Parquet instead of being parsed by
+    openpyxl, and a changed workbook only re-parses the sheets that changed.
+    Least recently used entries are evicted above max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._fingerprints = {}
+
+    def _sheet_fingerprints(self, file_path: str) -> dict:
+        """
+        Fingerprints are computed once per workbook version.
+        """
+        file_stat = os.stat(file_path)
+        version_key = (os.path.abspath(file_path),
+                       file_stat.st_mtime_ns, file_stat.st_size)
+        if version_key not in self._fingerprints:
+            self._fingerprints[version_key] = fingerprint_workbook_sheets(
+                file_path)
+        return self._fingerprints[version_key]
+
+    def _entry_path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{fingerprint}.parquet")
+
+    def read_sheets(
+            self,
+            file_path: str,
+            sheet_names: list,
+            loader,
+            sheet_seconds: dict = None) -> dict:
+        """
+        1. Reads cached sheets from Parquet
+        2. Parses the missing ones with loader(sheet_names) -> dict
+        and stores them
+        3. Returns {sheet_name: DataFrame} in the order of sheet_names
+        and adds the read time of each cached sheet to sheet_seconds if given.
+        """
+        sheets_dict, missing_sheets = self.read_cached_sheets(
+            file_path, sheet_names, sheet_seconds)
+
+        if missing_sheets:
+            loaded_dict = loader(missing_sheets)
+            self.store_sheets(file_path, loaded_dict)
+            sheets_dict.update(loaded_dict)
+
+        return {sheet_name: sheets_dict[sheet_name] for sheet_name in sheet_names}
+
+    def read_cached_sheets(
+            self,
+            file_path: str,
+            sheet_names: list,
+            sheet_seconds: dict = None) -> tuple:
+        """
+        Reads the cached sheets of a workbook from Parquet.
+        Returns ({sheet_name: DataFrame}, [sheet names not cached]), so that
+        the missing sheets of several workbooks can be parsed together.
+        """
+        fingerprints = self._sheet_fingerprints(file_path)
+        sheets_dict = {}
+        missing_sheets = []
+
+        for sheet_name in sheet_names:
+            entry_path = self._entry_path(fingerprints[sheet_name])
+            start_time = time.perf_counter()
+            try:
+                sheets_dict[sheet_name] = _read_entry(entry_path)
+                # Mark the entry as recently used
+                os.utime(entry_path)
+            except (FileNotFoundError, OSError, ValueError):
+                missing_sheets.append(sheet_name)
+                continue
+            if sheet_seconds is not None:
+                sheet_seconds[sheet_name] = time.perf_counter() - start_time
+
+        return sheets_dict, missing_sheets
+
+    def store_sheets(self, file_path: str, sheets_dict: dict):
+        """
+        Stores parsed sheets of a workbook and evicts above max_bytes.
+        """
+        if not sheets_dict:
+            return
+        fingerprints = self._sheet_fingerprints(file_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for sheet_name, sheet_df in sheets_dict.items():
+            self._store(fingerprints[sheet_name], sheet_df)
+        self.evict()
+
+    def _store(self, fingerprint: str, sheet_df: pd.DataFrame):
+        """
+        Writes one entry. Sheets Parquet cannot represent
+        (e.g. non-string column names) are simply not cached.
+        """
+        entry_path = self._entry_path(fingerprint)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            _write_entry(sheet_df, temp_path)
+            os.replace(temp_path, entry_path)
+        except Exception as e:
+            print(f"Sheet cache warning: sheet not cached: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache
+        fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".parquet"):
+                entry_stat = entry.stat()
+                entries.append(
+                    (entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total_bytes -= size
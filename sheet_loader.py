@@ -0,0 +1,248 @@
+import glob
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+# Client sheets are named "<ClientN>_<YYYY-MM-DD>"
+CLIENT_SHEET_PATTERN = re.compile(
+    r"^(client\w*?)_(\d{4}-\d{2}-\d{2})$", re.IGNORECASE)
+
+
+def build_client_sheet_catalog(sheet_names: list) -> list:
+    """
+    Parses the workbook sheet names once into
+    (client_id, quarter_date, sheet_name) keys.
+    1. Sheets that are not client sheets are skipped
+    2. Keys are sorted by client and quarter ascending, so
+    each client's quarters are processed in sequence.
+    """
+    catalog = []
+    for sheet_name in sheet_names:
+        match = CLIENT_SHEET_PATTERN.match(sheet_name)
+        if match:
+            client_id, quarter_date = match.groups()
+            catalog.append((client_id, quarter_date, sheet_name))
+
+    catalog.sort()
+    return catalog
+
+
+def resolve_workbook_paths(path: str) -> list:
+    """
+    Workbook files of a directory (every .xlsx file in it), a glob
+    pattern or a single file, sorted by path. Excel lock files
+    ("~$...") are skipped.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "*.xlsx")
+    return sorted(
+        file_path
+        for file_path in glob.glob(path)
+        if os.path.isfile(file_path)
+        and not os.path.basename(file_path).startswith("~$")
+    )
+
+
+def _workbook_sheet_names(file_path: str) -> list:
+    # Read-only mode only reads the workbook index, not the sheets
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def build_workbook_catalog(file_paths: list) -> list:
+    """
+    Resolves (client_id, quarter_date, file_path, sheet_name) keys of
+    the client sheets of several workbooks.
+    1. Sheets named "<ClientN>_<YYYY-MM-DD>" are keyed by their name
+    2. A workbook named "<ClientN>_<YYYY-MM-DD>.xlsx" without client
+    sheets is keyed by its file name and read from its first sheet
+    3. A client quarter found in several workbooks (re-sent vintage)
+    is read from the last workbook in path order, the others are
+    reported and skipped
+    4. Keys are sorted by client and quarter ascending.
+    """
+    catalog = {}
+    for file_path in sorted(file_paths):
+        sheet_names = _workbook_sheet_names(file_path)
+        file_catalog = [
+            (client_id, quarter_date, file_path, sheet_name)
+            for client_id, quarter_date, sheet_name
+            in build_client_sheet_catalog(sheet_names)
+        ]
+        file_match = CLIENT_SHEET_PATTERN.match(
+            os.path.splitext(os.path.basename(file_path))[0])
+        if not file_catalog and file_match and sheet_names:
+            client_id, quarter_date = file_match.groups()
+            file_catalog = [(client_id, quarter_date, file_path, sheet_names[0])]
+
+        for client_id, quarter_date, _, sheet_name in file_catalog:
+            vintage_key = (client_id.lower(), quarter_date)
+            if vintage_key in catalog:
+                print(
+                    f"Workbook Catalog Warning: {client_id} {quarter_date} in "
+                    f"{catalog[vintage_key][2]} superseded by {file_path}"
+                )
+            catalog[vintage_key] = (client_id, quarter_date, file_path, sheet_name)
+
+    return sorted(catalog.values())
+
+
+def _read_sheets(file_path, sheet_names: list) -> tuple:
+    """
+    Reads a batch of sheets with a single workbook open.
+    Runs inside the worker processes.
+    Returns ({sheet_name: DataFrame}, {sheet_name: parse seconds}).
+    """
+    sheets_dict = {}
+    sheet_seconds = {}
+    # An already open workbook is reused and left open
+    if isinstance(file_path, pd.ExcelFile):
+        excel_file = file_path
+    else:
+        excel_file = pd.ExcelFile(file_path)
+    try:
+        for sheet_name in sheet_names:
+            start_time = time.perf_counter()
+            sheets_dict[sheet_name] = pd.read_excel(
+                excel_file, sheet_name=sheet_name)
+            sheet_seconds[sheet_name] = time.perf_counter() - start_time
+    finally:
+        if excel_file is not file_path:
+            excel_file.close()
+    return sheets_dict, sheet_seconds
+
+
+def load_sheets(
+        file_path,
+        sheet_names: list,
+        max_workers: int = 1,
+        sheet_seconds: dict = None) -> dict:
+    """
+    Reads the given sheets in bulk.
+    1. Splits the sheets into one batch per worker and parses the
+    batches in a process pool (openpyxl parsing is CPU-bound)
+    2. With one worker the sheets are read in the current process,
+    file_path can then also be an open pd.ExcelFile
+    3. Returns {sheet_name: DataFrame} in the order of sheet_names
+    and adds the parse time of each sheet to sheet_seconds if given.
+    """
+    if not sheet_names:
+        return {}
+
+    max_workers = max(1, min(max_workers, len(sheet_names)))
+    if max_workers == 1:
+        batch_results = [_read_sheets(file_path, sheet_names)]
+    else:
+        batches = [sheet_names[i::max_workers] for i in range(max_workers)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batch_results = list(executor.map(
+                _read_sheets, [file_path] * len(batches), batches
+            ))
+
+    sheets_dict = {}
+    for batch_dict, batch_seconds in batch_results:
+        sheets_dict.update(batch_dict)
+        if sheet_seconds is not None:
+            sheet_seconds.update(batch_seconds)
+
+    return {sheet_name: sheets_dict[sheet_name] for sheet_name in sheet_names}
+
+
+def load_workbook_sheets(
+        workbook_sheets: dict,
+        max_workers: int = 1,
+        sheet_seconds: dict = None) -> dict:
+    """
+    Reads the sheets of several workbooks in one process pool.
+    1. workbook_sheets is {file_path: [sheet names]}
+    2. Each workbook is split into batches in proportion to its share
+    of all sheets, so every worker gets a similar number of sheets and
+    intake scales with workers rather than with the number of files
+    3. Returns {(file_path, sheet_name): DataFrame} in the order of
+    workbook_sheets and adds the parse time of each sheet to
+    sheet_seconds if given, keyed the same way.
+    """
+    total_sheets = sum(len(sheets) for sheets in workbook_sheets.values())
+    if not total_sheets:
+        return {}
+
+    max_workers = max(1, min(max_workers, total_sheets))
+    tasks = []
+    for file_path, sheet_names in workbook_sheets.items():
+        if not sheet_names:
+            continue
+        batch_count = min(
+            len(sheet_names),
+            math.ceil(max_workers * len(sheet_names) / total_sheets))
+        tasks.extend(
+            (file_path, sheet_names[i::batch_count])
+            for i in range(batch_count)
+        )
+
+    if max_workers == 1:
+        task_results = [_read_sheets(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            task_results = list(executor.map(
+                _read_sheets, *zip(*tasks)))
+
+    sheets_dict = {}
+    for (file_path, _), (batch_dict, batch_seconds) in zip(tasks, task_results):
+        for sheet_name, sheet_df in batch_dict.items():
+            sheets_dict[(file_path, sheet_name)] = sheet_df
+        if sheet_seconds is not None:
+            for sheet_name, seconds in batch_seconds.items():
+                sheet_seconds[(file_path, sheet_name)] = seconds
+
+    return {
+        (file_path, sheet_name): sheets_dict[(file_path, sheet_name)]
+        for file_path, sheet_names in workbook_sheets.items()
+        for sheet_name in sheet_names
+    }
+
+
+def iter_sheet_chunks(file_path, sheet_name: str, chunk_rows: int):
+    """
+    Streams a sheet as DataFrames of at most chunk_rows rows.
+    1. Uses openpyxl read-only row iteration, so only one chunk of
+    raw cell values is held in memory at a time
+    2. The first row is used as header, trailing empty columns
+    and fully empty rows are dropped.
+    """
+    # openpyxl is only needed in streaming mode
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        width = len(header)
+
+        chunk = []
+        chunks_count = 0
+        for row in rows:
+            row = row[:width]
+            if all(value is None for value in row):
+                continue
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame(chunk, columns=header)
+                chunks_count += 1
+                chunk = []
+        # Always yield at least one (possibly empty) chunk
+        if chunk or chunks_count == 0:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
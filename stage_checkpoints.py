@@ -0,0 +1,136 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+
+def fingerprint(*parts) -> str:
+    """
+    Hash of the string form of parts, in order.
+    """
+    return hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+
+
+def file_fingerprint(file_path: str) -> str:
+    """
+    Content hash of a file, "missing" when it does not exist.
+    """
+    if not os.path.exists(file_path):
+        return "missing"
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(directory: str = None) -> str:
+    """
+    Hash of the pipeline modules (every .py file of the repository
+    root): any code change invalidates every checkpoint.
+    """
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+    return fingerprint(*[
+        f"{os.path.basename(file_path)}:{file_fingerprint(file_path)}"
+        for file_path in sorted(glob.glob(os.path.join(directory, "*.py")))
+    ])
+
+
+class StageCheckpoints:
+    """
+    On-disk checkpoints of stage results, keyed by stage name and the
+    fingerprint of the stage's inputs (see StageScheduler.add_stage()):
+    - DataFrames are stored as Parquet, other results (e.g. quality
+    rule results) as JSON
+    - A rerun with the same fingerprint reads the result back instead
+    of running the stage; a changed input gives a new fingerprint, so
+    the old entry is never read again
+    - Least recently used entries (stale ones first, as they are no
+    longer read) are removed above max_bytes.
+    """
+
+    def __init__(self, checkpoint_dir: str, max_bytes: int):
+        self.checkpoint_dir = checkpoint_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _entry_paths(self, stage_name: str, stage_fingerprint: str) -> dict:
+        entry_name = os.path.join(
+            self.checkpoint_dir, f"{stage_name}-{stage_fingerprint}")
+        return {
+            "parquet": f"{entry_name}.parquet",
+            "json": f"{entry_name}.json",
+        }
+
+    def read(self, stage_name: str, stage_fingerprint: str):
+        """
+        Result stored for the stage and fingerprint, None when there is
+        no (readable) checkpoint.
+        """
+        for entry_format, entry_path in self._entry_paths(
+                stage_name, stage_fingerprint).items():
+            try:
+                if entry_format == "parquet":
+                    result = pd.read_parquet(entry_path)
+                else:
+                    with open(entry_path) as entry_file:
+                        result = json.load(entry_file)
+                # Mark the entry as recently used
+                os.utime(entry_path)
+                return result
+            except (FileNotFoundError, OSError, ValueError):
+                continue
+        return None
+
+    def store(self, stage_name: str, stage_fingerprint: str, result):
+        """
+        Writes the result of a stage and evicts above max_bytes.
+        Results Parquet or JSON cannot represent are not checkpointed.
+        """
+        entry_paths = self._entry_paths(stage_name, stage_fingerprint)
+        entry_path = entry_paths[
+            "parquet" if isinstance(result, pd.DataFrame) else "json"]
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        try:
+            if isinstance(result, pd.DataFrame):
+                result.to_parquet(temp_path, index=False)
+            else:
+                with open(temp_path, "w") as entry_file:
+                    json.dump(result, entry_file)
+            os.replace(temp_path, entry_path)
+        except Exception as e:
+            print(f"Checkpoint warning: {stage_name} not checkpointed: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the checkpoints
+        fit in max_bytes.
+        """
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.checkpoint_dir):
+                if entry.name.endswith((".parquet", ".json")):
+                    entry_stat = entry.stat()
+                    entries.append(
+                        (entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
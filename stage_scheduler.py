@@ -0,0 +1,276 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from stage_checkpoints import StageCheckpoints, fingerprint
+
+
+class StageScheduler:
+    """
+    Runs pipeline stages as a dependency graph.
+    Each stage declares the stages it takes as inputs; stages whose
+    inputs are ready run concurrently on a thread pool.
+    A stage fails when it raises or returns None (the pipeline methods
+    return None on errors), and every stage depending on it is skipped
+    instead of receiving None, unless the input is declared optional:
+    the stage then waits for it and receives None when it failed.
+    With checkpoints, results of stages declared with a checkpoint_key
+    are stored and restored on later runs while their fingerprint
+    (stage, code_version, checkpoint_key and input fingerprints) is
+    unchanged, so a rerun resumes from the first stale or failed stage.
+    Transient stages (e.g. raw sheet rows read for the transform and
+    quality stages) run on demand, when the first stage taking them as
+    input runs instead of being restored, and their result is released
+    once every such stage finished.
+    """
+
+    def __init__(
+            self,
+            checkpoints: StageCheckpoints = None,
+            code_version: str = ""):
+        self.stages = {}
+        self.checkpoint_keys = {}
+        self.optional_inputs = {}
+        self.transient_locks = {}
+        self.checkpoints = checkpoints
+        self.code_version = code_version
+        self.status = {}
+        self.results = {}
+        self.fingerprints = {}
+        self.restored = []
+        self.restore = True
+
+    def add_stage(
+            self,
+            stage_name: str,
+            function,
+            inputs: list = (),
+            checkpoint_key=None,
+            optional_inputs: list = (),
+            transient: bool = False):
+        """
+        Declares a stage. function is called with the results of
+        the input stages, in the order of inputs; optional_inputs (some
+        of inputs) are passed as None when they failed or were skipped.
+        checkpoint_key (a string, or a function returning one when the
+        stage is about to run) identifies the sources and settings the
+        stage reads besides its inputs; without it, or when an input
+        stage has none, the stage is not checkpointed.
+        A transient stage (without inputs) is never checkpointed: its
+        fingerprint is its checkpoint_key, so the stages taking it as
+        input are restored without running it. It is not returned by
+        run().
+        """
+        if stage_name in self.stages:
+            raise ValueError(f"Stage {stage_name} already declared")
+        if transient and inputs:
+            raise ValueError(
+                f"Transient stage {stage_name} cannot have inputs")
+        self.stages[stage_name] = (function, list(inputs))
+        unknown_optional = [
+            name for name in optional_inputs if name not in inputs]
+        if unknown_optional:
+            raise ValueError(
+                f"Stage {stage_name} optional inputs {unknown_optional} "
+                "are not inputs")
+        if optional_inputs:
+            self.optional_inputs[stage_name] = set(optional_inputs)
+        if checkpoint_key is not None:
+            self.checkpoint_keys[stage_name] = checkpoint_key
+        if transient:
+            self.transient_locks[stage_name] = threading.Lock()
+
+    def _validate(self):
+        for stage_name, (_, inputs) in self.stages.items():
+            unknown_inputs = [
+                name for name in inputs if name not in self.stages]
+            if unknown_inputs:
+                raise ValueError(
+                    f"Stage {stage_name} has unknown inputs {unknown_inputs}")
+
+    def required_stages(self, stage_names: list) -> list:
+        """
+        The given stages and every stage they depend on, directly or
+        through other stages, in declaration order.
+        """
+        unknown_names = [
+            name for name in stage_names if name not in self.stages]
+        if unknown_names:
+            raise ValueError(f"Unknown stages {unknown_names}")
+        required = set()
+        to_visit = list(stage_names)
+        while to_visit:
+            stage_name = to_visit.pop()
+            if stage_name not in required:
+                required.add(stage_name)
+                to_visit.extend(self.stages[stage_name][1])
+        return [name for name in self.stages if name in required]
+
+    def _fingerprint(self, stage_name: str) -> str:
+        """
+        Fingerprint of a stage whose inputs completed, None when the
+        stage is not checkpointed.
+        """
+        inputs = self.stages[stage_name][1]
+        for name in inputs:
+            if (name in self.transient_locks
+                    and name not in self.fingerprints
+                    and self.checkpoints is not None
+                    and name in self.checkpoint_keys):
+                self.fingerprints[name] = fingerprint(
+                    name, self.code_version, self._checkpoint_key(name))
+        input_fingerprints = [self.fingerprints.get(name) for name in inputs]
+        if (self.checkpoints is None
+                or stage_name not in self.checkpoint_keys
+                or None in input_fingerprints):
+            return None
+        self.fingerprints[stage_name] = fingerprint(
+            stage_name, self.code_version, self._checkpoint_key(stage_name),
+            *input_fingerprints)
+        return self.fingerprints[stage_name]
+
+    def _checkpoint_key(self, stage_name: str) -> str:
+        checkpoint_key = self.checkpoint_keys[stage_name]
+        if callable(checkpoint_key):
+            checkpoint_key = checkpoint_key()
+        return checkpoint_key
+
+    def _transient_result(self, stage_name: str):
+        """
+        Result of a transient stage, run by the first stage asking for it.
+        """
+        with self.transient_locks[stage_name]:
+            if self.status[stage_name] == "deferred":
+                try:
+                    result = self.stages[stage_name][0]()
+                except Exception as e:
+                    print(f"Error, stage {stage_name} failed: {str(e)}")
+                    result = None
+                if result is None:
+                    self.status[stage_name] = "failed"
+                else:
+                    self.status[stage_name] = "completed"
+                    self.results[stage_name] = result
+            return self.results.get(stage_name)
+
+    def _run_stage(self, stage_name: str):
+        function, inputs = self.stages[stage_name]
+        stage_fingerprint = self._fingerprint(stage_name)
+        if stage_fingerprint is not None and self.restore:
+            result = self.checkpoints.read(stage_name, stage_fingerprint)
+            if result is not None:
+                self.restored.append(stage_name)
+                print(f"{stage_name} restored from checkpoint")
+                return result
+
+        input_results = []
+        for name in inputs:
+            if name in self.transient_locks:
+                input_result = self._transient_result(name)
+                if (input_result is None and name
+                        not in self.optional_inputs.get(stage_name, ())):
+                    raise RuntimeError(f"input stage {name} failed")
+                input_results.append(input_result)
+            else:
+                input_results.append(self.results.get(name))
+        result = function(*input_results)
+        if result is not None and stage_fingerprint is not None:
+            self.checkpoints.store(stage_name, stage_fingerprint, result)
+        return result
+
+    def run(
+            self,
+            max_workers: int = 4,
+            stage_names: list = None,
+            restore: bool = True) -> dict:
+        """
+        Runs every stage (or only stage_names and the stages they
+        depend on) once its inputs completed.
+        1. Stages with a valid checkpoint are restored instead of run,
+        unless restore is False (every stage runs and refreshes its
+        checkpoint)
+        2. Stages with a failed or skipped input are skipped, unless
+        the input is optional
+        3. Returns {stage_name: result} of the completed stages (but
+        transient ones), self.status holds "completed", "failed" or
+        "skipped" per stage ("deferred" for a transient stage no stage
+        ran) and self.restored the stages read from checkpoints.
+        """
+        self._validate()
+        self.status = {}
+        self.results = {}
+        self.fingerprints = {}
+        self.restored = []
+        self.restore = restore
+        pending = dict(self.stages)
+        if stage_names is not None:
+            pending = {
+                name: self.stages[name]
+                for name in self.required_stages(stage_names)
+            }
+        # Transient stages are ready at once and run on demand; their
+        # result is kept until every stage taking it as input finished
+        consumers = {
+            name: sum(name in inputs for _, inputs in pending.values())
+            for name in self.transient_locks if name in pending
+        }
+        for name in consumers:
+            self.status[name] = "deferred"
+            del pending[name]
+
+        def release_inputs(stage_name):
+            for name in self.stages[stage_name][1]:
+                if name in consumers:
+                    consumers[name] -= 1
+                    if consumers[name] == 0:
+                        self.results.pop(name, None)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                # Schedule ready stages, repeat until skips stop propagating
+                changed = True
+                while changed:
+                    changed = False
+                    for stage_name, (_, inputs) in list(pending.items()):
+                        optional = self.optional_inputs.get(stage_name, ())
+                        input_status = {
+                            name: self.status.get(name) for name in inputs}
+                        if any(status in ("failed", "skipped")
+                               for name, status in input_status.items()
+                               if name not in optional):
+                            self.status[stage_name] = "skipped"
+                            print(f"Stage Scheduler Warning: {stage_name} "
+                                  "skipped, an input stage did not complete")
+                            release_inputs(stage_name)
+                        elif all(status is not None
+                                 for status in input_status.values()):
+                            future = executor.submit(
+                                self._run_stage, stage_name)
+                            running[future] = stage_name
+                        else:
+                            continue
+                        del pending[stage_name]
+                        changed = True
+
+                if not running:
+                    if pending:
+                        raise ValueError(
+                            f"Stages {sorted(pending)} have circular inputs")
+                    break
+
+                done_futures, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    stage_name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error, stage {stage_name} failed: {str(e)}")
+                        result = None
+                    if result is None:
+                        self.status[stage_name] = "failed"
+                    else:
+                        self.status[stage_name] = "completed"
+                        self.results[stage_name] = result
+                    release_inputs(stage_name)
+
+        return self.results
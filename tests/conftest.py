@@ -0,0 +1,44 @@
+import openpyxl
+import pytest
+
+from config import EXCEL_FILE_PATH
+
+# Client sheet of the case study workbook edited by the fixtures
+EDITED_SHEET = "Client1_2023-12-31"
+# Cell replaced by text in non_numeric_workbook: CRUD, 2023-02-28
+NON_NUMERIC_CELL = "C3"
+UNKNOWN_TICKER = "ZZZZ"
+
+
+def edited_workbook(tmp_path_factory, name: str, edit) -> str:
+    """
+    Copy of the case study workbook with edit(worksheet) applied to
+    EDITED_SHEET.
+    """
+    workbook = openpyxl.load_workbook(EXCEL_FILE_PATH)
+    edit(workbook[EDITED_SHEET])
+    file_path = str(tmp_path_factory.mktemp("workbooks") / f"{name}.xlsx")
+    workbook.save(file_path)
+    return file_path
+
+
+@pytest.fixture(scope="session")
+def non_numeric_workbook(tmp_path_factory) -> str:
+    """
+    Case study workbook with one holdings cell set to "abc".
+    """
+    def edit(worksheet):
+        worksheet[NON_NUMERIC_CELL] = "abc"
+
+    return edited_workbook(tmp_path_factory, "non_numeric", edit)
+
+
+@pytest.fixture(scope="session")
+def unknown_ticker_workbook(tmp_path_factory) -> str:
+    """
+    Case study workbook with a row of a ticker missing from WT Products.
+    """
+    def edit(worksheet):
+        worksheet.append([UNKNOWN_TICKER] + [100.0] * (worksheet.max_column - 1))
+
+    return edited_workbook(tmp_path_factory, "unknown_ticker", edit)
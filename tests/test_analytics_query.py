@@ -0,0 +1,48 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from analytics_query import AnalyticsQuery, create_query_server
+
+
+@pytest.fixture
+def query_url():
+    query = AnalyticsQuery()
+    query.publish(pd.DataFrame({
+        "client_id": ["client1", "client1"],
+        "product_id": [1001310, 1001310],
+        "month_date": pd.to_datetime(["2024-01-31", "2024-02-29"]),
+        "share_change": [None, 10.0],
+        "net_flow": [None, 250.0],
+        "market_movement": [None, -5.0],
+    }))
+    server = create_query_server(query, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url: str) -> tuple:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_flows_by_product(query_url):
+    status, records = get(f"{query_url}/flows?product_id=1001310")
+    assert status == 200
+    assert [record["net_flow"] for record in records] == [None, 250.0]
+
+
+def test_bad_product_id_returns_400(query_url):
+    status, body = get(f"{query_url}/flows?product_id=abc")
+    assert status == 400
+    assert "product_id" in body["error"]
@@ -0,0 +1,48 @@
+import pytest
+
+import transformations
+from benchmarks.bench_pipeline import SCALES
+from benchmarks.check_backend_parity import compare_outputs, run_backend
+from benchmarks.synthetic_workbook import generate_workbook
+from config import EXCEL_FILE_PATH
+from duckdb_backend import DuckDBBackend, duckdb_available
+
+pytestmark = pytest.mark.skipif(
+    not duckdb_available(), reason="duckdb and pyarrow not installed")
+
+# Mode -> (NAV_ACCESS_MODE, COMPACT_DTYPES_ENABLED)
+MODES = {
+    "dense": ("dense", False),
+    "sparse": ("sparse", False),
+    "compact": ("dense", True),
+}
+
+
+@pytest.fixture(scope="module")
+def workbooks(tmp_path_factory) -> dict:
+    small_path = str(tmp_path_factory.mktemp("workbooks") / "small.xlsx")
+    generate_workbook(small_path, **SCALES["small"])
+    return {"case_study": EXCEL_FILE_PATH, "small": small_path}
+
+
+@pytest.mark.parametrize("workbook", ["case_study", "small"])
+@pytest.mark.parametrize("mode", list(MODES))
+def test_backends_produce_the_same_outputs(
+        workbooks, workbook, mode, monkeypatch):
+    nav_access_mode, compact = MODES[mode]
+    monkeypatch.setattr(transformations, "NAV_ACCESS_MODE", nav_access_mode)
+    monkeypatch.setattr(transformations, "COMPACT_DTYPES_ENABLED", compact)
+    monkeypatch.setattr(transformations, "SHEET_CACHE_ENABLED", False)
+
+    pandas_outputs, _ = run_backend(workbooks[workbook], None)
+    sql_outputs, _ = run_backend(workbooks[workbook], DuckDBBackend(threads=2))
+
+    assert set(pandas_outputs) == {
+        "nav", "expense_ratios", "holdings", "analytics"}
+    for outputs in [pandas_outputs, sql_outputs]:
+        # The mode is applied by both backends
+        assert (not outputs["nav"]["is_nav_backfilled"].any()) == (
+            mode == "sparse")
+        assert (outputs["analytics"]["assets_under_management"].dtype
+                == ("float32" if compact else "float64"))
+    assert compare_outputs(pandas_outputs, sql_outputs) == []
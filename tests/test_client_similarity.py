@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from client_similarity import ClientSimilarity
+
+
+def activity(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["client_id", "month_date", "net_flow"])
+
+
+def test_refresh_detects_dropped_month():
+    january, february = pd.Timestamp("2024-01-31"), pd.Timestamp("2024-02-29")
+    analytics_df = activity([
+        ("client1", january, 5.0),
+        ("client1", february, 1.0),
+        ("client2", january, 1.0),
+        ("client2", february, 1.0),
+        ("client3", january, 0.0),
+        ("client3", february, 2.0),
+    ])
+    similarity = ClientSimilarity().fit(analytics_df)
+
+    # January drops out: client1 and client2 lose their January activity;
+    # client3 had none, its unit row is unchanged
+    refreshed_df = analytics_df[analytics_df["month_date"] == february]
+    changed_clients = similarity.refresh(refreshed_df)
+
+    assert sorted(changed_clients) == ["client1", "client2"]
+    expected_df = ClientSimilarity().fit(refreshed_df).similarity_df()
+    np.testing.assert_allclose(
+        similarity.similarity_df().loc[
+            expected_df.index, expected_df.columns].to_numpy(),
+        expected_df.to_numpy(), atol=1e-6)
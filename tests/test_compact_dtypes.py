@@ -0,0 +1,79 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import transformations
+from compact_dtypes import COMPACT_FLOAT_RTOL
+from config import EXCEL_FILE_PATH
+
+# Compared within COMPACT_FLOAT_RTOL relative
+RELATIVE_COLUMNS = [
+    "net_asset_value",
+    "assets_under_management",
+    "daily_revenue",
+    "accrued_revenue",
+]
+# Differences of AUM sized values: within COMPACT_FLOAT_RTOL of the AUM
+AUM_SCALED_PREFIXES = ("net_flow", "market_movement")
+EXACT_COLUMNS = ["holdings", "share_change"]
+
+
+def run_analytics(monkeypatch, compact: bool) -> pd.DataFrame:
+    monkeypatch.setattr(transformations, "COMPACT_DTYPES_ENABLED", compact)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = transformations.WisdomTreeDataPipeline(EXCEL_FILE_PATH)
+        pipeline.sheet_cache = None
+        nav_df = pipeline.extract_nav()
+        expense_df = pipeline.extract_expense_ratios(nav_df)
+        holdings_df = pipeline.process_client_holdings()
+        return pipeline.transform_monthly_analytics(
+            expense_df, holdings_df, nav_df)
+
+
+@pytest.fixture(scope="module")
+def analytics_pair():
+    monkeypatch = pytest.MonkeyPatch()
+    try:
+        yield run_analytics(monkeypatch, False), run_analytics(monkeypatch, True)
+    finally:
+        monkeypatch.undo()
+
+
+def test_compact_keys_match(analytics_pair):
+    full_df, compact_df = analytics_pair
+    assert isinstance(compact_df["client_id"].dtype, pd.CategoricalDtype)
+    assert compact_df["assets_under_management"].dtype == "float32"
+    assert compact_df["net_flow_12m"].dtype == "float32"
+    assert (compact_df.memory_usage(deep=True).sum()
+            < full_df.memory_usage(deep=True).sum())
+    for column in ["client_id", "product_id", "month_date"]:
+        assert (compact_df[column].astype(full_df[column].dtype)
+                == full_df[column]).all()
+
+
+def test_compact_values_within_tolerance(analytics_pair):
+    full_df, compact_df = analytics_pair
+    for column in EXACT_COLUMNS:
+        np.testing.assert_array_equal(compact_df[column], full_df[column])
+    for column in RELATIVE_COLUMNS:
+        np.testing.assert_allclose(
+            compact_df[column], full_df[column], rtol=COMPACT_FLOAT_RTOL)
+
+    aum_tolerance = COMPACT_FLOAT_RTOL * full_df[
+        "assets_under_management"].abs().to_numpy()
+    aum_scaled_columns = [
+        column for column in full_df.columns
+        if column.startswith(AUM_SCALED_PREFIXES)
+    ]
+    assert aum_scaled_columns
+    for column in aum_scaled_columns:
+        full_values = full_df[column].to_numpy(float)
+        compact_values = compact_df[column].to_numpy(float)
+        np.testing.assert_array_equal(
+            np.isnan(compact_values), np.isnan(full_values))
+        differences = np.abs(compact_values - full_values)
+        assert np.all(np.isnan(differences) | (differences <= aum_tolerance)), (
+            column)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from duckdb_backend import (
+    POSITION_COLUMN, DuckDBBackend, _with_positions, duckdb_available)
+
+
+def test_registered_frame_shares_input_columns():
+    input_df = pd.DataFrame({
+        "product_id": np.arange(5),
+        "net_asset_value": np.linspace(10.0, 14.0, 5),
+    })
+    registered_df = _with_positions(input_df)
+
+    assert registered_df[POSITION_COLUMN].tolist() == [0, 1, 2, 3, 4]
+    for column in input_df.columns:
+        assert np.shares_memory(
+            registered_df[column].to_numpy(), input_df[column].to_numpy())
+    assert POSITION_COLUMN not in input_df.columns
+
+
+@pytest.mark.skipif(not duckdb_available(), reason="duckdb not installed")
+def test_query_reads_registered_frame():
+    input_df = pd.DataFrame({
+        "ticker": ["B", "A", "B"],
+        "value": [1.0, 2.0, 3.0],
+    })
+    output_df = DuckDBBackend(threads=1)._query(
+        f"""
+            SELECT ticker, value FROM input_table
+            ORDER BY ticker, {POSITION_COLUMN}
+        """,
+        {"input_table": input_df},
+    )
+
+    assert output_df["ticker"].tolist() == ["A", "B", "B"]
+    assert output_df["value"].tolist() == [2.0, 1.0, 3.0]
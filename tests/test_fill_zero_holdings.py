@@ -0,0 +1,51 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from config import EXCEL_FILE_PATH
+from duckdb_backend import DuckDBBackend, duckdb_available
+from transformations import WisdomTreeDataPipeline
+
+
+def process_holdings(file_path: str, sql_backend=None) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = WisdomTreeDataPipeline(file_path)
+        pipeline.sheet_cache = None
+        pipeline.sql_backend = sql_backend
+        return pipeline.process_client_holdings()
+
+
+def holdings_at(holdings_df, quarter_date, product_id, month_date) -> pd.Series:
+    return holdings_df[
+        (holdings_df["client_id"] == "client1")
+        & (holdings_df["quarter_date"] == pd.Timestamp(quarter_date))
+        & (holdings_df["product_id"] == product_id)
+        & (holdings_df["month_date"] == pd.Timestamp(month_date))
+    ].iloc[0]
+
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb"])
+def test_non_numeric_cell_is_backfilled(non_numeric_workbook, backend):
+    sql_backend = None
+    if backend == "duckdb":
+        if not duckdb_available():
+            pytest.skip("duckdb is not installed")
+        sql_backend = DuckDBBackend(1, "1GB", "")
+    clean_df = process_holdings(EXCEL_FILE_PATH)
+    holdings_df = process_holdings(non_numeric_workbook, sql_backend)
+
+    assert holdings_df is not None
+    assert len(holdings_df) == len(clean_df)
+
+    products_df = WisdomTreeDataPipeline(EXCEL_FILE_PATH).products_table
+    product_id = int(products_df.loc[
+        products_df["ticker"] == "CRUD", "product_id"].iloc[0])
+    bad_row = holdings_at(holdings_df, "2023-12-31", product_id, "2023-02-28")
+    previous_month_row = holdings_at(
+        clean_df, "2023-12-31", product_id, "2023-01-31")
+    # Counted as blank: 0, then (first quarter, no previous quarter)
+    # the previous month's value
+    assert bad_row["is_holdings_backfilled"]
+    assert bad_row["holdings"] == pytest.approx(previous_month_row["holdings"])
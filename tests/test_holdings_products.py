@@ -0,0 +1,24 @@
+import contextlib
+import io
+
+from config import EXCEL_FILE_PATH
+from transformations import WisdomTreeDataPipeline
+
+
+def process_holdings(file_path: str) -> tuple:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        pipeline = WisdomTreeDataPipeline(file_path)
+        pipeline.sheet_cache = None
+        holdings_df = pipeline.process_client_holdings()
+    return holdings_df, output.getvalue()
+
+
+def test_unknown_ticker_rows_are_dropped_with_a_warning(unknown_ticker_workbook):
+    clean_df, _ = process_holdings(EXCEL_FILE_PATH)
+    holdings_df, output = process_holdings(unknown_ticker_workbook)
+
+    assert len(holdings_df) == len(clean_df)
+    assert holdings_df["product_id"].notna().all()
+    assert "12 rows of tickers not in WT Products dropped" in output
+    assert "['ZZZZ']" in output
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+from config import EXCEL_FILE_PATH
+from output_writers import client_output_path
+from transformations import WisdomTreeDataPipeline
+
+
+def test_client_output_path():
+    assert client_output_path("outputs/holdings.xlsx") == "outputs/holdings.xlsx"
+    assert (client_output_path("outputs/holdings.xlsx", ["client3", "client1"])
+            == "outputs/holdings_client1_client3.xlsx")
+
+
+def test_client_run_keeps_full_outputs(tmp_path, monkeypatch):
+    full_path = tmp_path / "holdings_output.csv"
+    full_path.write_text("full run\n")
+    monkeypatch.setattr(main, "HOLDINGS_OUTPUT_FILE_PATH", str(full_path))
+    monkeypatch.setattr(main, "OUTPUT_FORMATS", ["csv"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = WisdomTreeDataPipeline(
+            EXCEL_FILE_PATH, client_ids=["client1"])
+        pipeline.sheet_cache = None
+        scheduler = main.build_scheduler(pipeline, quality_checks=False)
+        scheduler.run(max_workers=2, stage_names=["write_holdings"])
+
+    assert full_path.read_text() == "full run\n"
+    client_path = tmp_path / "holdings_output_client1.csv"
+    assert "client1" in client_path.read_text()
+
+
+def test_unknown_client_ids_exit_with_error():
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(["--clients", "client1,client9", "--stages", "holdings"])
+
+    assert "['client9']" in str(exit_info.value)
+    assert "have no client sheets" in str(exit_info.value)
+
+
+def test_feature_modules_are_imported_on_use():
+    feature_modules = [
+        "client_similarity", "compact_dtypes", "duckdb_backend",
+        "holdings_store", "nav_lookup", "quality_rules", "revenue_accrual",
+        "window_engine",
+    ]
+    loaded = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, main; "
+         f"print([m for m in {feature_modules!r} if m in sys.modules])"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(main.__file__)),
+    ).stdout.strip()
+
+    assert loaded == "[]"
@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+
+import main
+from stage_checkpoints import StageCheckpoints
+from transformations import WisdomTreeDataPipeline
+
+
+def run_quality(
+        file_path: str,
+        tmp_path,
+        monkeypatch,
+        edit=None,
+        checkpoints: StageCheckpoints = None) -> tuple:
+    """
+    Runs the write_quality stage and the stages it needs on file_path,
+    returns (quality report rules by name, scheduler).
+    """
+    report_path = tmp_path / "quality_report.json"
+    monkeypatch.setattr(main, "QUALITY_REPORT_PATH", str(report_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = WisdomTreeDataPipeline(file_path)
+        pipeline.sheet_cache = None
+        if edit is not None:
+            edit(pipeline)
+        scheduler = main.build_scheduler(
+            pipeline, quality_checks=True, checkpoints=checkpoints)
+        scheduler.run(max_workers=2, stage_names=["write_quality"])
+    with open(report_path) as report_file:
+        report = json.load(report_file)
+    return {rule["rule"]: rule for rule in report["rules"]}, scheduler
+
+
+def test_non_numeric_holdings_rule_fires(
+        non_numeric_workbook, tmp_path, monkeypatch):
+    rules, scheduler = run_quality(
+        non_numeric_workbook, tmp_path, monkeypatch)
+
+    assert scheduler.status["holdings"] == "completed"
+    assert rules["non_numeric_holdings"]["rows_flagged"] == 1
+    assert "holdings_backfilled" in rules
+    # Raw rows are not kept once their stages finished
+    assert "reported_holdings" not in scheduler.results
+
+
+def test_raw_holdings_rules_reported_when_holdings_stage_fails(
+        non_numeric_workbook, tmp_path, monkeypatch):
+    def fail_products_merge(pipeline):
+        def add_holdings_product_id(holdings_df):
+            raise ValueError("products table unavailable")
+        pipeline.add_holdings_product_id = add_holdings_product_id
+
+    rules, scheduler = run_quality(
+        non_numeric_workbook, tmp_path, monkeypatch, fail_products_merge)
+
+    assert scheduler.status["holdings"] == "failed"
+    assert scheduler.status["quality_reported_holdings"] == "completed"
+    assert rules["non_numeric_holdings"]["rows_flagged"] == 1
+    assert "holdings_backfilled" not in rules
+
+
+def test_restored_run_does_not_read_raw_rows(
+        non_numeric_workbook, tmp_path, monkeypatch):
+    checkpoints = StageCheckpoints(str(tmp_path / "checkpoints"), 1 << 30)
+    rules, _ = run_quality(
+        non_numeric_workbook, tmp_path, monkeypatch, checkpoints=checkpoints)
+    restored_rules, scheduler = run_quality(
+        non_numeric_workbook, tmp_path, monkeypatch, checkpoints=checkpoints)
+
+    assert restored_rules == rules
+    assert scheduler.status["observed_nav"] == "deferred"
+    assert scheduler.status["reported_holdings"] == "deferred"
+    assert "quality_reported_holdings" in scheduler.restored
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from revenue_accrual import ExpenseRatioIntervals
+
+
+def test_ratio_at_uses_effective_dated_intervals():
+    expense_intervals = ExpenseRatioIntervals(pd.DataFrame({
+        "product_id": [1, 1, 2],
+        "expense_ratio": [0.004, 0.003, 0.005],
+        "last_modified_date": pd.to_datetime(
+            ["2024-01-01", "2024-06-30", "2023-03-01"]),
+    }))
+
+    ratios, is_backfilled = expense_intervals.ratio_at(
+        [1, 1, 1, 1, 2, 3, 2],
+        pd.to_datetime([
+            "2023-12-29", "2024-06-28", "2024-06-30", "2030-01-01",
+            "2024-06-30", "2024-06-30", None,
+        ]),
+    )
+
+    np.testing.assert_array_equal(
+        ratios, [0.004, 0.004, 0.003, 0.003, 0.005, np.nan, np.nan])
+    np.testing.assert_array_equal(
+        is_backfilled, [True, False, False, False, False, False, False])
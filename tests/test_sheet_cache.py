@@ -0,0 +1,48 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+from sheet_cache import SheetCache, fingerprint_workbook_sheets
+
+
+def write_workbook(file_path, rows):
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Client1_2023-12-31"
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(file_path)
+
+
+def test_mixed_type_column_is_cached(tmp_path, capsys):
+    # Sheets are cached as Parquet, with the optional pyarrow dependency
+    pytest.importorskip("pyarrow")
+    file_path = str(tmp_path / "workbook.xlsx")
+    write_workbook(file_path, [
+        ["ticker", "2023-01-31", "2023-02-28"],
+        ["BRNT", 100, 1.5],
+        ["CRUD", "abc", None],
+        ["GGRA", 300, 2.5],
+    ])
+    sheet_name = "Client1_2023-12-31"
+    parsed_df = pd.read_excel(file_path, sheet_name=sheet_name)
+    cache = SheetCache(str(tmp_path / "cache"), 1 << 30)
+
+    cache.store_sheets(file_path, {sheet_name: parsed_df})
+    cached_dict, missing_sheets = cache.read_cached_sheets(
+        file_path, [sheet_name])
+
+    assert "not cached" not in capsys.readouterr().out
+    assert missing_sheets == []
+    cached_df = cached_dict[sheet_name]
+    pd.testing.assert_frame_equal(cached_df, parsed_df)
+    assert [type(value) for value in cached_df["2023-01-31"]] == [
+        type(value) for value in parsed_df["2023-01-31"]]
+
+
+def test_fingerprint_changes_with_sheet(tmp_path):
+    file_path = str(tmp_path / "workbook.xlsx")
+    write_workbook(file_path, [["ticker", "2023-01-31"], ["BRNT", 100]])
+    before = fingerprint_workbook_sheets(file_path)
+    write_workbook(file_path, [["ticker", "2023-01-31"], ["BRNT", 200]])
+    assert fingerprint_workbook_sheets(file_path) != before
@@ -0,0 +1,53 @@
+import contextlib
+import io
+
+from stage_scheduler import StageScheduler
+
+
+def run(scheduler: StageScheduler, **kwargs) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return scheduler.run(**kwargs)
+
+
+def test_optional_input_passed_as_none_when_failed():
+    scheduler = StageScheduler()
+    scheduler.add_stage("source", lambda: None)
+    scheduler.add_stage(
+        "check", lambda source: ["checked", source], inputs=["source"],
+        optional_inputs=["source"])
+    scheduler.add_stage("use", lambda source: source, inputs=["source"])
+    results = run(scheduler)
+
+    assert scheduler.status["source"] == "failed"
+    assert results["check"] == ["checked", None]
+    assert scheduler.status["use"] == "skipped"
+
+
+def test_transient_stage_runs_once_and_is_released():
+    calls = []
+
+    def read_rows():
+        calls.append("read")
+        return [1, 2, 3]
+
+    scheduler = StageScheduler()
+    scheduler.add_stage("rows", read_rows, transient=True)
+    scheduler.add_stage("total", sum, inputs=["rows"])
+    scheduler.add_stage("count", len, inputs=["rows"])
+    results = run(scheduler)
+
+    assert calls == ["read"]
+    assert results == {"total": 6, "count": 3}
+    assert scheduler.status["rows"] == "completed"
+
+
+def test_failed_transient_stage_fails_its_consumers():
+    scheduler = StageScheduler()
+    scheduler.add_stage("rows", lambda: None, transient=True)
+    scheduler.add_stage("total", sum, inputs=["rows"])
+    scheduler.add_stage("report", str, inputs=["total"])
+    run(scheduler)
+
+    assert scheduler.status["rows"] == "failed"
+    assert scheduler.status["total"] == "failed"
+    assert scheduler.status["report"] == "skipped"
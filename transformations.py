@@ -1,5 +1,59 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 
+from config import (
+    COMPACT_DTYPES_ENABLED,
+    CORPORATE_ACTIONS_FILE_PATH,
+    CORPORATE_ACTIONS_SHARE_BASIS,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIRECTORY,
+    DUCKDB_THREADS,
+    HOLDINGS_LOAD_WORKERS,
+    HOLDINGS_WORKBOOKS_PATH,
+    INSTRUMENTATION_ENABLED,
+    INSTRUMENTATION_PROFILE,
+    INSTRUMENTATION_TRACE_MEMORY,
+    NAV_ACCESS_MODE,
+    SHEET_CACHE_DIR,
+    SHEET_CACHE_ENABLED,
+    SHEET_CACHE_MAX_MB,
+    STREAMING_CHUNK_ROWS,
+    STREAMING_READ_ENABLED,
+    TRANSFORM_BACKEND,
+)
+from corporate_actions import CorporateActions, read_corporate_actions
+from date_normalization import normalize_holdings_dates, normalize_nav_dates
+from fill_kernels import (
+    fill_groups,
+    group_start_mask,
+    previous_positions,
+)
+from instrumentation import RunInstrumentation, instrument_stage
+from sheet_cache import (
+    SheetCache,
+    fingerprint_workbook_sheets,
+    parquet_available,
+)
+from sheet_loader import (
+    build_client_sheet_catalog,
+    build_workbook_catalog,
+    iter_sheet_chunks,
+    load_sheets,
+    load_workbook_sheets,
+    resolve_workbook_paths,
+)
+from stage_checkpoints import file_fingerprint, fingerprint
+
+# Feature modules (SQL backend, compact dtypes, analytics, quality rules,
+# client similarity) are imported by the methods that use them, so a
+# NAV-only run does not load them
+if TYPE_CHECKING:
+    from client_similarity import ClientSimilarity
+
 
 class WisdomTreeDataPipeline:
     """
@@ -14,68 +68,272 @@ class WisdomTreeDataPipeline:
     reporting cycle.
     """
 
-    def __init__(self, file_path):
+    def __init__(
+            self,
+            file_path,
+            instrumentation: RunInstrumentation = None,
+            client_ids: list = None):
         self.file_path = file_path
-        self.excel_file = pd.ExcelFile(file_path)
-        self.products_table = self.extract_products()
+        # Clients whose holdings sheets are processed (None: all),
+        # lower case like the client_id column
+        self.client_ids = None
+        if client_ids is not None:
+            self.client_ids = [client_id.lower() for client_id in client_ids]
+        if instrumentation is None:
+            instrumentation = RunInstrumentation(
+                enabled=INSTRUMENTATION_ENABLED,
+                trace_memory=INSTRUMENTATION_TRACE_MEMORY,
+                profile=INSTRUMENTATION_PROFILE,
+            )
+        self.instrumentation = instrumentation
+        # Workbook and reference tables are opened on first use
+        # (excel_file, corporate_actions and products_table properties),
+        # so a partial run only reads what its stages need
+        self._excel_file = None
+        self._corporate_actions = None
+        self._products_table = None
+        self._sheet_fingerprints = {}
+        self._lazy_lock = threading.RLock()
+        self.sheet_cache = None
+        if SHEET_CACHE_ENABLED and parquet_available():
+            self.sheet_cache = SheetCache(
+                SHEET_CACHE_DIR, SHEET_CACHE_MAX_MB * 1024 * 1024)
+        # SQL backend of the fill and analytics stages (TRANSFORM_BACKEND)
+        self.sql_backend = None
+        if TRANSFORM_BACKEND == "duckdb":
+            from duckdb_backend import DuckDBBackend, duckdb_available
+
+            if duckdb_available():
+                self.sql_backend = DuckDBBackend(
+                    DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIRECTORY)
+            else:
+                print(
+                    "Transform Backend Warning: duckdb or pyarrow is not "
+                    "installed, running the pandas backend")
+        # Expense ratio intervals, set by extract_expense_ratios()
+        self.expense_intervals = None
+        # Cached client similarity, set by compute_client_similarity()
+        self.client_similarity = None
+        # Missing months of the last processed client quarters
+        self.missing_months_df = pd.DataFrame(
+            columns=["client_id", "quarter_date", "month_date"])
         # self.expense_ratios_table = self.extract_expense_ratios()
 
-    def nav_format_and_convert_date(self, date_string: str):
+    @property
+    def excel_file(self) -> pd.ExcelFile:
         """
-        Check if the first part of the date is >= 12,
-        then reformat and convert to datetime to y-m-d.
+        Pipeline workbook, opened on first use. Not opened at all when
+        every sheet is served from the sheet cache.
         """
-        try:
-            if "/" in date_string:
-                date_part = date_string.split("/")
-            else:
-                date_part = date_string.split("-")
-
-            if len(date_part) == 3 and int(date_part[0]) > 12:
-                formatted_date = f"{date_part[2]
-                                    }-{date_part[1]}-{date_part[0]}"
+        with self._lazy_lock:
+            if self._excel_file is None:
+                self._excel_file = pd.ExcelFile(self.file_path)
+            return self._excel_file
 
-            else:
-                formatted_date = f"{date_part[2]
-                                    }-{date_part[0]}-{date_part[1]}"
-
-            return pd.to_datetime(formatted_date, format="%Y-%m-%d", errors="coerce")
-        except Exception as e:
-            print(f"Error, nav_format_and_convert_date() failed: {str(e)}")
-            return None
-
-    def holdings_format_and_convert_date(self, date_string: str):
+    @property
+    def corporate_actions(self) -> CorporateActions:
         """
-        Check if the middle part of the date is >= 12,
-        then reformat and convert to datetime to y-m-d.
+        Splits and fee changes applied to holdings, NAV and expenses,
+        read on first use.
         """
-        try:
-            if "/" in date_string:
-                date_part = date_string.split("/")
-            else:
-                date_part = date_string.split("-")
+        with self._lazy_lock:
+            if self._corporate_actions is None:
+                self._corporate_actions = CorporateActions(
+                    read_corporate_actions(CORPORATE_ACTIONS_FILE_PATH))
+            return self._corporate_actions
+
+    @property
+    def products_table(self) -> pd.DataFrame:
+        """
+        WT Products table, extracted on first use.
+        """
+        with self._lazy_lock:
+            if self._products_table is None:
+                self._products_table = self.extract_products()
+            return self._products_table
 
-            if len(date_part) == 3 and int(date_part[1]) > 12:
-                formatted_date = f"{date_part[0]
-                                    }-{date_part[2]}-{date_part[1]}"
-            else:
-                # Keep original format if condition is not met
-                formatted_date = date_string
+    def sheet_fingerprints(self, file_path: str) -> dict:
+        """
+        {sheet_name: fingerprint} of a workbook, from its zip directory
+        (fingerprint_workbook_sheets()), computed once per file version.
+        """
+        file_stat = os.stat(file_path)
+        version_key = (os.path.abspath(file_path),
+                       file_stat.st_mtime_ns, file_stat.st_size)
+        with self._lazy_lock:
+            if version_key not in self._sheet_fingerprints:
+                self._sheet_fingerprints[version_key] = (
+                    fingerprint_workbook_sheets(file_path))
+            return self._sheet_fingerprints[version_key]
+
+    def checkpoint_key(self, stage_name: str) -> str:
+        """
+        Fingerprint of what a stage reads besides its input stages, used
+        as its checkpoint key (StageScheduler.add_stage()):
+        1. Settings that change results, for every stage
+        2. "observed_nav": the NAV Data sheet
+        3. "reported_holdings": every client sheet processed and the
+        selected clients
+        4. "nav", "expense", "holdings": the corporate actions file, and
+        the WT Expense Ratios sheet (expense) or WT Products sheet
+        (holdings).
+        """
+        key_parts = [
+            stage_name,
+            NAV_ACCESS_MODE,
+            COMPACT_DTYPES_ENABLED,
+            CORPORATE_ACTIONS_SHARE_BASIS,
+            TRANSFORM_BACKEND,
+        ]
+        if stage_name in ["nav", "expense", "holdings"]:
+            key_parts.append(file_fingerprint(CORPORATE_ACTIONS_FILE_PATH))
+        workbook_sheets = {
+            "observed_nav": "NAV Data",
+            "expense": "WT Expense Ratios",
+            "holdings": "WT Products",
+        }
+        if stage_name in workbook_sheets:
+            key_parts.append(self.sheet_fingerprints(
+                self.file_path)[workbook_sheets[stage_name]])
+        if stage_name == "reported_holdings":
+            key_parts.append(self.client_ids)
+            key_parts += [
+                (file_path, sheet_name,
+                 self.sheet_fingerprints(file_path)[sheet_name])
+                for _, _, file_path, sheet_name
+                in self.client_workbook_catalog()
+            ]
+        return fingerprint(*key_parts)
 
-            return pd.to_datetime(formatted_date, format="%Y-%m-%d", errors="coerce")
-        except Exception as e:
-            print(
-                f"Error, holdings_format_and_convert_date() failed: {str(e)}")
-            return None
+    def read_sheets(
+            self,
+            sheet_names: list,
+            max_workers: int = 1,
+            file_path: str = None) -> dict:
+        """
+        Reads workbook sheets into {sheet_name: DataFrame}.
+        Sheets are served from the Parquet sheet cache when enabled
+        and only the missing or changed ones are parsed.
+        Reads from the pipeline workbook unless file_path is given.
+        """
+        parsed_seconds = {}
+        cached_seconds = {}
+
+        def parse_sheets(names):
+            if file_path is not None or max_workers > 1:
+                return load_sheets(
+                    source_path, names, max_workers, parsed_seconds)
+            return load_sheets(
+                self.excel_file, names, sheet_seconds=parsed_seconds)
+
+        source_path = self.file_path if file_path is None else file_path
+        if self.sheet_cache is None:
+            sheets_dict = parse_sheets(sheet_names)
+        else:
+            sheets_dict = self.sheet_cache.read_sheets(
+                source_path, sheet_names, parse_sheets, cached_seconds)
+
+        for sheet, seconds in parsed_seconds.items():
+            self.instrumentation.record_sheet_load(sheet, seconds, "workbook")
+        for sheet, seconds in cached_seconds.items():
+            self.instrumentation.record_sheet_load(sheet, seconds, "cache")
+
+        return sheets_dict
+
+    def read_workbook_sheets(
+            self,
+            workbook_catalog: list,
+            max_workers: int = 1) -> dict:
+        """
+        Reads the sheets of a build_workbook_catalog() catalog, from
+        several workbooks, into {(file_path, sheet_name): DataFrame}.
+        Cached sheets are read from the sheet cache, the others of all
+        workbooks are parsed together in one process pool.
+        """
+        workbook_sheets = {}
+        for _, _, file_path, sheet_name in workbook_catalog:
+            workbook_sheets.setdefault(file_path, []).append(sheet_name)
+
+        sheets_dict = {}
+        missing_sheets = workbook_sheets
+        cached_seconds = {}
+        if self.sheet_cache is not None:
+            missing_sheets = {}
+            for file_path, sheet_names in workbook_sheets.items():
+                cached_dict, missing_sheets[file_path] = (
+                    self.sheet_cache.read_cached_sheets(
+                        file_path, sheet_names, cached_seconds))
+                sheets_dict.update(
+                    {(file_path, sheet): df for sheet, df in cached_dict.items()})
+                for sheet, seconds in cached_seconds.items():
+                    self.instrumentation.record_sheet_load(
+                        f"{os.path.basename(file_path)}/{sheet}",
+                        seconds, "cache")
+                cached_seconds.clear()
+
+        parsed_seconds = {}
+        parsed_dict = load_workbook_sheets(
+            missing_sheets, max_workers, parsed_seconds)
+        sheets_dict.update(parsed_dict)
+        if self.sheet_cache is not None:
+            for file_path in missing_sheets:
+                self.sheet_cache.store_sheets(file_path, {
+                    sheet: parsed_dict[(file_path, sheet)]
+                    for sheet in missing_sheets[file_path]
+                })
+        for (file_path, sheet), seconds in parsed_seconds.items():
+            self.instrumentation.record_sheet_load(
+                f"{os.path.basename(file_path)}/{sheet}", seconds, "workbook")
+
+        return sheets_dict
+
+    def client_workbook_catalog(self) -> list:
+        """
+        (client_id, quarter_date, file_path, sheet_name) keys of the client
+        sheets to process: the workbooks of HOLDINGS_WORKBOOKS_PATH
+        (directory or glob) when set, else the pipeline workbook.
+        Only the sheets of self.client_ids when set.
+        """
+        catalog = self.full_client_workbook_catalog()
+        if self.client_ids is not None:
+            catalog = [
+                key for key in catalog if key[0].lower() in self.client_ids]
+        return catalog
 
+    def full_client_workbook_catalog(self) -> list:
+        """
+        client_workbook_catalog() keys of every client.
+        """
+        if HOLDINGS_WORKBOOKS_PATH:
+            return build_workbook_catalog(
+                resolve_workbook_paths(HOLDINGS_WORKBOOKS_PATH))
+        return [
+            (client_id, quarter_date, self.file_path, sheet_name)
+            for client_id, quarter_date, sheet_name
+            in build_client_sheet_catalog(
+                list(self.sheet_fingerprints(self.file_path)))
+        ]
+
+    def unknown_client_ids(self) -> list:
+        """
+        Client ids of self.client_ids without any client sheet.
+        """
+        if self.client_ids is None:
+            return []
+        known_ids = {
+            key[0].lower() for key in self.full_client_workbook_catalog()}
+        return [
+            client_id for client_id in self.client_ids
+            if client_id not in known_ids]
+
+    @instrument_stage
     def extract_products(self) -> pd.DataFrame:
         """
         1.Extracts WT Products table
         2.Renames columns.
         """
         try:
-            products_df = pd.read_excel(
-                self.excel_file, sheet_name="WT Products")
+            products_df = self.read_sheets(["WT Products"])["WT Products"]
             products_df = products_df.rename(
                 columns={
                     "WT ID": "product_id",
@@ -88,6 +346,7 @@ class WisdomTreeDataPipeline:
             print(f"Error, extract_products_data() failed: {str(e)}")
             return None
 
+    @instrument_stage
     def adjust_expense_ratio(
             self,
             input_raw_expense_df: pd.DataFrame,
@@ -97,6 +356,10 @@ class WisdomTreeDataPipeline:
         Backfills expense ratios data of missing dates and NAV values
         """
         try:
+            if self.sql_backend is not None:
+                return self.sql_backend.adjust_expense_ratio(
+                    input_raw_expense_df, input_nav_df)
+
             # Date range to get missing dates
             start_year = input_nav_df["market_date"].min().year
             end_year = input_nav_df["market_date"].max().year
@@ -124,46 +387,68 @@ class WisdomTreeDataPipeline:
                 complete_index
             )
 
-            # Backward fill expense values within each product_id
-            expense_ratios_df = expense_ratios_df.sort_values(
-                ["last_modified_date"]).reset_index()
-
-            expense_ratios_df["is_expense_ratios_backfilled"] = (
-                expense_ratios_df["expense_ratio"].isna().astype(bool)
+            # Backward fill, then forward fill remaining nulls, expense
+            # values within each product_id (rows are grouped by product
+            # and sorted by date by the reindex)
+            expense_ratios_df = expense_ratios_df.reset_index()
+            (
+                expense_ratios_df["expense_ratio"],
+                expense_ratios_df["is_expense_ratios_backfilled"],
+            ) = fill_groups(
+                expense_ratios_df["expense_ratio"],
+                expense_ratios_df["expense_ratio"].isna(),
+                group_start_mask(expense_ratios_df["product_id"]),
             )
-            expense_ratios_df["expense_ratio"] = expense_ratios_df.groupby(["product_id"])[
-                "expense_ratio"
-            ].bfill()
 
-            # Forward fill if any remaining nulls
-            if expense_ratios_df["expense_ratio"].isnull().values.any():
-                expense_ratios_df["expense_ratio"] = expense_ratios_df.groupby(["product_id"])[
-                    "expense_ratio"
-                ].ffill()
-
-            return expense_ratios_df
+            return expense_ratios_df.sort_values(
+                ["last_modified_date"], ignore_index=True)
 
         except Exception as e:
             print(f"Error, adjust_expense_ratio() failed: {str(e)}")
             return None
 
+    def read_expense_ratios(self) -> pd.DataFrame:
+        """
+        Reads the WT Expense Ratios sheet with renamed columns
+        and last_modified_date as date, plus the fee changes of the
+        corporate actions table (which win over a sheet ratio of the
+        same product and date).
+        """
+        expense_df = self.read_sheets(
+            ["WT Expense Ratios"])["WT Expense Ratios"]
+        expense_df = expense_df.rename(
+            columns={"Expense Ratio": "expense_ratio",
+                     "WT ID": "product_id"}
+        )
+        expense_df["last_modified_date"] = pd.to_datetime(
+            expense_df["last_modified_date"],
+            format="%Y-%m-%d",
+            errors="coerce",
+        )
+        fee_changes_df = self.corporate_actions.fee_changes()
+        if len(fee_changes_df):
+            expense_df = pd.concat(
+                [expense_df, fee_changes_df], ignore_index=True
+            ).drop_duplicates(
+                ["product_id", "last_modified_date"], keep="last"
+            ).reset_index(drop=True)
+        return expense_df
+
+    @instrument_stage
     def extract_expense_ratios(self, input_nav_df: pd.DataFrame) -> pd.DataFrame:
         """
         1. Extracts WT Expense Ratios table
         2. renames columns.
+        3. Keeps the ratios as effective-dated intervals
+        (self.expense_intervals) for revenue accrual.
         """
+        from revenue_accrual import ExpenseRatioIntervals
+
         try:
-            expense_df = pd.read_excel(
-                self.excel_file, sheet_name="WT Expense Ratios")
-            expense_df = expense_df.rename(
-                columns={"Expense Ratio": "expense_ratio",
-                         "WT ID": "product_id"}
-            )
-            expense_df["last_modified_date"] = pd.to_datetime(
-                expense_df["last_modified_date"],
-                format="%Y-%m-%d",
-                errors="coerce",
-            )
+            expense_df = self.read_expense_ratios()
+            # Effective-dated ratios used for daily revenue accrual
+            self.expense_intervals = ExpenseRatioIntervals(expense_df)
+
             output_expense_df = self.adjust_expense_ratio(
                 expense_df, input_nav_df)
             print("expense ratios data processing completed successfully")
@@ -173,37 +458,46 @@ class WisdomTreeDataPipeline:
             print(f"Error, extract_expense_ratios() failed: {str(e)}")
             return None
 
-    def extract_nav(self) -> pd.DataFrame:
+    @instrument_stage
+    def extract_nav(
+            self,
+            input_observed_nav_df: pd.DataFrame = None) -> pd.DataFrame:
         """
-        1. Extracts Net Asset Value Data from the Excel file
+        1. Extracts Net Asset Value Data from the Excel file, unless the
+        raw rows of read_observed_nav() are given
         2. renames columns
-        3. Converts date column to date type.
+        3. Converts date column to date type
+        4. Restates prices to the units clients report in when
+        CORPORATE_ACTIONS_SHARE_BASIS is "original".
         """
         try:
-            nav_df = pd.read_excel(self.excel_file, sheet_name="NAV Data")
-            nav_df = nav_df.rename(
-                columns={
-                    "WT ID": "product_id",
-                    "Date": "market_date",
-                    "NAV": "net_asset_value",
-                }
-            )
-            # If 'coerce', then invalid parsing will be set as NaT.
-            nav_df["market_date"] = nav_df["market_date"].apply(
-                self.nav_format_and_convert_date
-            )
-
-            nav_df["product_id"] = nav_df["product_id"].astype(int)
+            nav_df = input_observed_nav_df
+            if nav_df is None:
+                nav_df = self.read_observed_nav()
+
+            if CORPORATE_ACTIONS_SHARE_BASIS == "original":
+                # Adjusted before filling, so that filled dates take the
+                # adjusted price of the observation they are filled from
+                nav_df = self.corporate_actions.adjust_shares(
+                    nav_df, "market_date", "net_asset_value")
+
+            if NAV_ACCESS_MODE == "sparse":
+                # Observed prices only, resolved as of each date by
+                # NavAsOfTable; the dense calendar is an optional view
+                # built with fill_missing_nav_dates()
+                output_nav_df = nav_df[
+                    ["product_id", "market_date", "net_asset_value"]
+                ].sort_values(["product_id", "market_date"], ignore_index=True)
+                output_nav_df["is_nav_backfilled"] = False
+            else:
+                output_nav_df = self.fill_missing_nav_dates(nav_df)
 
-            output_nav_df = self.fill_missing_nav_dates(nav_df)
+            if COMPACT_DTYPES_ENABLED:
+                from compact_dtypes import compact_nav, report_memory_saved
 
-            # Adjust WCLD stock split (1-for-3 on 31 March 2024)
-            # Starting from 30th due to backfill
-            # output_nav_df.loc[
-            #     (output_nav_df["product_id"] == 3105371)
-            #     & (output_nav_df["market_date"] >= "2024-03-30"),
-            #     "net_asset_value",
-            # ] *= 3
+                compact_nav_df = compact_nav(output_nav_df)
+                report_memory_saved("nav", output_nav_df, compact_nav_df)
+                output_nav_df = compact_nav_df
 
             print("nav data processing completed successfully")
             return output_nav_df
@@ -212,95 +506,227 @@ class WisdomTreeDataPipeline:
             return None
             # return  log.logMsg("Error", f"extract_nav_data() failed: {str(e)}")
 
-    def process_client_holdings(self) -> pd.DataFrame:
+    @instrument_stage
+    def read_observed_nav(self) -> pd.DataFrame:
+        """
+        NAV Data rows as observed, with formatted columns and dates.
+        """
+        if STREAMING_READ_ENABLED:
+            # Only one raw chunk is held in memory at a time
+            return pd.concat(self.iter_nav_chunks(), ignore_index=True)
+        return self.format_nav_chunk(
+            self.read_sheets(["NAV Data"])["NAV Data"])
+
+    def format_nav_chunk(self, input_nav_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        1. Renames NAV columns
+        2. Converts date column to date type
+        3. Product id column to integer type.
+        """
+        nav_df = input_nav_df.rename(
+            columns={
+                "WT ID": "product_id",
+                "Date": "market_date",
+                "NAV": "net_asset_value",
+            }
+        )
+        # Invalid parsing will be set as NaT.
+        nav_df["market_date"] = normalize_nav_dates(nav_df["market_date"])
+
+        nav_df["product_id"] = nav_df["product_id"].astype(int)
+
+        return nav_df
+
+    def iter_nav_chunks(self):
+        """
+        Streams the NAV Data sheet as formatted chunks of
+        STREAMING_CHUNK_ROWS rows.
+        """
+        for nav_chunk_df in iter_sheet_chunks(
+                self.file_path, "NAV Data", STREAMING_CHUNK_ROWS):
+            yield self.format_nav_chunk(nav_chunk_df)
+
+    def iter_client_sheet_chunks(
+            self,
+            input_client_id: str,
+            input_quarter_date: str,
+            input_sheet_name: str,
+            file_path: str = None):
+        """
+        Streams one client quarter sheet as unpivoted holdings chunks
+        of at most STREAMING_CHUNK_ROWS tickers.
+        Reads from the pipeline workbook unless file_path is given.
         """
-        1. Extracts multiple client holdings data from multiple sheets
+        if file_path is None:
+            file_path = self.file_path
+        for sheet_chunk_df in iter_sheet_chunks(
+                file_path, input_sheet_name, STREAMING_CHUNK_ROWS):
+            yield self.transform_client_sheet(
+                input_client_id, input_quarter_date, sheet_chunk_df)
+
+    @instrument_stage
+    def process_client_holdings(
+            self,
+            input_reported_holdings_df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        1. Extracts multiple client holdings data from multiple sheets,
+        of the pipeline workbook or of every workbook of
+        HOLDINGS_WORKBOOKS_PATH, unless the raw rows of
+        read_reported_holdings() are given
         2. Combines client data into single table and adds start_date
         and end_date for each quarter sheet to manage changing dimensions
         3. Adds id of tickers from products tables
+        4. Fills zero holdings, then adjusts them for stock splits.
         """
         try:
-            client_holdings_list = []
-            # Extract client ids
-            client_ids_list = [
-                sheet.split("_")[0]
-                for sheet in self.excel_file.sheet_names
-                if "client" in sheet.lower()
-            ]
-            # Remove client ids duplicates and sort ascending
+            holdings_df = input_reported_holdings_df
+            if holdings_df is None:
+                holdings_df = self.read_reported_holdings()
 
-            client_ids_list = list(dict.fromkeys(client_ids_list))
-            client_ids_list.sort()
+            # Add missing months of every client quarter in one pass
+            holdings_df = self.fill_missing_months_holdings(holdings_df)
 
-            # Loop by client
-            for client_id in client_ids_list:
-                # Extract all sheets matching the client_id and sort ascending
-                sheet_quarters_list = [
-                    sheet for sheet in self.excel_file.sheet_names if client_id in sheet
-                ]
-                # quarters_list = [sheet_name.split("_")[1] for sheet_name in sheet_quarters_list]
-                # print(quarters_list)
-                sheet_quarters_list.sort()
-                # print(sheet_quarters_list)
-                # Loop thorugh sheet name to start extracting data
-                for sheet in sheet_quarters_list:
-                    # Extract quarter date
-                    sheet_quarter = sheet.split("_")[1]
-                    # Extract all sheets of the same client id
-                    client_sheet_df = pd.read_excel(
-                        self.excel_file, sheet_name=sheet)
-                    # make all columns lower case
-                    client_sheet_df.columns = map(
-                        str.lower, client_sheet_df.columns)
-                    # make all acronyms upper case
-                    client_sheet_df["ticker"] = client_sheet_df["ticker"].str.upper(
-                    )
-                    # unpivot table to create "month_date" column
-                    client_unpivot_df = client_sheet_df.melt(
-                        id_vars=["ticker"], var_name="month_date", value_name="holdings"
-                    )
-                    # check for missing months
-                    client_unpivot_df = self.fill_missing_months_holdings(
-                        client_id.lower(), sheet_quarter, client_unpivot_df
-                    )
+            # Create end_date column for all clients and quarters at once
+            holdings_df = self.add_holdings_end_date_column(holdings_df)
 
-                    client_unpivot_df["client_id"] = client_id.lower()
-                    client_unpivot_df["quarter_date"] = sheet_quarter
-                    client_unpivot_df["start_date"] = sheet_quarter
-                    client_unpivot_df["start_date"] = pd.to_datetime(
-                        client_unpivot_df["start_date"],
-                        format="%Y-%m-%d",
-                        errors="coerce",
-                    )
-                    client_unpivot_df["quarter_date"] = pd.to_datetime(
-                        client_unpivot_df["quarter_date"],
-                        format="%Y-%m-%d",
-                        errors="coerce",
-                    )
+            holdings_df = self.add_holdings_product_id(holdings_df)
+
+            output_holdings_df = self.fill_zero_holdings(holdings_df)
+            output_holdings_df = self.adjust_holdings_shares(
+                output_holdings_df)
+
+            if COMPACT_DTYPES_ENABLED:
+                from compact_dtypes import (
+                    compact_holdings, report_memory_saved)
 
-                    # Create end_date column
-                    client_unpivot_df = self.add_holdings_end_date_column(
-                        sheet, sheet_quarters_list, client_unpivot_df)
+                compact_holdings_df = compact_holdings(output_holdings_df)
+                report_memory_saved(
+                    "holdings", output_holdings_df, compact_holdings_df)
+                output_holdings_df = compact_holdings_df
 
-                    client_holdings_list.append(client_unpivot_df)
+            print("client holdings data processing completed successfully")
+
+            return output_holdings_df
 
+        except Exception as e:
+            print(f"Error, process_client_holdings() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def read_reported_holdings(self) -> pd.DataFrame:
+        """
+        Client sheet rows as reported, unpivoted to one row per ticker
+        and month, of every client quarter of client_workbook_catalog().
+        """
+        client_holdings_list = []
+        # Parse sheet (and file) names once into (client, quarter) keys,
+        # sorted by client and quarter ascending
+        sheet_catalog = self.client_workbook_catalog()
+
+        if STREAMING_READ_ENABLED:
+            # Stream each sheet in chunks of tickers
+            for client_id, sheet_quarter, file_path, sheet in sheet_catalog:
+                client_holdings_list.extend(
+                    self.iter_client_sheet_chunks(
+                        client_id, sheet_quarter, sheet, file_path)
+                )
+        else:
+            # Read all client sheets in bulk
+            if HOLDINGS_WORKBOOKS_PATH:
+                client_sheets_dict = self.read_workbook_sheets(
+                    sheet_catalog, max_workers=HOLDINGS_LOAD_WORKERS)
+            else:
+                client_sheets_dict = {
+                    (self.file_path, sheet): sheet_df
+                    for sheet, sheet_df in self.read_sheets(
+                        [sheet for _, _, _, sheet in sheet_catalog],
+                        max_workers=HOLDINGS_LOAD_WORKERS,
+                    ).items()
+                }
+
+            # Loop thorugh client quarter sheets to start extracting data
+            for client_id, sheet_quarter, file_path, sheet in sheet_catalog:
+                client_holdings_list.append(
+                    self.transform_client_sheet(
+                        client_id, sheet_quarter,
+                        client_sheets_dict[(file_path, sheet)])
+                )
+
+        holdings_df = pd.concat(client_holdings_list, ignore_index=True)
+        return holdings_df
+
+    def transform_client_sheet(
+            self,
+            input_client_id: str,
+            input_quarter_date: str,
+            input_sheet_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        1. Unpivots one client quarter sheet to one row per ticker per month
+        2. Converts month headers to dates
+        3. Adds client_id, quarter_date and start_date columns
+        """
+        try:
+            client_sheet_df = input_sheet_df.copy()
+            # make all columns lower case
+            client_sheet_df.columns = map(
+                str.lower, client_sheet_df.columns)
+            # make all acronyms upper case
+            client_sheet_df["ticker"] = client_sheet_df["ticker"].str.upper(
+            )
+            # unpivot table to create "month_date" column
+            client_unpivot_df = client_sheet_df.melt(
+                id_vars=["ticker"], var_name="month_date", value_name="holdings"
+            )
+            client_unpivot_df["month_date"] = normalize_holdings_dates(
+                client_unpivot_df["month_date"]
+            )
+            client_unpivot_df["client_id"] = input_client_id.lower()
+            client_unpivot_df["quarter_date"] = input_quarter_date
+            client_unpivot_df["start_date"] = input_quarter_date
+            client_unpivot_df["start_date"] = pd.to_datetime(
+                client_unpivot_df["start_date"],
+                format="%Y-%m-%d",
+                errors="coerce",
+            )
+            client_unpivot_df["quarter_date"] = pd.to_datetime(
+                client_unpivot_df["quarter_date"],
+                format="%Y-%m-%d",
+                errors="coerce",
+            )
+
+            return client_unpivot_df
+        except Exception as e:
+            print(f"Error, transform_client_sheet() failed: {str(e)}")
+            return None
+
+    def add_holdings_product_id(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        1. Joins with products table to get product_id
+        2. Drops rows of tickers that are not in the WT Products table
+        (they have no product_id) with a warning; they are reported by
+        the unknown_ticker quality rule
+        3. Keeps the holdings table columns
+        """
+        try:
             # Join with products table to get product_id
-            holdings_df = pd.concat(client_holdings_list, ignore_index=True)
-            holdings_df = holdings_df.merge(
+            holdings_df = input_df.merge(
                 self.products_table.drop(columns=["product_name"]),
                 on="ticker",
                 how="left",
             )
+            is_unknown_ticker = holdings_df["product_id"].isna()
+            if is_unknown_ticker.any():
+                print(
+                    "Holdings Warning: "
+                    f"{int(is_unknown_ticker.sum())} rows of tickers not in "
+                    "WT Products dropped: "
+                    f"{sorted(holdings_df.loc[is_unknown_ticker, 'ticker'].unique())}"
+                )
+                holdings_df = holdings_df[~is_unknown_ticker]
             holdings_df.drop(columns=["ticker"])
             holdings_df["product_id"] = holdings_df["product_id"].astype(
                 int)
 
-            # Adjust for WCLD stock split (1:3 on 31 March 2024)
-            holdings_df.loc[
-                (holdings_df["product_id"] == 3105371)
-                & (holdings_df["month_date"] >= "2024-03-31"),
-                "holdings",
-            ] *= 3
             # clean table columns
             holdings_df = holdings_df[
                 [
@@ -314,112 +740,259 @@ class WisdomTreeDataPipeline:
                 ]
             ]
 
-            output_holdings_df = self.fill_zero_holdings(holdings_df)
-            print("client holdings data processing completed successfully")
+            return holdings_df
+        except Exception as e:
+            print(f"Error, add_holdings_product_id() failed: {str(e)}")
+            return None
 
-            return output_holdings_df
+    def adjust_holdings_shares(
+            self,
+            input_holdings_df: pd.DataFrame,
+            inverse: bool = False) -> pd.DataFrame:
+        """
+        Restates reported holdings to the share units in effect at each
+        month_date (cumulative split factor of the corporate actions
+        table), when CORPORATE_ACTIONS_SHARE_BASIS is "current".
+        The factor depends only on month_date, so a month gets the same
+        adjustment in every quarter vintage that reports it.
+        inverse=True converts adjusted holdings back to reported units.
+        """
+        if CORPORATE_ACTIONS_SHARE_BASIS != "current":
+            return input_holdings_df
+        return self.corporate_actions.adjust_shares(
+            input_holdings_df, "month_date", "holdings", inverse=inverse)
 
+    @instrument_stage
+    def ingest_quarter_holdings(
+            self,
+            input_holdings_df: pd.DataFrame,
+            quarter_file_path: str = None,
+            sheet_names: list = None) -> pd.DataFrame:
+        """
+        Appends a new quarterly drop to an existing holdings table
+        (output of process_client_holdings()) without rebuilding it.
+        1. Reads the client sheets of quarter_file_path (a workbook, a
+        directory or a glob of workbooks), or the given sheet_names of
+        the pipeline workbook
+        2. Replaces rows of client quarters that were already loaded
+        3. Recomputes end_date only for the clients in the drop, closing
+        out the months superseded by the new quarter
+        4. Reruns fill_zero_holdings() only for the (client, product) keys
+        in the drop, starting from their reported holdings, and adjusts
+        them for stock splits again.
+        """
+        from compact_dtypes import restore_holdings_dtypes
+
+        try:
+            input_holdings_df = restore_holdings_dtypes(input_holdings_df)
+            if quarter_file_path is not None:
+                sheet_catalog = build_workbook_catalog(
+                    resolve_workbook_paths(quarter_file_path))
+                client_sheets_dict = self.read_workbook_sheets(
+                    sheet_catalog, max_workers=HOLDINGS_LOAD_WORKERS)
+            else:
+                sheet_catalog = [
+                    (client_id, quarter_date, self.file_path, sheet_name)
+                    for client_id, quarter_date, sheet_name
+                    in build_client_sheet_catalog(sheet_names or [])
+                ]
+                client_sheets_dict = {
+                    (self.file_path, sheet): sheet_df
+                    for sheet, sheet_df in self.read_sheets(
+                        [sheet for _, _, _, sheet in sheet_catalog]).items()
+                }
+            if not sheet_catalog:
+                print("Holdings Ingestion Warning: no client sheets found")
+                return input_holdings_df
+
+            new_holdings_df = pd.concat(
+                [
+                    self.transform_client_sheet(
+                        client_id, sheet_quarter,
+                        client_sheets_dict[(file_path, sheet)])
+                    for client_id, sheet_quarter, file_path, sheet
+                    in sheet_catalog
+                ],
+                ignore_index=True,
+            )
+            new_holdings_df = self.fill_missing_months_holdings(
+                new_holdings_df)
+            new_holdings_df["end_date"] = pd.NaT
+            new_holdings_df = self.add_holdings_product_id(new_holdings_df)
+
+            # Drop client quarters that are delivered again
+            new_quarters_index = pd.MultiIndex.from_frame(
+                new_holdings_df[["client_id", "quarter_date"]].drop_duplicates()
+            )
+            is_redelivered = pd.MultiIndex.from_frame(
+                input_holdings_df[["client_id", "quarter_date"]]
+            ).isin(new_quarters_index)
+            history_df = input_holdings_df[~is_redelivered]
+
+            # Only clients in the drop need their end_date recomputed
+            is_affected_client = history_df["client_id"].isin(
+                new_holdings_df["client_id"].unique())
+            affected_df = pd.concat(
+                [history_df[is_affected_client], new_holdings_df],
+                ignore_index=True,
+            )
+            affected_df = self.add_holdings_end_date_column(
+                affected_df.drop(columns=["end_date"]))
+
+            # Only (client, product) keys in the drop need backfilling again,
+            # from the reported holdings (backfilled rows were reported as 0)
+            new_keys_index = pd.MultiIndex.from_frame(
+                new_holdings_df[["client_id", "product_id"]].drop_duplicates()
+            )
+            is_affected_key = pd.MultiIndex.from_frame(
+                affected_df[["client_id", "product_id"]]
+            ).isin(new_keys_index)
+
+            refill_df = affected_df[is_affected_key].copy()
+            if "is_holdings_backfilled" in refill_df.columns:
+                # Loaded rows were split adjusted, fill in reported units
+                is_loaded = refill_df["is_holdings_backfilled"].notna()
+                refill_df.loc[is_loaded, "holdings"] = (
+                    self.adjust_holdings_shares(
+                        refill_df[is_loaded], inverse=True)["holdings"])
+                refill_df.loc[
+                    refill_df["is_holdings_backfilled"].fillna(False)
+                    .astype(bool),
+                    "holdings",
+                ] = 0
+                refill_df = refill_df.drop(columns=["is_holdings_backfilled"])
+            refill_df = self.adjust_holdings_shares(
+                self.fill_zero_holdings(refill_df))
+
+            output_holdings_df = pd.concat(
+                [
+                    history_df[~is_affected_client],
+                    affected_df[~is_affected_key],
+                    refill_df,
+                ],
+                ignore_index=True,
+            )[input_holdings_df.columns]
+            output_holdings_df["is_holdings_backfilled"] = output_holdings_df[
+                "is_holdings_backfilled"].astype(bool)
+            print(
+                f"holdings ingestion completed successfully: "
+                f"{len(new_holdings_df)} rows from {len(sheet_catalog)} sheets"
+            )
+
+            return output_holdings_df
         except Exception as e:
-            print(f"Error, process_client_holdings() failed: {str(e)}")
+            print(f"Error, ingest_quarter_holdings() failed: {str(e)}")
             return None
 
+    @instrument_stage
     def add_holdings_end_date_column(
             self,
-            input_sheet_name: str,
-            input_sheets_list: list,
             input_df: pd.DataFrame) -> pd.DataFrame:
         """
         Creates end_date column using the next quarter date for a month_date.
-        Adds NULL where there is no next quater date
+        Adds NULL where there is no next quater date.
+        Computed in one pass over all clients: the next quarter of each
+        client is found with a grouped shift over its sorted quarters.
         """
         try:
+            # Unique quarters per client, sorted to shift to the next one
+            quarters_df = (
+                input_df[["client_id", "quarter_date"]]
+                .drop_duplicates()
+                .sort_values(["client_id", "quarter_date"])
+            )
+            quarters_df["next_quarter_date"] = quarters_df.groupby(
+                "client_id")["quarter_date"].shift(-1)
 
-            quarter_index = input_sheets_list.index(input_sheet_name)
-            if quarter_index < len(input_sheets_list) - 1:
-                current_quarter = input_sheets_list[quarter_index].split("_")[
-                    1
-                ]
-                target_date = pd.Timestamp(current_quarter) - pd.DateOffset(
-                    months=8
-                )
-                quarter_index += 1
-                next_quarter = pd.Timestamp(
-                    input_sheets_list[quarter_index].split("_")[1]
-                )
-                input_df["end_date"] = input_df[
-                    "month_date"
-                ].apply(
-                    lambda month_date: (
-                        next_quarter if month_date >= target_date else pd.NA
-                    )
-                )
-
-            else:
-                input_df["end_date"] = pd.NA
+            output_df = input_df.merge(
+                quarters_df, on=["client_id", "quarter_date"], how="left"
+            )
 
-            # If 'coerce', then invalid parsing will be set as NaT.
-            input_df["end_date"] = pd.to_datetime(
-                input_df["end_date"],
-                format="%Y-%m-%d",
-                errors="coerce",
+            # Only months covered by the next quarter sheet are superseded
+            target_date = output_df["quarter_date"] - pd.DateOffset(months=8)
+            output_df["end_date"] = output_df["next_quarter_date"].where(
+                output_df["month_date"] >= target_date
             )
 
-            return input_df
+            return output_df.drop(columns=["next_quarter_date"])
         except Exception as e:
             print(f"Error, add_holdings_end_date_column() failed: {str(e)}")
             return None
 
+    @instrument_stage
+    def find_missing_months(
+            self,
+            input_holdings_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        (client_id, quarter_date, month_date) of the months missing from
+        each client quarter sheet:
+        1. Builds the 12 expected month ends of each (client, quarter)
+        2. Anti-joins the months present in the sheet.
+        """
+        sheet_keys = ["client_id", "quarter_date"]
+        quarters_df = input_holdings_df[sheet_keys].drop_duplicates()
+
+        # Expected months: the 12 month ends up to the quarter date
+        quarter_dates = pd.DatetimeIndex(quarters_df["quarter_date"])
+        last_months = quarter_dates.to_period("M") - (
+            ~quarter_dates.is_month_end).astype(int)
+        expected_df = quarters_df.loc[
+            quarters_df.index.repeat(12)].reset_index(drop=True)
+        expected_df["month_date"] = (
+            last_months.repeat(12) - np.tile(np.arange(11, -1, -1), len(quarters_df))
+        ).to_timestamp(how="start") + pd.offsets.MonthEnd(0)
+
+        # Missing months: expected but not in any row of the sheet
+        missing_months_df = expected_df.merge(
+            input_holdings_df[sheet_keys + ["month_date"]].drop_duplicates(),
+            on=sheet_keys + ["month_date"],
+            how="left",
+            indicator=True,
+        )
+        return missing_months_df.loc[
+            missing_months_df["_merge"] == "left_only",
+            sheet_keys + ["month_date"],
+        ].reset_index(drop=True)
+
     def fill_missing_months_holdings(
         self,
-        input_client_id: str,
-        input_quarter_date: str,
         input_holdings_df: pd.DataFrame,
     ) -> pd.DataFrame:
         """
-        Checks for missing months and inserts row with holdings == 0
+        Checks for missing months of all client quarters at once and
+        inserts rows with holdings == 0:
+        1. Finds the missing months with find_missing_months()
+        2. Adds one row per ticker of the sheet and missing month
+        Missing months are collected in self.missing_months_df
+        (client_id, quarter_date, month_date) instead of printed.
         """
         try:
-            # Generate a full list of months from the given date going back 11 months
-            all_months = pd.date_range(
-                end=input_quarter_date, periods=12, freq="ME")
+            sheet_keys = ["client_id", "quarter_date"]
+            missing_months_df = self.find_missing_months(input_holdings_df)
+            self.missing_months_df = missing_months_df
 
-            # Find the missing months
-            input_holdings_df["month_date"] = input_holdings_df["month_date"].apply(
-                self.holdings_format_and_convert_date
-            )
-            existing_months = input_holdings_df["month_date"].unique()
-            missing_months = all_months.difference(existing_months)
-
-            if len(missing_months) > 0:
-                print("Client Holdings Processing Warning:")
-                print(
-                    f"{input_client_id} | {input_quarter_date} | missing months:{
-                        list(missing_months)}"
-                )
-                for name in input_holdings_df["ticker"].unique():
-                    # Create rows for missing months with holdings set to 0
-                    new_rows = pd.DataFrame(
-                        {
-                            "ticker": [name for month in range(len(missing_months))],
-                            "month_date": missing_months,
-                            "holdings": [0 for month in range(len(missing_months))],
-                        }
-                    )
-                    # Append the new rows to the original DataFrame and sort by month_tdate
-                    input_holdings_df = pd.concat(
-                        [input_holdings_df, new_rows.astype(
-                            input_holdings_df.dtypes)],
-                        ignore_index=True,
-                    ).sort_values("month_date")
-
-                    # print(input_holdings_df.dtypes)
+            if missing_months_df.empty:
                 return input_holdings_df
 
-            return input_holdings_df
+            # Rows for missing months with holdings set to 0, for every
+            # ticker of the sheet (other sheet columns such as start_date
+            # are constant per sheet)
+            new_rows_df = missing_months_df.merge(
+                input_holdings_df.drop(
+                    columns=["month_date", "holdings"]).drop_duplicates(),
+                on=sheet_keys,
+            )
+            new_rows_df["holdings"] = 0
+
+            return pd.concat(
+                [input_holdings_df, new_rows_df], ignore_index=True
+            ).sort_values(sheet_keys + ["month_date"], kind="stable",
+                          ignore_index=True)
         except Exception as e:
             print(f"Error, fill_missing_months_holdings() failed: {str(e)}")
             return None
 
+    @instrument_stage
     def fill_zero_holdings(self, holdings_df):
         """
         1. Replace holdings == 0 with the value from
@@ -429,42 +1002,55 @@ class WisdomTreeDataPipeline:
         3. Creates boolean column "is_holdings_backfilled" where holdings == 0
         """
         try:
+            if self.sql_backend is not None:
+                return self.sql_backend.fill_zero_holdings(holdings_df)
+
             holdings_df = holdings_df.sort_values(
                 ["client_id", "product_id", "quarter_date"]
             )
 
-            # Convert nulls and empty cells to 0
-            holdings_df["holdings"] = holdings_df["holdings"].fillna(0)
-            holdings_df["holdings"] = holdings_df["holdings"].replace("", 0)
-            holdings_df["holdings"] = holdings_df["holdings"].replace(" ", 0)
-            holdings_df["is_holdings_backfilled"] = (
-                holdings_df["holdings"] == 0
-            ).astype(bool)
-
-            missing_holdings_mask = holdings_df["holdings"] == 0
-
-            # Shift one to get previous quarter
-            holdings_df.loc[missing_holdings_mask, "holdings"] = holdings_df.groupby(
-                ["client_id", "product_id", "month_date"]
-            )["holdings"].shift(1)
+            # Convert nulls, empty and non-numeric cells to 0
+            reported_holdings = (
+                pd.to_numeric(holdings_df["holdings"], errors="coerce")
+                .astype("float64")
+                .fillna(0)
+                .to_numpy()
+            )
 
-            # Forward fills holdings previous month instead where
-            # month does not exist on the previous quarter
-            if holdings_df["holdings"].isnull().values.any():
-                holdings_df["holdings"] = holdings_df.groupby(
-                    ["client_id", "product_id"]
-                )["holdings"].ffill()
+            # Previous quarter of the same month: previous row of
+            # the (client, product, month) in quarter order
+            month_codes = holdings_df.groupby(
+                ["client_id", "product_id", "month_date"], sort=False
+            ).ngroup().fillna(-1).to_numpy("int64")
+
+            # Replace holdings == 0 with the previous quarter, then forward
+            # fill holdings previous month where month does not exist on
+            # the previous quarter
+            holdings_df["holdings"], holdings_df["is_holdings_backfilled"] = (
+                fill_groups(
+                    reported_holdings,
+                    reported_holdings == 0,
+                    group_start_mask(
+                        holdings_df["client_id"], holdings_df["product_id"]),
+                    previous=previous_positions(month_codes),
+                    backward=False,
+                )
+            )
 
             return holdings_df
         except Exception as e:
-            print(f"Error, fill_missing_nav_dates() failed: {str(e)}")
+            print(f"Error, fill_zero_holdings() failed: {str(e)}")
             return None
 
+    @instrument_stage
     def fill_missing_nav_dates(self, nav_data: pd.DataFrame) -> pd.DataFrame:
         """
         Backfills NAV data of missing dates and NAV values
         """
         try:
+            if self.sql_backend is not None:
+                return self.sql_backend.fill_missing_nav_dates(nav_data)
+
             # Date range to get missing dates
             start_year = nav_data["market_date"].min().year
             end_year = nav_data["market_date"].max().year
@@ -489,28 +1075,25 @@ class WisdomTreeDataPipeline:
                 complete_index
             )
 
-            # Backward fill NAV values within each product_id
-            nav_data = nav_data.sort_values(["market_date"]).reset_index()
-
-            nav_data["is_nav_backfilled"] = (
-                nav_data["net_asset_value"].isna().astype(bool)
+            # Backward fill, then forward fill remaining nulls, NAV values
+            # within each product_id (rows are grouped by product and
+            # sorted by date by the reindex)
+            nav_data = nav_data.reset_index()
+            nav_data["net_asset_value"], nav_data["is_nav_backfilled"] = (
+                fill_groups(
+                    nav_data["net_asset_value"],
+                    nav_data["net_asset_value"].isna(),
+                    group_start_mask(nav_data["product_id"]),
+                )
             )
-            nav_data["net_asset_value"] = nav_data.groupby(["product_id"])[
-                "net_asset_value"
-            ].bfill()
-
-            # Forward fill if any remaining nulls
-            if nav_data["net_asset_value"].isnull().values.any():
-                nav_data["net_asset_value"] = nav_data.groupby(["product_id"])[
-                    "net_asset_value"
-                ].ffill()
 
-            return nav_data
+            return nav_data.sort_values(["market_date"], ignore_index=True)
 
         except Exception as e:
             print(f"Error, fill_missing_nav_dates() failed: {str(e)}")
             return None
 
+    @instrument_stage
     def transform_monthly_analytics(
         self,
         input_expense_df: pd.DataFrame,
@@ -521,105 +1104,286 @@ class WisdomTreeDataPipeline:
         Estimates:
         - Monthly AUM
         - Daily revenue
+        - Monthly revenue accrued daily with effective expense ratios
         - Net flows
         - market movement
         """
-        try:
+        from nav_lookup import NavAsOfTable
+        from revenue_accrual import (
+            ExpenseRatioIntervals,
+            accrue_monthly_revenue,
+            daily_accrual_rates,
+        )
+        from window_engine import (
+            WINDOW_MEASURES,
+            add_series_flows,
+            add_window_aggregates,
+            window_columns,
+        )
 
-            # Get the latest data of holdings
-            holdings_latest_df = input_holdings_df[
-                input_holdings_df["end_date"].isnull()
-            ]
+        try:
+            if self.expense_intervals is None:
+                self.expense_intervals = ExpenseRatioIntervals(
+                    self.read_expense_ratios())
+
+            if self.sql_backend is not None:
+                # Same stage as SQL: joins, accruals, flows and windows
+                holdings_nav_expense_df = (
+                    self.sql_backend.transform_monthly_analytics(
+                        input_expense_df,
+                        input_holdings_df,
+                        input_nav_df,
+                        self.expense_intervals.expense_df,
+                    )
+                )
+            else:
+                # Get the latest data of holdings
+                holdings_latest_df = input_holdings_df[
+                    input_holdings_df["end_date"].isnull()
+                ]
 
-            # Get the latest data of expense
-            # expense_latest_df = self.adjust_expense_ratio(input_nav_df)
-            # print(expense_latest_df.head(100))
+                # Get the latest data of expense
+                # expense_latest_df = self.adjust_expense_ratio(input_nav_df)
+                # print(expense_latest_df.head(100))
 
-            holdings_latest_df = holdings_latest_df.sort_values(
-                ["client_id", "product_id", "month_date"]
-            )
+                holdings_latest_df = holdings_latest_df.sort_values(
+                    ["client_id", "product_id", "month_date"]
+                )
 
-            # Left join holdings table with with nav and expenses tables
-            holdings_nav_df = holdings_latest_df.merge(
-                input_nav_df,
-                left_on=["product_id", "month_date"],
-                right_on=["product_id", "market_date"],
-                how="left",
-            )
+                # NAV at each month end, resolved as of the date from the
+                # dense or the sparse NAV table
+                nav_table = NavAsOfTable(input_nav_df)
+                month_end_nav_df = nav_table.as_of(
+                    holdings_latest_df["product_id"],
+                    holdings_latest_df["month_date"],
+                )
 
-            holdings_nav_expense_df = holdings_nav_df.merge(
-                input_expense_df,
-                left_on=["product_id", "month_date"],
-                right_on=["product_id", "last_modified_date"],
-                how="left",
-            )
+                # Left join holdings table with with nav and expenses tables
+                holdings_nav_df = holdings_latest_df.merge(
+                    month_end_nav_df,
+                    left_on=["product_id", "month_date"],
+                    right_on=["product_id", "market_date"],
+                    how="left",
+                )
 
-            # # Adjust GGRA expense ratio change on 30 June 2024
-            # holdings_nav_expense_df.loc[
-            #     (holdings_nav_expense_df["product_id"] == 1001656)
-            #     & (holdings_nav_expense_df["market_date"] < pd.Timestamp("2024-06-30")),
-            #     "expense_ratio",
-            # ] = 0.0028
-
-            ## CALCULATIONS##
-            # AUM = hodlings * nav
-            holdings_nav_expense_df["assets_under_management"] = (
-                holdings_nav_expense_df["holdings"]
-                * holdings_nav_expense_df["net_asset_value"]
-            )
+                holdings_nav_expense_df = holdings_nav_df.merge(
+                    input_expense_df,
+                    left_on=["product_id", "month_date"],
+                    right_on=["product_id", "last_modified_date"],
+                    how="left",
+                )
+                # Release the join inputs before the accrual and window
+                # columns are added
+                del holdings_latest_df, month_end_nav_df, holdings_nav_df
+
+                # Compact mode stores holdings and NAV as float32, compute in float64
+                holdings_nav_expense_df["holdings"] = holdings_nav_expense_df[
+                    "holdings"].astype("float64")
+                holdings_nav_expense_df["net_asset_value"] = holdings_nav_expense_df[
+                    "net_asset_value"].astype("float64")
+
+                ## CALCULATIONS##
+                # AUM = hodlings * nav
+                holdings_nav_expense_df["assets_under_management"] = (
+                    holdings_nav_expense_df["holdings"]
+                    * holdings_nav_expense_df["net_asset_value"]
+                )
 
-            # Daily Revenue = aum * (yearly expense ratio/252)
-            holdings_nav_expense_df["daily_revenue"] = holdings_nav_expense_df[
-                "assets_under_management"
-            ] * (holdings_nav_expense_df["expense_ratio"] / 252)
-
-            # Net Flow = share change (monthly holdings − previous month holdings) * monthly nav
-            holdings_nav_expense_df["share_change"] = holdings_nav_expense_df[
-                "holdings"
-            ].diff()
-            holdings_nav_expense_df["net_flow"] = (
-                holdings_nav_expense_df["share_change"]
-                * holdings_nav_expense_df["net_asset_value"]
-            )
+                # Daily Revenue = aum * (yearly expense ratio/252)
+                holdings_nav_expense_df["daily_revenue"] = holdings_nav_expense_df[
+                    "assets_under_management"
+                ] * (holdings_nav_expense_df["expense_ratio"] / 252)
+
+                # Accrued Revenue = sum over the business days of the month of
+                # holdings * daily nav * effective expense ratio / 252
+                month_dates = holdings_nav_expense_df["month_date"]
+                accrual_rates_df = daily_accrual_rates(
+                    nav_table,
+                    self.expense_intervals,
+                    holdings_nav_expense_df["product_id"],
+                    month_dates.min() - pd.offsets.MonthBegin(1),
+                    month_dates.max(),
+                )
+                holdings_nav_expense_df["accrued_revenue"] = accrue_monthly_revenue(
+                    holdings_nav_expense_df, accrual_rates_df)
+                del accrual_rates_df
+
+                # Per (client_id, product_id) series, sorted once:
+                # Net Flow = share change (monthly holdings − previous month holdings) * monthly nav
+                # Market Movement = AUM month - AUM previous month - Net Flow
+                # NULL on the first month of each series
+                holdings_nav_expense_df = add_series_flows(
+                    holdings_nav_expense_df, ["client_id", "product_id"])
+
+                # 3, 6, 12 month rolling and year to date net flows
+                # and market movement
+                holdings_nav_expense_df = add_window_aggregates(
+                    holdings_nav_expense_df, ["client_id", "product_id"])
+
+                holdings_nav_expense_df = holdings_nav_expense_df[
+                    [
+                        "client_id",
+                        "product_id",
+                        "month_date",
+                        "is_holdings_backfilled",
+                        "holdings",
+                        "is_nav_backfilled",
+                        "net_asset_value",
+                        "assets_under_management",
+                        "is_expense_ratios_backfilled",
+                        "daily_revenue",
+                        "accrued_revenue",
+                        "share_change",
+                        "net_flow",
+                        "market_movement",
+                    ]
+                    + window_columns(WINDOW_MEASURES)
+                ]
 
-            # Market Movement = AUM month - AUM previous month - Net Flow
-            holdings_nav_expense_df["market_movement"] = (
-                holdings_nav_expense_df["assets_under_management"].diff()
-                - holdings_nav_expense_df["net_flow"]
-            )
+            if COMPACT_DTYPES_ENABLED:
+                from compact_dtypes import (
+                    compact_analytics, report_memory_saved)
 
-            holdings_nav_expense_df = holdings_nav_expense_df[
-                [
-                    "client_id",
-                    "product_id",
-                    "month_date",
-                    "is_holdings_backfilled",
-                    "holdings",
-                    "is_nav_backfilled",
-                    "net_asset_value",
-                    "assets_under_management",
-                    "is_expense_ratios_backfilled",
-                    "daily_revenue",
-                    "share_change",
-                    "net_flow",
-                    "market_movement",
-                ]
-            ]
-            holdings_nav_expense_df.sort_values("month_date")
+                compact_analytics_df = compact_analytics(holdings_nav_expense_df)
+                report_memory_saved(
+                    "analytics", holdings_nav_expense_df, compact_analytics_df)
+                holdings_nav_expense_df = compact_analytics_df
 
-            # Clean oldest month for each client make null
-            wrong_values_mask = (
-                holdings_nav_expense_df["month_date"]
-                == holdings_nav_expense_df["month_date"].min()
-            )
-            holdings_nav_expense_df.loc[wrong_values_mask,
-                                        "share_change"] = pd.NA
-            holdings_nav_expense_df.loc[wrong_values_mask, "net_flow"] = pd.NA
-            holdings_nav_expense_df.loc[wrong_values_mask,
-                                        "market_movement"] = pd.NA
             print("client monthly analytics processing completed successfully")
 
             return holdings_nav_expense_df
         except Exception as e:
             print(f"Error, transform_monthly_aum() failed: {str(e)}")
             return None
+
+    @instrument_stage
+    def aggregate_monthly_analytics(
+        self,
+        input_analytics_df: pd.DataFrame,
+        level: str = "firm",
+    ) -> pd.DataFrame:
+        """
+        Aggregates monthly analytics (output of transform_monthly_analytics())
+        to "product", "client" or "firm" level:
+        1. Sums AUM, daily revenue, net flows and market movement per
+        level key and month, without recomputing from holdings
+        2. Adds 3, 6, 12 month rolling and year to date windows
+        """
+        from window_engine import AGGREGATION_LEVELS, aggregate_flows
+
+        try:
+            if level not in AGGREGATION_LEVELS:
+                raise ValueError(
+                    f"unknown level {level}, expected one of "
+                    f"{list(AGGREGATION_LEVELS)}")
+            return aggregate_flows(input_analytics_df, level)
+        except Exception as e:
+            print(f"Error, aggregate_monthly_analytics() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def compute_client_similarity(
+        self,
+        input_analytics_df: pd.DataFrame,
+    ) -> "ClientSimilarity":
+        """
+        Cosine similarity of all clients by monthly net flows
+        (output of transform_monthly_analytics()):
+        1. First call computes the full similarity matrix in blocks
+        2. Later calls refresh only clients whose activity changed
+        Nearest clients: self.client_similarity.top_k_similar(client_id, k)
+        """
+        from client_similarity import ClientSimilarity
+
+        try:
+            if self.client_similarity is None:
+                self.client_similarity = ClientSimilarity().fit(
+                    input_analytics_df)
+            else:
+                self.client_similarity.refresh(input_analytics_df)
+            return self.client_similarity
+        except Exception as e:
+            print(f"Error, compute_client_similarity() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def check_observed_nav(self, input_nav_df: pd.DataFrame) -> list:
+        """
+        Data quality rules of the raw NAV rows (read_observed_nav()), as
+        report entries: unparseable dates, empty or non numeric prices,
+        duplicate (product, date) rows and price jumps not explained by the
+        corporate actions table.
+        """
+        from quality_rules import NAV_RULES, run_quality_rules
+
+        try:
+            context = {"corporate_actions": self.corporate_actions}
+            return run_quality_rules(input_nav_df, NAV_RULES, context)
+        except Exception as e:
+            print(f"Error, check_observed_nav() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def check_reported_holdings(self, input_holdings_df: pd.DataFrame) -> list:
+        """
+        Data quality rules of the raw client sheet rows
+        (read_reported_holdings()), as report entries:
+        1. Unparseable month headers, unknown tickers, blank, non numeric
+        and negative holdings
+        2. Missing months of client quarters and missing quarters of each
+        client.
+        """
+        from quality_rules import (
+            HOLDINGS_RULES,
+            MISSING_MONTHS_RULE,
+            MISSING_QUARTERS_RULE,
+            missing_quarters,
+            rule_result,
+            run_quality_rules,
+        )
+
+        try:
+            context = {"tickers": self.products_table["ticker"].unique()}
+            results = run_quality_rules(
+                input_holdings_df, HOLDINGS_RULES, context)
+
+            quarters_df = input_holdings_df[
+                ["client_id", "quarter_date"]].drop_duplicates()
+            results.append(rule_result(
+                MISSING_MONTHS_RULE, len(quarters_df) * 12,
+                self.find_missing_months(input_holdings_df)))
+            results.append(rule_result(
+                MISSING_QUARTERS_RULE, len(quarters_df),
+                missing_quarters(quarters_df)))
+            return results
+        except Exception as e:
+            print(f"Error, check_reported_holdings() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def check_nav_quality(self, input_nav_df: pd.DataFrame) -> list:
+        """
+        Data quality rules of the NAV table, as report entries: rows
+        backfilled by extract_nav().
+        """
+        from quality_rules import OUTPUT_NAV_RULES, run_quality_rules
+
+        try:
+            return run_quality_rules(input_nav_df, OUTPUT_NAV_RULES)
+        except Exception as e:
+            print(f"Error, check_nav_quality() failed: {str(e)}")
+            return None
+
+    @instrument_stage
+    def check_holdings_quality(self, input_holdings_df: pd.DataFrame) -> list:
+        """
+        Data quality rules of the holdings table, as report entries: rows
+        backfilled by fill_zero_holdings().
+        """
+        from quality_rules import OUTPUT_HOLDINGS_RULES, run_quality_rules
+
+        try:
+            return run_quality_rules(input_holdings_df, OUTPUT_HOLDINGS_RULES)
+        except Exception as e:
+            print(f"Error, check_holdings_quality() failed: {str(e)}")
+            return None
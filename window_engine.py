@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from fill_kernels import group_start_mask
+
+
+ROLLING_WINDOWS = [3, 6, 12]
+# Additive measures: summing series gives the product, client and firm values
+FLOW_MEASURES = [
+    "assets_under_management",
+    "daily_revenue",
+    "accrued_revenue",
+    "net_flow",
+    "market_movement",
+]
+WINDOW_MEASURES = ["net_flow", "market_movement"]
+# Aggregation level -> series keys, monthly series per key
+AGGREGATION_LEVELS = {
+    "client_product": ["client_id", "product_id"],
+    "product": ["product_id"],
+    "client": ["client_id"],
+    "firm": [],
+}
+
+
+def window_columns(measures: list, windows: list = ROLLING_WINDOWS) -> list:
+    """
+    Column names added by add_window_aggregates().
+    """
+    return [
+        f"{measure}_{window_name}"
+        for measure in measures
+        for window_name in [f"{window}m" for window in windows] + ["ytd"]
+    ]
+
+
+def _series_positions(input_df: pd.DataFrame, series_keys: list) -> tuple:
+    """
+    Series code and month number of each row of a frame sorted by
+    series_keys and month_date.
+    """
+    if series_keys:
+        series_codes = np.cumsum(group_start_mask(
+            *[input_df[key].to_numpy() for key in series_keys])) - 1
+    else:
+        series_codes = np.zeros(len(input_df), dtype=np.int64)
+    month_dates = input_df["month_date"]
+    month_numbers = (month_dates.dt.year * 12 + month_dates.dt.month).to_numpy(
+        np.int64)
+    return series_codes, month_numbers
+
+
+def add_series_flows(input_df: pd.DataFrame, series_keys: list) -> pd.DataFrame:
+    """
+    Sorts by series_keys and month_date once and adds, per series:
+    1. share_change = holdings - holdings of the previous month
+    2. net_flow = share_change * net_asset_value
+    3. market_movement = AUM - AUM of the previous month - net_flow
+    Values are NULL on the first month of a series and after a missing
+    month, never taken across series.
+    """
+    output_df = input_df.sort_values(
+        series_keys + ["month_date"], kind="stable", ignore_index=True)
+    series_codes, month_numbers = _series_positions(output_df, series_keys)
+
+    previous = np.arange(len(output_df)) - 1
+    has_previous = previous >= 0
+    has_previous[1:] &= (
+        (series_codes[1:] == series_codes[:-1])
+        & (month_numbers[1:] == month_numbers[:-1] + 1)
+    )
+
+    holdings = output_df["holdings"].to_numpy(np.float64)
+    assets = output_df["assets_under_management"].to_numpy(np.float64)
+    share_change = np.where(has_previous, holdings - holdings[previous], np.nan)
+    net_flow = share_change * output_df["net_asset_value"].to_numpy(np.float64)
+
+    output_df["share_change"] = share_change
+    output_df["net_flow"] = net_flow
+    output_df["market_movement"] = np.where(
+        has_previous, assets - assets[previous] - net_flow, np.nan)
+    return output_df
+
+
+def add_window_aggregates(
+        input_df: pd.DataFrame,
+        series_keys: list,
+        measures: list = WINDOW_MEASURES,
+        windows: list = ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    Adds trailing window sums of each measure for every series at once,
+    on a frame sorted by series_keys and month_date:
+    1. <measure>_<n>m: sum of the last n months, NULL unless all n months
+    have a value
+    2. <measure>_ytd: sum from January of the same year, NULL when no
+    month has a value
+    Windows are found with a searchsorted over (series, month) keys and
+    summed as differences of cumulative sums, written in place into one
+    block of window columns that is joined to the frame without copying.
+    """
+    series_codes, month_numbers = _series_positions(input_df, series_keys)
+
+    # (series, month) keys; a window never reaches the previous series
+    month_offsets = month_numbers - month_numbers.min(initial=0)
+    key_span = month_offsets.max(initial=0) + max(windows) + 1
+    row_keys = series_codes * key_span + month_offsets
+    del series_codes, month_offsets
+
+    window_starts = {
+        f"{window}m": np.searchsorted(row_keys, row_keys - (window - 1))
+        for window in windows
+    }
+    window_starts["ytd"] = np.searchsorted(
+        row_keys, row_keys - (month_numbers - 1) % 12)
+    window_lengths = {f"{window}m": window for window in windows}
+    del row_keys, month_numbers
+
+    # One row per window column, a contiguous column of the output block
+    window_values = np.empty(
+        (len(measures) * len(window_starts), len(input_df)))
+    column_position = 0
+    for measure in measures:
+        values = input_df[measure].to_numpy(np.float64)
+        has_value = ~np.isnan(values)
+        value_sums = np.concatenate(
+            [[0.0], np.cumsum(np.where(has_value, values, 0.0))])
+        value_counts = np.concatenate([[0], np.cumsum(has_value)])
+
+        for window_name, starts in window_starts.items():
+            window_sums = window_values[column_position]
+            np.subtract(value_sums[1:], value_sums[starts], out=window_sums)
+            required_count = window_lengths.get(window_name, 1)
+            window_sums[
+                value_counts[1:] - value_counts[starts] < required_count
+            ] = np.nan
+            column_position += 1
+
+    window_df = pd.DataFrame(
+        window_values.T,
+        columns=window_columns(measures, windows),
+        index=input_df.index,
+        copy=False,
+    )
+    return pd.concat([input_df, window_df], axis=1)
+
+
+def aggregate_flows(input_df: pd.DataFrame, level: str) -> pd.DataFrame:
+    """
+    Sums the additive measures of client-product monthly analytics to
+    the series of an AGGREGATION_LEVELS level and adds window aggregates.
+    """
+    series_keys = AGGREGATION_LEVELS[level]
+    level_df = input_df.groupby(
+        series_keys + ["month_date"], as_index=False
+    )[FLOW_MEASURES].sum(min_count=1)
+    return add_window_aggregates(level_df, series_keys)